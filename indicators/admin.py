@@ -134,10 +134,12 @@ class IndicatorAdmin(admin.ModelAdmin):
     export_to_csv.short_description = "Export selected indicators to CSV"
 
     def update_selected_indicators(self, request, queryset):
-        from .tasks import update_indicator
-        for indicator in queryset:
-            update_indicator.delay(indicator.name)
-        self.message_user(request, f"Started update for {queryset.count()} indicators")
+        from .tasks import update_all_indicators
+        series_ids = list(
+            queryset.filter(source='FRED').exclude(series_id__isnull=True).values_list('series_id', flat=True)
+        )
+        update_all_indicators.delay(series_ids)
+        self.message_user(request, f"Started update for {len(series_ids)} indicators")
     update_selected_indicators.short_description = "Update selected indicators"
 
     def get_urls(self):
@@ -0,0 +1,137 @@
+import logging
+from collections import defaultdict
+from datetime import date
+import numpy as np
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+from .analytics import diff, rolling_mean, rolling_std
+from .columnar import EPOCH_ORDINAL
+from .models import AlertEvent, AlertRule
+
+logger = logging.getLogger(__name__)
+
+# Comparisons of each rule kind between its metric and the threshold
+CONDITIONS = {
+    'above': lambda metric, threshold: metric > threshold,
+    'below': lambda metric, threshold: metric < threshold,
+    'rise': lambda metric, threshold: metric >= threshold,
+    'fall': lambda metric, threshold: metric <= -threshold,
+    'zscore': lambda metric, threshold: np.abs(metric) > threshold,
+}
+
+
+def alert_group(user_id):
+    """Channel layer group a user's websocket connections receive alerts on"""
+    return f"alerts_{user_id}"
+
+
+def _metric(values, kind, periods):
+    if kind in ('rise', 'fall'):
+        return diff(values, periods)
+    if kind == 'zscore':
+        # Against the preceding window, so an outlier does not dilute itself
+        mean, std = np.full(len(values), np.nan), np.full(len(values), np.nan)
+        mean[1:] = rolling_mean(values, periods)[:-1]
+        std[1:] = rolling_std(values, periods)[:-1]
+        return (values - mean) / std
+    return values
+
+
+def evaluate_alerts(arrays, since):
+    """
+    Check the active alert rules of a series against its observations
+    dated from ``since``, store the hits as AlertEvents and push them to
+    the rule owners' websockets. Returns the events created.
+
+    Only the new observations, plus the few before them the rules'
+    windows need, are examined. Rules sharing a kind and window are
+    compared in one (rules x observations) array operation, so the cost
+    grows with new data rather than with history.
+
+    The series' rules are locked while they are checked, so evaluations of
+    the same series running at once cannot both trigger a rule, and the
+    push happens once the events are committed.
+    """
+    with transaction.atomic():
+        events = _evaluate(arrays, since)
+        if events:
+            transaction.on_commit(lambda: notify(events))
+    return events
+
+
+def _evaluate(arrays, since):
+    rules = list(AlertRule.objects.select_for_update().filter(series_id=arrays.series_id, active=True))
+    if not rules or not len(arrays):
+        return []
+
+    first_new = int(np.searchsorted(arrays.days, since.toordinal() - EPOCH_ORDINAL))
+    if first_new == len(arrays):
+        return []
+    # One extra observation for the z-score's preceding window
+    lookback = max(rule.periods for rule in rules) + 1
+    start = max(0, first_new - lookback)
+    values = arrays.values[start:].astype(np.float64)
+    new_days = arrays.days[first_new:]
+    new_values = values[first_new - start:]
+
+    groups = defaultdict(list)
+    for rule in rules:
+        groups[rule.kind, rule.periods].append(rule)
+
+    events = []
+    for (kind, periods), group in groups.items():
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metric = _metric(values, kind, periods)[first_new - start:]
+        thresholds = np.array([rule.threshold for rule in group])
+        # Observations a rule has already been checked against never re-trigger it
+        checked = np.array([
+            -1 if rule.checked_through is None else rule.checked_through.toordinal() - EPOCH_ORDINAL
+            for rule in group
+        ])
+        with np.errstate(invalid='ignore'):
+            hits = CONDITIONS[kind](metric[None, :], thresholds[:, None]) & (new_days[None, :] > checked[:, None])
+        for row, column in zip(*np.nonzero(hits)):
+            events.append(AlertEvent(
+                rule=group[row],
+                date=date.fromordinal(int(new_days[column]) + EPOCH_ORDINAL),
+                value=float(new_values[column]),
+                metric=float(metric[column]),
+            ))
+
+    latest = date.fromordinal(int(arrays.days[-1]) + EPOCH_ORDINAL)
+    AlertRule.objects.filter(pk__in=[rule.pk for rule in rules]).update(checked_through=latest)
+    if not events:
+        return []
+
+    AlertEvent.objects.bulk_create(events)
+    AlertRule.objects.filter(pk__in={event.rule_id for event in events}).update(last_triggered_at=timezone.now())
+    logger.info(f"{len(events)} alerts triggered by {arrays.series_id}")
+    return events
+
+
+def notify(events):
+    """Push alert events to their owners' websocket connections, one message per user"""
+    by_user = defaultdict(list)
+    for event in events:
+        by_user[event.rule.user_id].append({
+            'rule_id': event.rule_id,
+            'name': event.rule.name,
+            'series_id': event.rule.series_id,
+            'kind': event.rule.kind,
+            'threshold': event.rule.threshold,
+            'date': event.date.isoformat(),
+            'value': event.value,
+            'metric': event.metric,
+        })
+    try:
+        channel_layer = get_channel_layer()
+        for user_id, alerts in by_user.items():
+            async_to_sync(channel_layer.group_send)(alert_group(user_id), {
+                'type': 'alert.triggered',
+                'alerts': alerts,
+            })
+    except Exception as e:
+        # The events are stored either way; clients can still list them
+        logger.warning(f"Could not push alerts: {str(e)}")
@@ -0,0 +1,173 @@
+import numpy as np
+from .columnar import cached_for_versions
+from .rollups import PERIOD_MONTHS
+
+# Calendars series can be aligned on
+FREQUENCIES = ('D', 'W', 'M', 'Q', 'A')
+# How observations falling in one period are reduced to a single value;
+# each takes the values and the index each period starts at
+AGGREGATIONS = {
+    'last': lambda values, starts: values[np.append(starts[1:], len(values)) - 1],
+    'first': lambda values, starts: values[starts],
+    'mean': lambda values, starts: np.add.reduceat(values, starts) / np.diff(np.append(starts, len(values))),
+    'sum': lambda values, starts: np.add.reduceat(values, starts),
+    'min': lambda values, starts: np.minimum.reduceat(values, starts),
+    'max': lambda values, starts: np.maximum.reduceat(values, starts),
+}
+# How periods a series has no observation in are filled
+FILLS = ('none', 'ffill', 'bfill', 'interpolate')
+JOINS = ('outer', 'inner')
+# 1970-01-01 was a Thursday; shifting by three days starts weeks on Monday
+WEEK_OFFSET = 3
+
+
+def period_keys(days, frequency):
+    """Map days since 1970-01-01 to integer period numbers of ``frequency``"""
+    if frequency == 'D':
+        return days.astype(np.int64)
+    if frequency == 'W':
+        return (days.astype(np.int64) + WEEK_OFFSET) // 7
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return months // PERIOD_MONTHS[frequency]
+
+
+def period_dates(keys, frequency):
+    """Return the first day of each period number as datetime64[D]"""
+    if frequency == 'D':
+        return keys.astype('datetime64[D]')
+    if frequency == 'W':
+        return (keys * 7 - WEEK_OFFSET).astype('datetime64[D]')
+    return (keys * PERIOD_MONTHS[frequency]).astype('datetime64[M]').astype('datetime64[D]')
+
+
+def resample(arrays, frequency, how='last'):
+    """
+    Reduce SeriesArrays to one value per period of ``frequency`` using the
+    aggregation ``how`` (see AGGREGATIONS). Returns ``(keys, values)``.
+    """
+    keys = period_keys(arrays.days, frequency)
+    if not len(keys):
+        return keys, arrays.values[:0]
+    # Observations are sorted by date, so a period starts where its key changes
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+    return keys[starts], AGGREGATIONS[how](arrays.values, starts)
+
+
+def fill(matrix, method, limit=None):
+    """
+    Fill the NaN gaps of each row of ``matrix`` in place with ``method``
+    (see FILLS). ``limit`` caps how many periods 'ffill' and 'bfill'
+    carry a value; 'interpolate' only fills between two known values.
+    """
+    if method == 'none' or not matrix.size:
+        return matrix
+    if method == 'bfill':
+        matrix[:, ::-1] = fill(matrix[:, ::-1].copy(), 'ffill', limit)
+        return matrix
+    periods = np.arange(matrix.shape[1])
+    valid = ~np.isnan(matrix)
+    if method == 'ffill':
+        # Position of the latest known value at or before each period
+        source = np.maximum.accumulate(np.where(valid, periods, -1), axis=1)
+        filled = np.take_along_axis(matrix, np.maximum(source, 0), axis=1)
+        keep = source >= 0
+        if limit is not None:
+            keep &= periods - source <= limit
+        matrix[:] = np.where(keep, filled, np.nan)
+        return matrix
+    for row in range(len(matrix)):
+        known = periods[valid[row]]
+        if len(known) > 1:
+            inside = slice(known[0], known[-1] + 1)
+            matrix[row, inside] = np.interp(periods[inside], known, matrix[row, known])
+    return matrix
+
+
+def align(series, frequency, how='last', fills='none', limit=None, join='outer'):
+    """
+    Resample each SeriesArrays in ``series`` to ``frequency`` and join them
+    on every period from the earliest to the latest observation ('outer')
+    or only the periods every series has a value for after filling
+    ('inner').
+
+    ``how`` and ``fills`` are one rule for every series or a list with one
+    rule per series. Returns ``(keys, matrix)``: the sorted period numbers
+    and a float64 matrix with one row per series and NaN where a series
+    has no value.
+    """
+    hows = [how] * len(series) if isinstance(how, str) else how
+    fills = [fills] * len(series) if isinstance(fills, str) else fills
+    resampled = [resample(arrays, frequency, rule) for arrays, rule in zip(series, hows)]
+    observed = [k for k, _ in resampled if len(k)]
+    if observed:
+        # A contiguous calendar, so coarser series have gaps to fill
+        keys = np.arange(min(k[0] for k in observed), max(k[-1] for k in observed) + 1)
+    else:
+        keys = np.empty(0, np.int64)
+    matrix = np.full((len(resampled), len(keys)), np.nan)
+    for row, (series_keys, values) in enumerate(resampled):
+        matrix[row, np.searchsorted(keys, series_keys)] = values
+
+    # Fill rows sharing a method together, so each method is one array pass
+    for method in set(fills):
+        rows = [row for row, rule in enumerate(fills) if rule == method]
+        matrix[rows] = fill(matrix[rows], method, limit)
+    if join == 'inner':
+        complete = ~np.isnan(matrix).any(axis=0)
+        keys, matrix = keys[complete], matrix[:, complete]
+    return keys, matrix
+
+
+def parse_series_specs(spec, default_how='last', default_fill='none'):
+    """
+    Parse ``'GDP:mean:ffill,UNRATE'`` into ``[(series_id, how, fill)]``,
+    using the defaults for omitted rules. Raises ValueError when invalid.
+    """
+    specs = []
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        series_id, how, method, *rest = part.split(':') + ['', '']
+        how, method = how or default_how, method or default_fill
+        if not series_id:
+            raise ValueError(f"Missing series ID in '{part}'")
+        if any(rest):
+            raise ValueError(f"Too many rules in '{part}'; use SERIES:aggregation:fill")
+        if how not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation '{how}'; use one of {', '.join(AGGREGATIONS)}")
+        if method not in FILLS:
+            raise ValueError(f"Unknown fill '{method}'; use one of {', '.join(FILLS)}")
+        specs.append((series_id.upper(), how, method))
+    return specs
+
+
+def frame_series(specs, frequency, start=None, end=None, limit=None, join='outer'):
+    """
+    Join stored series described by ``(series_id, how, fill)`` specs onto
+    one ``frequency`` calendar between ``start`` and ``end``.
+
+    Returns ``(frame, missing)``: a columnar dict with a shared ``index``
+    of period start dates and one value list per series (None where
+    empty), or None and the series that are not stored. Frames are cached
+    per set of blob versions.
+    """
+    series_ids = [series_id for series_id, _, _ in specs]
+
+    def cache_key(versions):
+        rules = ','.join(f"{series_id}:{how}:{method}" for series_id, how, method in specs)
+        return f"frame:{rules}:{','.join(map(str, versions))}:{frequency}:{start}:{end}:{limit}:{join}"
+
+    def compute(series):
+        keys, matrix = align(
+            [arrays.between(start, end) for arrays in series], frequency,
+            [how for _, how, _ in specs], [method for _, _, method in specs], limit, join
+        )
+        return {
+            'frequency': frequency,
+            'columns': series_ids,
+            'index': np.datetime_as_string(period_dates(keys, frequency)).tolist(),
+            'data': {
+                series_id: [None if np.isnan(value) else value for value in row.tolist()]
+                for series_id, row in zip(series_ids, matrix)
+            },
+        }
+
+    return cached_for_versions(series_ids, cache_key, compute)
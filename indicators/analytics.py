@@ -0,0 +1,192 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .columnar import SeriesArrays, cached_for_versions
+from .downsample import downsample
+
+# Longest rolling window, in observations
+MAX_WINDOW = 5000
+# Most transforms one request may chain
+MAX_TRANSFORMS = 10
+# Window rows compared at a time by the rolling percentile, bounding memory
+PERCENTILE_CHUNK = 1_000_000
+
+
+def _rolling_sums(values, window):
+    """
+    Rolling sums of the valid values, their squares and their count over
+    ``window`` observations, aligned with the window's last observation
+    (the first ``window - 1`` entries are NaN). NaN inputs are skipped.
+    """
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+
+    def rolling(a):
+        out = np.full(len(a), np.nan)
+        if window <= len(a):
+            c = np.concatenate([[0.0], np.cumsum(a)])
+            out[window - 1:] = c[window:] - c[:-window]
+        return out
+
+    return rolling(x), rolling(x * x), rolling(valid.astype(np.float64))
+
+
+def rolling_mean(values, window):
+    total, _, count = _rolling_sums(values, window)
+    with np.errstate(invalid='ignore'):
+        return np.where(count == window, total / window, np.nan)
+
+
+def rolling_std(values, window):
+    """Sample standard deviation over a trailing window (volatility)"""
+    # Centring first keeps the running sums small and limits cancellation error
+    total, squares, count = _rolling_sums(values - np.nanmean(values), window)
+    with np.errstate(invalid='ignore'):
+        var = (squares - total * total / window) / (window - 1)
+        # Clip the tiny negatives floating point cancellation can leave
+        return np.where(count == window, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def zscore(values, window=None):
+    """Distance from the mean in standard deviations, trailing or full-sample"""
+    if window is None:
+        mean, std = np.nanmean(values), np.nanstd(values, ddof=1)
+    else:
+        mean, std = rolling_mean(values, window), rolling_std(values, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (values - mean) / std
+
+
+def percentile(values, window=None):
+    """Percentile rank (0-100) of each value, within a trailing window or the full sample"""
+    out = np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+    if window is None:
+        ordered = np.sort(values[valid])
+        out[valid] = np.searchsorted(ordered, values[valid], side='right') / len(ordered) * 100
+        return out
+    if window > len(values):
+        return out
+
+    windows = sliding_window_view(values, window)
+    current = values[window - 1:]
+    step = max(1, PERCENTILE_CHUNK // window)
+    for lo in range(0, len(windows), step):
+        chunk, now = windows[lo:lo + step], current[lo:lo + step, None]
+        # NaN compares false, so only valid window values are counted
+        out[window - 1 + lo:window - 1 + lo + len(chunk)] = (
+            (chunk <= now).sum(axis=1) / (~np.isnan(chunk)).sum(axis=1) * 100
+        )
+    out[~valid] = np.nan
+    return out
+
+
+def diff(values, periods=1):
+    out = np.full(len(values), np.nan)
+    out[periods:] = values[periods:] - values[:-periods]
+    return out
+
+
+def pct_change(values, periods=1):
+    out = np.full(len(values), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[periods:] = (values[periods:] / values[:-periods] - 1) * 100
+    return out
+
+
+def log(values):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(values)
+
+
+# name -> (function, whether it takes a window/periods argument, default)
+TRANSFORMS = {
+    'rolling_mean': (rolling_mean, True, None),
+    'rolling_std': (rolling_std, True, None),
+    'zscore': (zscore, True, None),
+    'percentile': (percentile, True, None),
+    'diff': (diff, True, 1),
+    'pct_change': (pct_change, True, 1),
+    'log': (log, False, None),
+}
+# Transforms that cannot run without a window
+WINDOW_REQUIRED = {'rolling_mean', 'rolling_std'}
+
+
+def parse_transforms(spec):
+    """
+    Parse a chain such as ``'pct_change:12,rolling_mean:3'`` into
+    ``[(name, argument)]`` steps, raising ValueError when it is invalid.
+    """
+    steps = []
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, argument = part.partition(':')
+        if name not in TRANSFORMS:
+            raise ValueError(f"Unknown transform '{name}'; use one of {', '.join(TRANSFORMS)}")
+        _, takes_argument, default = TRANSFORMS[name]
+        if argument and not takes_argument:
+            raise ValueError(f"Transform '{name}' takes no argument")
+        value = int(argument) if argument else default
+        if value is None and name in WINDOW_REQUIRED:
+            raise ValueError(f"Transform '{name}' needs a window, e.g. '{name}:20'")
+        if value is not None and not 1 <= value <= MAX_WINDOW:
+            raise ValueError(f"Window of '{name}' must be between 1 and {MAX_WINDOW}")
+        if name in ('rolling_std', 'zscore') and value == 1:
+            raise ValueError(f"Window of '{name}' must be at least 2")
+        steps.append((name, value))
+    if not steps:
+        raise ValueError("At least one transform is required")
+    if len(steps) > MAX_TRANSFORMS:
+        raise ValueError(f"At most {MAX_TRANSFORMS} transforms can be chained")
+    return steps
+
+
+def apply_transforms(arrays, steps):
+    """
+    Run ``steps`` in order over a series' values. Windows count
+    observations, and undefined results (warm-up, division by zero, log of
+    a non-positive value) become NaN.
+    """
+    values = arrays.values.astype(np.float64)
+    for name, argument in steps:
+        func, takes_argument, _ = TRANSFORMS[name]
+        values = func(values, argument) if takes_argument else func(values)
+        values[~np.isfinite(values)] = np.nan
+    return SeriesArrays(arrays.series_id, arrays.days, values, arrays.version)
+
+
+def transform_series(series_id, steps, start=None, end=None, points=None):
+    """
+    Return a stored series transformed by ``steps`` between ``start`` and
+    ``end``, optionally downsampled to ``points``, as parallel ``dates``
+    and ``values`` lists without undefined values. Returns None when the
+    series is not stored.
+
+    Transforms run over the full history before the range is cut, so
+    windows at the start of the range are already warm. Results are
+    cached per blob version.
+    """
+    chain = ','.join(name if argument is None else f"{name}:{argument}" for name, argument in steps)
+
+    def cache_key(versions):
+        return f"analytics:{series_id}:{versions[0]}:{chain}:{start}:{end}:{points}"
+
+    def compute(series):
+        arrays = series[0]
+        transformed = apply_transforms(arrays, steps).between(start, end)
+        defined = ~np.isnan(transformed.values)
+        result_arrays = SeriesArrays(
+            series_id, transformed.days[defined], transformed.values[defined], arrays.version
+        )
+        if points is not None:
+            result_arrays = downsample(result_arrays, points)
+        return {
+            'series_id': series_id,
+            'version': arrays.version,
+            'transforms': chain,
+            'points': len(result_arrays),
+            'dates': np.datetime_as_string(result_arrays.dates).tolist(),
+            'values': result_arrays.values.tolist(),
+        }
+
+    result, _ = cached_for_versions([series_id], cache_key, compute)
+    return result
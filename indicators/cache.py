@@ -0,0 +1,87 @@
+import logging
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+def cache_get(key, unavailable=None):
+    """
+    Read from the shared FRED cache, returning ``unavailable`` when the
+    cache cannot be reached (a miss by default)
+    """
+    try:
+        return caches['fred'].get(key)
+    except Exception as e:
+        logger.warning(f"FRED cache unavailable: {str(e)}")
+        return unavailable
+
+
+def cache_set(key, value, timeout):
+    """Write to the shared FRED cache, ignoring an unreachable cache. Returns whether it was written"""
+    try:
+        caches['fred'].set(key, value, timeout=timeout)
+        return True
+    except Exception as e:
+        logger.warning(f"FRED cache unavailable: {str(e)}")
+        return False
+
+
+def cache_add(key, value, timeout):
+    """
+    Write to the shared FRED cache only if ``key`` is not set, atomically.
+    Returns whether it was written, or None when the cache cannot be reached.
+    """
+    try:
+        return caches['fred'].add(key, value, timeout=timeout)
+    except Exception as e:
+        logger.warning(f"FRED cache unavailable: {str(e)}")
+        return None
+
+
+def cache_incr(key, timeout):
+    """
+    Add one to a counter in the shared FRED cache, starting it at zero
+    with ``timeout`` when missing. Returns the new count, or None when the
+    cache cannot be reached.
+    """
+    try:
+        cache = caches['fred']
+        cache.add(key, 0, timeout=timeout)
+        return cache.incr(key)
+    except Exception as e:
+        logger.warning(f"FRED cache unavailable: {str(e)}")
+        return None
+
+
+def cache_delete(key):
+    """Delete from the shared FRED cache, ignoring an unreachable cache"""
+    try:
+        caches['fred'].delete(key)
+    except Exception as e:
+        logger.warning(f"FRED cache unavailable: {str(e)}")
+
+
+async def acache_get(key, unavailable=None):
+    """Async version of cache_get"""
+    return await sync_to_async(cache_get)(key, unavailable)
+
+
+async def acache_set(key, value, timeout):
+    """Async version of cache_set"""
+    return await sync_to_async(cache_set)(key, value, timeout)
+
+
+async def acache_add(key, value, timeout):
+    """Async version of cache_add"""
+    return await sync_to_async(cache_add)(key, value, timeout)
+
+
+async def acache_incr(key, timeout):
+    """Async version of cache_incr"""
+    return await sync_to_async(cache_incr)(key, timeout)
+
+
+async def acache_delete(key):
+    """Async version of cache_delete"""
+    await sync_to_async(cache_delete)(key)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import re
+import time
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import Case, IntegerField, Max, Q, Value, When
+from django.utils import timezone
+from .fred_api import FREDAPI
+from .models import CatalogSeries
+from .ratelimit import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+# FRED's series/updates endpoint only covers roughly the last two weeks;
+# catalogs synced longer ago than this are rebuilt from the release lists
+UPDATES_WINDOW = timedelta(days=13)
+# series/updates takes its time bounds in US Central time
+FRED_TIMEZONE = ZoneInfo('America/Chicago')
+# Rows per INSERT ... ON CONFLICT statement when upserting catalog entries
+CATALOG_BATCH_SIZE = 1000
+
+TITLE_VECTOR = SearchVector('title', config='english')
+
+
+def catalog_query(term):
+    """
+    Build a full-text query matching every word of ``term``, the last one
+    as a prefix so partially typed words already match. Returns None when
+    the term has no words.
+    """
+    words = re.findall(r'\w+', term.lower())
+    if not words:
+        return None
+    words[-1] += ':*'
+    return SearchQuery(' & '.join(words), search_type='raw', config='english')
+
+
+def search_catalog(term, limit=10):
+    """
+    Search the local catalog, in the shape of ``FREDAPI.search_series``.
+
+    Series whose ID is the term come first, then series whose ID starts with
+    it, then title matches ranked by relevance and popularity.
+    """
+    id_prefix = re.sub(r'\s+', '', term).upper()
+    matches = Q(series_id__startswith=id_prefix) if id_prefix else Q(pk__in=[])
+    rank = Value(0.0)
+    query = catalog_query(term)
+    queryset = CatalogSeries.objects.all()
+    if query is not None:
+        queryset = queryset.annotate(search=TITLE_VECTOR)
+        matches |= Q(search=query)
+        rank = SearchRank(TITLE_VECTOR, query)
+
+    series = list(
+        queryset.filter(matches)
+        .annotate(
+            id_match=Case(
+                When(series_id=id_prefix, then=2),
+                When(series_id__startswith=id_prefix, then=1),
+                default=0,
+                output_field=IntegerField(),
+            ),
+            rank=rank,
+        )
+        .order_by('-id_match', '-rank', '-popularity', 'series_id')
+        .values('series_id', 'title', 'units', 'frequency', 'popularity', 'last_updated')[:limit]
+    )
+    for entry in series:
+        entry['id'] = entry.pop('series_id')
+    return {'count': len(series), 'series': series}
+
+
+def store_catalog_entries(seriess):
+    """
+    Bulk upsert series metadata as returned by FRED (``seriess`` entries).
+    Returns the number of entries written.
+    """
+    rows = {}
+    for series in seriess:
+        series_id = series.get('id')
+        if not series_id:
+            continue
+        rows[series_id] = CatalogSeries(
+            series_id=series_id,
+            title=(series.get('title') or '')[:500],
+            units=(series.get('units') or '')[:200],
+            frequency=(series.get('frequency') or '')[:50],
+            popularity=int(series.get('popularity') or 0),
+            last_updated=series.get('last_updated') or '',
+        )
+    if not rows:
+        return 0
+
+    # Sorted so concurrent upserts of overlapping releases lock rows in the
+    # same order and cannot deadlock
+    CatalogSeries.objects.bulk_create(
+        [rows[series_id] for series_id in sorted(rows)],
+        batch_size=CATALOG_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['series_id'],
+        update_fields=['title', 'units', 'frequency', 'popularity', 'last_updated', 'synced_at'],
+    )
+    return len(rows)
+
+
+def last_catalog_sync():
+    """Return when the catalog was last written to, or None when it is empty"""
+    return CatalogSeries.objects.aggregate(last_sync=Max('synced_at'))['last_sync']
+
+
+async def _store_pages(pages):
+    written = 0
+    async for page in pages:
+        written += await database_sync_to_async(store_catalog_entries)(page)
+    return written
+
+
+async def sync_catalog(full=False, concurrency=None):
+    """
+    Bring the local catalog up to date with FRED.
+
+    An empty or long-unsynced catalog (or ``full=True``) is rebuilt by
+    walking the series of every FRED release, ``concurrency`` releases at a
+    time. Otherwise only series FRED reports as updated since the last sync
+    are fetched. Returns the number of catalog entries written.
+    """
+    started = time.perf_counter()
+    last_sync = await database_sync_to_async(last_catalog_sync)()
+    if last_sync is not None and timezone.now() - last_sync > UPDATES_WINDOW:
+        full = True
+
+    async with FREDAPI(priority=BACKGROUND) as fred_api:
+        if full or last_sync is None:
+            releases = []
+            async for page in fred_api.iter_pages('releases', 'releases'):
+                releases.extend(release['id'] for release in page)
+
+            semaphore = asyncio.Semaphore(concurrency or settings.FRED_REFRESH_CONCURRENCY)
+
+            async def sync_release(release_id):
+                async with semaphore:
+                    return await _store_pages(
+                        fred_api.iter_pages('release/series', 'seriess', release_id=release_id)
+                    )
+
+            written = sum(await asyncio.gather(*(sync_release(release_id) for release_id in releases)))
+        else:
+            # Overlap the previous sync a little so nothing falls in between
+            start_time = (last_sync - timedelta(hours=1)).astimezone(FRED_TIMEZONE)
+            written = await _store_pages(fred_api.iter_pages(
+                'series/updates', 'seriess',
+                filter_value='all',
+                start_time=start_time.strftime('%Y%m%d%H%M'),
+                end_time=timezone.now().astimezone(FRED_TIMEZONE).strftime('%Y%m%d%H%M'),
+            ))
+
+    logger.info(f"Synced {written} catalog entries in {time.perf_counter() - started:.2f}s")
+    return written
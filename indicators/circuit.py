@@ -0,0 +1,140 @@
+import logging
+import random
+import time
+from django.conf import settings
+from .cache import acache_add, acache_delete, acache_get, acache_incr, acache_set
+
+logger = logging.getLogger(__name__)
+
+# Read back in place of a value when the cache cannot be reached
+UNREACHABLE = object()
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"FRED circuit open, retry in {retry_after:.0f}s")
+
+
+def backoff_delay(attempt, base, cap):
+    """
+    Exponential backoff with full jitter: a random delay between 0 and
+    ``base * 2 ** attempt``, capped at ``cap`` seconds. The randomness keeps
+    workers that failed together from retrying in lockstep.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by every process through the 'fred' cache.
+
+    After FRED_CIRCUIT_FAILURE_THRESHOLD failures within
+    FRED_CIRCUIT_FAILURE_WINDOW seconds the circuit opens and callers fail
+    fast for FRED_CIRCUIT_OPEN_SECONDS. It is then half-open: a single
+    trial request, claimed atomically by the first caller, goes through
+    while the others keep failing fast, and its failure reopens the
+    circuit while its success closes it. When the cache is unreachable the
+    state is kept per process instead.
+    """
+    def __init__(self, name='fred'):
+        self.failures_key = f"circuit:{name}:failures"
+        # (open until, half-open until) timestamps once the circuit opened
+        self.state_key = f"circuit:{name}:state"
+        self.trial_key = f"circuit:{name}:trial"
+        self.local = {}
+
+    async def _get(self, key):
+        value = await acache_get(key, unavailable=UNREACHABLE)
+        return self.local.get(key) if value is UNREACHABLE else value
+
+    async def _set(self, key, value, timeout):
+        self.local[key] = value
+        await acache_set(key, value, timeout)
+
+    async def _delete(self, key):
+        self.local.pop(key, None)
+        await acache_delete(key)
+
+    async def _incr(self, key, timeout):
+        count = await acache_incr(key, timeout)
+        if count is None:
+            count = self.local.get(key, 0) + 1
+        self.local[key] = count
+        return count
+
+    async def _claim_trial(self):
+        # Long enough for the trial call and its retries
+        seconds = settings.FRED_REQUEST_TIMEOUT * (settings.FRED_RETRY_ATTEMPTS + 1)
+        until = time.time() + seconds
+        claimed = await acache_add(self.trial_key, until, seconds)
+        if claimed is None:
+            claimed = self.local.get(self.trial_key, 0) <= time.time()
+        if claimed:
+            self.local[self.trial_key] = until
+        return claimed
+
+    async def _state(self):
+        return await self._get(self.state_key) or (0, 0)
+
+    async def retry_after(self):
+        """Seconds until the circuit lets requests through again (0 if closed)"""
+        open_until, _ = await self._state()
+        return max(0.0, open_until - time.time())
+
+    async def check(self):
+        """
+        Raise CircuitOpenError unless a request may be sent now. Returns
+        True when the caller claimed the half-open trial, which it must
+        pass to record_success or record_failure.
+        """
+        open_until, half_open_until = await self._state()
+        now = time.time()
+        if open_until > now:
+            raise CircuitOpenError(open_until - now)
+        if half_open_until <= now:
+            return False
+        if not await self._claim_trial():
+            trial_until = await self._get(self.trial_key) or now
+            raise CircuitOpenError(max(0.0, trial_until - now))
+        return True
+
+    async def record_success(self, trial=False):
+        if trial:
+            logger.info("Closing FRED circuit after a successful trial request")
+            await self._delete(self.state_key)
+            await self._delete(self.trial_key)
+            await self._delete(self.failures_key)
+        # Only processes that saw failures reset the count; elsewhere it
+        # simply expires with the failure window
+        elif self.local.get(self.failures_key):
+            await self._set(self.failures_key, 0, settings.FRED_CIRCUIT_FAILURE_WINDOW)
+
+    async def record_failure(self, trial=False):
+        if trial:
+            await self._open("a failed trial request")
+            return
+        failures = await self._incr(self.failures_key, settings.FRED_CIRCUIT_FAILURE_WINDOW)
+        if failures >= settings.FRED_CIRCUIT_FAILURE_THRESHOLD:
+            await self._open(f"{failures} failures")
+
+    async def _open(self, reason):
+        open_seconds = settings.FRED_CIRCUIT_OPEN_SECONDS
+        window = settings.FRED_CIRCUIT_FAILURE_WINDOW
+        logger.warning(f"Opening FRED circuit for {open_seconds}s after {reason}")
+        now = time.time()
+        # Half-open after the pause, until a trial settles it or the window passes
+        await self._set(self.state_key, (now + open_seconds, now + open_seconds + window), open_seconds + window)
+        await self._delete(self.trial_key)
+        await self._delete(self.failures_key)
+
+
+_breaker = None
+
+
+def get_breaker():
+    """Return the process-wide FRED circuit breaker"""
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker()
+    return _breaker
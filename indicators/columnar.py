@@ -0,0 +1,179 @@
+from datetime import date, timedelta
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from .cache import cache_get, cache_set
+from .models import Observation, SeriesBlob
+
+# On-disk layout of SeriesBlob columns
+DAY_DTYPE = np.dtype('<i4')
+VALUE_DTYPE = np.dtype('<f8')
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class SeriesArrays:
+    """
+    Observations of one series as two parallel NumPy arrays sorted by date:
+    ``days`` (int32 days since 1970-01-01) and ``values`` (float64).
+
+    Arrays loaded from a SeriesBlob are read-only views of the stored
+    bytes; copy them before modifying.
+    """
+    __slots__ = ('series_id', 'days', 'values', 'version')
+
+    def __init__(self, series_id, days, values, version=0):
+        self.series_id = series_id
+        self.days = days
+        self.values = values
+        self.version = version
+
+    @classmethod
+    def from_blob(cls, blob):
+        return cls(
+            blob.series_id,
+            np.frombuffer(blob.days, dtype=DAY_DTYPE),
+            np.frombuffer(blob.values, dtype=VALUE_DTYPE),
+            blob.version,
+        )
+
+    @classmethod
+    def from_rows(cls, series_id, rows):
+        """Build arrays from ``(date, value)`` pairs in any order"""
+        rows = sorted(rows)
+        days = np.fromiter((day.toordinal() - EPOCH_ORDINAL for day, _ in rows), dtype=DAY_DTYPE, count=len(rows))
+        values = np.fromiter((float(value) for _, value in rows), dtype=VALUE_DTYPE, count=len(rows))
+        return cls(series_id, days, values)
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def dates(self):
+        """The observation dates as a datetime64[D] array"""
+        return self.days.astype('datetime64[D]')
+
+    def between(self, start=None, end=None):
+        """Return the observations dated from ``start`` to ``end`` inclusive, as views"""
+        lo = 0 if start is None else np.searchsorted(self.days, start.toordinal() - EPOCH_ORDINAL)
+        hi = len(self.days) if end is None else np.searchsorted(self.days, end.toordinal() - EPOCH_ORDINAL, side='right')
+        return SeriesArrays(self.series_id, self.days[lo:hi], self.values[lo:hi], self.version)
+
+    def merge(self, other):
+        """
+        Return these observations combined with ``other``'s; where both have
+        the same date, ``other`` wins so revised values replace old ones.
+        """
+        days = np.concatenate([self.days, other.days])
+        values = np.concatenate([self.values, other.values])
+        order = np.argsort(days, kind='stable')
+        days, values = days[order], values[order]
+        # Stable sort keeps other's entry last among equal dates
+        last = np.append(days[1:] != days[:-1], True)
+        return SeriesArrays(self.series_id, days[last], values[last], self.version)
+
+    def to_observations(self, newest_first=False):
+        """Return ``{'date', 'value'}`` dicts in the shape FREDAPI returns"""
+        dates = np.datetime_as_string(self.dates).tolist()
+        values = self.values.tolist()
+        observations = [
+            {'date': day, 'value': str(value)}
+            for day, value in zip(dates, values)
+        ]
+        if newest_first:
+            observations.reverse()
+        return observations
+
+
+def write_series_blob(series_id, rows):
+    """
+    Merge ``(date, value)`` pairs into a series' blob, creating it when
+    missing, and bump its version. Returns the stored SeriesArrays.
+    """
+    new = SeriesArrays.from_rows(series_id, rows)
+    with transaction.atomic():
+        blob = _lock_blob(series_id)
+        return _save_blob(blob, _stored(blob).merge(new))
+
+
+def replace_series_blob(series_id, rows, since=None):
+    """
+    Replace a series' observations dated from ``since`` onward (all of
+    them when None) with ``(date, value)`` pairs and bump its version.
+    The row is kept even when emptied, so versions only ever increase and
+    results cached for an older version are never served again.
+    Returns the stored SeriesArrays.
+    """
+    new = SeriesArrays.from_rows(series_id, rows)
+    with transaction.atomic():
+        blob = _lock_blob(series_id)
+        if since is not None:
+            new = _stored(blob).between(end=since - timedelta(days=1)).merge(new)
+        return _save_blob(blob, new)
+
+
+def load_series_arrays(series_id):
+    """
+    Return a series' stored observations as SeriesArrays, or None when
+    nothing is stored. Series stored before blobs existed are packed by
+    migration 0012.
+    """
+    blob = SeriesBlob.objects.filter(series_id=series_id, count__gt=0).first()
+    return None if blob is None else SeriesArrays.from_blob(blob)
+
+
+def cached_for_versions(series_ids, cache_key, compute):
+    """
+    Return ``compute(series)`` over the stored SeriesArrays of
+    ``series_ids``, cached per set of blob versions. ``cache_key(versions)`` builds the key from the
+    versions in ``series_ids`` order.
+
+    Returns ``(result, missing)``: None and the series that are not stored
+    when any is missing.
+    """
+    stored = dict(
+        SeriesBlob.objects.filter(series_id__in=series_ids, count__gt=0).values_list('series_id', 'version')
+    )
+    if len(stored) == len(set(series_ids)):
+        cached = cache_get(cache_key([stored[series_id] for series_id in series_ids]))
+        if cached is not None:
+            return cached, []
+
+    series, missing = [], []
+    for series_id in series_ids:
+        arrays = load_series_arrays(series_id)
+        if arrays is None:
+            missing.append(series_id)
+        else:
+            series.append(arrays)
+    if missing:
+        return None, missing
+
+    result = compute(series)
+    cache_set(cache_key([arrays.version for arrays in series]), result, settings.FRED_DERIVED_CACHE_TTL)
+    return result, []
+
+
+def _lock_blob(series_id):
+    # Insert the row before locking it so concurrent first writes
+    # serialize on it instead of both packing the history
+    SeriesBlob.objects.bulk_create([SeriesBlob(series_id=series_id)], ignore_conflicts=True)
+    return SeriesBlob.objects.select_for_update().get(series_id=series_id)
+
+
+def _stored(blob):
+    if blob.count:
+        return SeriesArrays.from_blob(blob)
+    return SeriesArrays.from_rows(
+        blob.series_id,
+        list(Observation.objects.filter(series_id=blob.series_id).values_list('date', 'value'))
+    )
+
+
+def _save_blob(blob, arrays):
+    blob.days = arrays.days.tobytes()
+    blob.values = arrays.values.tobytes()
+    blob.count = len(arrays)
+    blob.version += 1
+    blob.save()
+    arrays.version = blob.version
+    return arrays
@@ -0,0 +1,104 @@
+import numpy as np
+from .alignment import align, period_dates
+from .analytics import apply_transforms
+from .columnar import cached_for_versions
+
+# Most series one correlation request may compare
+MAX_CORRELATION_SERIES = 20
+# Longest lead/lag, in periods of the aligned frequency
+MAX_LAG = 60
+# Fewest overlapping periods a correlation is reported for
+MIN_OVERLAP = 12
+
+
+def lagged_correlations(matrix, max_lag):
+    """
+    Pearson correlations between every pair of rows of ``matrix`` at lags
+    ``-max_lag..max_lag``, using the periods where both rows have a value.
+
+    Returns an array of shape ``(2 * max_lag + 1, n, n)``. Entry
+    ``[lag + max_lag, i, j]`` correlates row ``i`` at ``t`` with row ``j``
+    at ``t + lag``, so a peak at a positive lag means ``i`` leads ``j``.
+    Pairs with fewer than MIN_OVERLAP common periods are NaN.
+    """
+    n, periods = matrix.shape
+    # Centring keeps the sums of squares small and limits cancellation error
+    with np.errstate(invalid='ignore'):
+        centred = matrix - np.nanmean(matrix, axis=1, keepdims=True)
+    present = (~np.isnan(centred)).astype(np.float64)
+    x = np.where(present > 0, centred, 0.0)
+    result = np.full((2 * max_lag + 1, n, n), np.nan)
+
+    for lag in range(min(max_lag, periods - 1) + 1):
+        # a[:, t] pairs with b[:, t + lag]
+        ma, mb = present[:, :periods - lag], present[:, lag:]
+        a, b = x[:, :periods - lag], x[:, lag:]
+        # Every sum is restricted to periods where both rows are present
+        count = ma @ mb.T
+        sum_a, sum_b = a @ mb.T, ma @ b.T
+        sum_aa, sum_bb = (a * a) @ mb.T, ma @ (b * b).T
+        sum_ab = a @ b.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = count * sum_ab - sum_a * sum_b
+            var = (count * sum_aa - sum_a * sum_a) * (count * sum_bb - sum_b * sum_b)
+            corr = np.where(count >= MIN_OVERLAP, cov / np.sqrt(var), np.nan)
+        result[max_lag + lag] = np.clip(corr, -1.0, 1.0)
+        # Row i lagging row j by ``lag`` is row j leading row i
+        result[max_lag - lag] = result[max_lag + lag].T
+    return result
+
+
+def _nullable(array):
+    return [None if np.isnan(value) else round(float(value), 6) for value in array.ravel()]
+
+
+def correlate_series(series_ids, frequency='M', max_lag=12, start=None, end=None, steps=None):
+    """
+    Align stored series on ``frequency`` and return their correlation
+    matrices for every lag up to ``max_lag`` periods, after applying
+    optional analytics ``steps`` (e.g. ``pct_change:12``) to each series.
+
+    Returns None for the result and the list of series that are not
+    stored when any is missing. Results are cached per set of blob
+    versions.
+    """
+    chain = ','.join(name if argument is None else f"{name}:{argument}" for name, argument in steps or [])
+
+    def cache_key(versions):
+        return (
+            f"correlation:{','.join(series_ids)}:{','.join(map(str, versions))}:"
+            f"{frequency}:{max_lag}:{start}:{end}:{chain}"
+        )
+
+    def compute(series):
+        if steps:
+            series = [apply_transforms(arrays, steps) for arrays in series]
+        series = [arrays.between(start, end) for arrays in series]
+        keys, matrix = align(series, frequency)
+        correlations = lagged_correlations(matrix, max_lag)
+        n = len(series_ids)
+        lags = list(range(-max_lag, max_lag + 1))
+
+        # Strongest correlation of each pair across all lags
+        with np.errstate(invalid='ignore'):
+            strength = np.where(np.isnan(correlations), -1.0, np.abs(correlations))
+        peak = strength.argmax(axis=0)
+        peak_corr = np.take_along_axis(correlations, peak[None], axis=0)[0]
+
+        return {
+            'series': series_ids,
+            'frequency': frequency,
+            'transforms': chain,
+            'start': str(period_dates(keys[:1], frequency)[0]) if len(keys) else None,
+            'end': str(period_dates(keys[-1:], frequency)[0]) if len(keys) else None,
+            'periods': len(keys),
+            'lags': lags,
+            # correlations[lag index][i][j]: series i at t against series j at t + lag
+            'correlations': [
+                [_nullable(correlations[k, i]) for i in range(n)] for k in range(len(lags))
+            ],
+            'peak_lag': np.where(np.isnan(peak_corr), 0, np.array(lags)[peak]).tolist(),
+            'peak_correlation': [_nullable(row) for row in peak_corr],
+        }
+
+    return cached_for_versions(series_ids, cache_key, compute)
@@ -0,0 +1,258 @@
+import ast
+import logging
+from datetime import datetime
+from graphlib import CycleError, TopologicalSorter
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from .alignment import align, period_dates, period_keys
+from .analytics import TRANSFORMS, parse_transforms
+from .columnar import EPOCH_ORDINAL, load_series_arrays
+from .ingest import delete_series_data, replace_series_rows, save_indicator
+from .models import DerivedDependency, DerivedSeries, Indicator
+
+logger = logging.getLogger(__name__)
+
+# Longest expression accepted, in characters
+MAX_EXPRESSION_LENGTH = 1000
+OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.Pow: np.power,
+}
+UNARY_OPERATORS = {
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+
+
+class ExpressionError(ValueError):
+    """Raised when a derived series expression is invalid or cannot be evaluated"""
+
+
+class Expression:
+    """
+    A parsed derived series expression: arithmetic (``+ - * / **``) over
+    series IDs and numbers, and the analytics transforms called as
+    functions, e.g. ``FEDFUNDS - pct_change(CPIAUCSL, 12)``.
+
+    Only this whitelist of syntax is accepted; nothing is ever passed to
+    ``eval``. ``lookback`` is how many periods before a date its value
+    can depend on, or None when it depends on the whole history.
+    """
+    def __init__(self, text):
+        if len(text) > MAX_EXPRESSION_LENGTH:
+            raise ExpressionError(f"Expressions are limited to {MAX_EXPRESSION_LENGTH} characters")
+        try:
+            self.tree = ast.parse(text.strip(), mode='eval').body
+        except SyntaxError as e:
+            raise ExpressionError(f"Invalid expression: {e.msg}")
+        self.dependencies = []
+        self.lookback = self._check(self.tree)
+        if not self.dependencies:
+            raise ExpressionError("An expression must read at least one series")
+
+    def _check(self, node):
+        """Validate ``node``, collect the series it reads and return its lookback"""
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            left, right = self._check(node.left), self._check(node.right)
+            return None if left is None or right is None else max(left, right)
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            return self._check(node.operand)
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return 0
+        if isinstance(node, ast.Name):
+            series_id = node.id.upper()
+            if series_id not in self.dependencies:
+                self.dependencies.append(series_id)
+            return 0
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in TRANSFORMS:
+            name = node.func.id
+            if node.keywords or not 1 <= len(node.args) <= 2:
+                raise ExpressionError(f"{name}() takes a series and an optional window")
+            window = None
+            if len(node.args) == 2:
+                argument = node.args[1]
+                if not isinstance(argument, ast.Constant) or type(argument.value) is not int:
+                    raise ExpressionError(f"The window of {name}() must be a whole number")
+                window = argument.value
+            try:
+                # Same rules as the analytics endpoint
+                _, window = parse_transforms(name if window is None else f"{name}:{window}")[0]
+            except ValueError as e:
+                raise ExpressionError(str(e))
+            node.window = window
+            inner = self._check(node.args[0])
+            if inner is None or (window is None and name in ('zscore', 'percentile')):
+                return None  # Full-sample statistics depend on every period
+            return inner + (window or 0)
+        raise ExpressionError(f"Unsupported syntax: {ast.unparse(node)}")
+
+    def evaluate(self, inputs, length):
+        """
+        Evaluate over aligned input rows (series ID -> float64 array of
+        ``length`` periods). Undefined results are NaN.
+        """
+        with np.errstate(all='ignore'):
+            values = np.broadcast_to(self._evaluate(self.tree, inputs, length), (length,)).astype(np.float64)
+        values[~np.isfinite(values)] = np.nan
+        return values
+
+    def _evaluate(self, node, inputs, length):
+        if isinstance(node, ast.BinOp):
+            return OPERATORS[type(node.op)](
+                self._evaluate(node.left, inputs, length), self._evaluate(node.right, inputs, length)
+            )
+        if isinstance(node, ast.UnaryOp):
+            return UNARY_OPERATORS[type(node.op)](self._evaluate(node.operand, inputs, length))
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        if isinstance(node, ast.Name):
+            return inputs[node.id.upper()]
+        func, takes_argument, _ = TRANSFORMS[node.func.id]
+        values = np.broadcast_to(self._evaluate(node.args[0], inputs, length), (length,)).astype(np.float64)
+        values = func(values, node.window) if takes_argument else func(values)
+        values[~np.isfinite(values)] = np.nan
+        return values
+
+
+def dependency_graph():
+    """Return ``{derived series ID: set of series IDs it reads}``"""
+    graph = {}
+    for derived_id, series_id in DerivedDependency.objects.values_list('derived__series_id', 'series_id'):
+        graph.setdefault(derived_id, set()).add(series_id)
+    return graph
+
+
+def check_cycles(series_id, dependencies):
+    """Raise ExpressionError when ``series_id`` reading ``dependencies`` would form a cycle"""
+    graph = dependency_graph()
+    graph[series_id] = set(dependencies)
+    try:
+        TopologicalSorter(graph).prepare()
+    except CycleError as e:
+        raise ExpressionError(f"Circular dependency: {' <- '.join(e.args[1])}")
+
+
+def save_dependencies(derived, dependencies):
+    """Replace the dependency edges of a derived series"""
+    with transaction.atomic():
+        derived.dependencies.all().delete()
+        DerivedDependency.objects.bulk_create([
+            DerivedDependency(derived=derived, series_id=series_id)
+            for series_id in dependencies
+        ])
+
+
+def delete_derived_data(series_id):
+    """Delete everything a derived series has stored, including its Indicator row"""
+    with transaction.atomic():
+        delete_series_data(series_id)
+        Indicator.objects.filter(series_id=series_id, source='Derived').delete()
+
+
+def recompute(derived):
+    """
+    Bring one dirty derived series up to date.
+
+    Only the periods from ``dirty_from`` onward are rewritten, reading just
+    enough earlier input to warm the expression's windows. New or edited
+    definitions, expressions with full-sample statistics and series never
+    computed are recomputed in full. Stored points in the rewritten range
+    that the expression no longer yields are deleted.
+
+    A series that fails to compute keeps the error and stays clean until
+    its definition or inputs change. Returns the number of values written.
+    """
+    # Claim the work; inputs changing from here on mark the series dirty again
+    claimed = DerivedSeries.objects.filter(
+        pk=derived.pk, dirty=True, dirty_from=derived.dirty_from
+    ).update(dirty=False, dirty_from=None)
+    if not claimed:
+        return 0
+
+    try:
+        expression = Expression(derived.expression)
+        frequency = derived.frequency
+        since = None
+        if derived.dirty_from is not None and derived.computed_at is not None and expression.lookback is not None:
+            since = period_keys(np.array([derived.dirty_from.toordinal() - EPOCH_ORDINAL]), frequency)[0]
+        read_from = None if since is None else period_dates(np.array([since - expression.lookback]), frequency)[0].item()
+
+        inputs = []
+        for series_id in expression.dependencies:
+            arrays = load_series_arrays(series_id)
+            if arrays is None:
+                raise ExpressionError(f"Series {series_id} is not stored")
+            inputs.append(arrays.between(read_from))
+        keys, matrix = align(inputs, frequency, derived.aggregation)
+        values = expression.evaluate(dict(zip(expression.dependencies, matrix)), len(keys))
+    except Exception as e:
+        logger.error(f"Error computing derived series {derived.series_id}: {str(e)}")
+        # The dirty range was never rewritten, so the next run covers everything
+        DerivedSeries.objects.filter(pk=derived.pk).update(computed_at=None, error=str(e))
+        return 0
+
+    keep = ~np.isnan(values)
+    if since is not None:
+        keep &= keys >= since
+    rows = list(zip(period_dates(keys[keep], frequency).tolist(), values[keep].tolist()))
+    since_date = None if since is None else period_dates(np.array([since]), frequency)[0].item()
+    arrays = replace_series_rows(derived.series_id, rows, since_date)
+    if not len(arrays):
+        Indicator.objects.filter(series_id=derived.series_id, source='Derived').delete()
+    else:
+        latest_date = arrays.dates[-1].item()
+        save_indicator(derived.name, derived.country, {
+            'value': float(arrays.values[-1]),
+            'unit': derived.unit,
+            'category': 'Derived',
+            'frequency': derived.get_frequency_display(),
+            'description': derived.expression,
+            'last_update': timezone.make_aware(datetime.combine(latest_date, datetime.min.time())),
+            'source': 'Derived',
+            'series_id': derived.series_id,
+        })
+    DerivedSeries.objects.filter(pk=derived.pk).update(computed_at=timezone.now(), error='')
+    logger.debug(f"Recomputed {len(rows)} values of {derived.series_id}")
+    return len(rows)
+
+
+def queue_derived_recompute():
+    """
+    Recompute dirty derived series in a Celery task once the current
+    transaction commits, so the task sees what made them dirty. Runs the
+    recomputation here when the task cannot be queued.
+    """
+    from .tasks import recompute_derived_series
+
+    def dispatch():
+        try:
+            recompute_derived_series.delay()
+        except Exception as e:
+            logger.warning(f"Could not queue derived series recomputation, running it inline: {str(e)}")
+            try:
+                refresh_derived()
+            except Exception as e:
+                logger.error(f"Error recomputing derived series: {str(e)}")
+
+    transaction.on_commit(dispatch)
+
+
+def refresh_derived():
+    """
+    Recompute every dirty derived series, inputs before the series that
+    read them, so one pass settles the whole graph. Returns the IDs of the
+    series recomputed.
+    """
+    graph = dependency_graph()
+    recomputed = []
+    for series_id in TopologicalSorter(graph).static_order():
+        # Re-read each time: recomputing an input marks its readers dirty
+        derived = DerivedSeries.objects.filter(series_id=series_id, dirty=True).first()
+        if derived is not None:
+            recompute(derived)
+            recomputed.append(series_id)
+    return recomputed
@@ -0,0 +1,137 @@
+import numpy as np
+from .columnar import SeriesArrays, cached_for_versions
+
+METHODS = ('lttb', 'minmax')
+# Whole-array LTTB passes before the buckets still changing are settled
+# one at a time (noisy series can keep rippling for many passes)
+LTTB_PASSES = 16
+
+
+def lttb(x, y, points):
+    """
+    Largest-Triangle-Three-Buckets: return the indices of ``points`` samples
+    of (x, y) that keep the line's visual shape. The first and last points
+    are always kept; each bucket in between keeps the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average.
+
+    Every bucket is solved at once against the current guess of the point
+    kept before it, starting from the previous bucket's average, and the
+    buckets whose anchor moved are solved again until none changes. That
+    fixed point is exactly the sequential LTTB selection.
+    """
+    size = len(x)
+    if points >= size:
+        return np.arange(size)
+    if points < 3:
+        return np.array([0, size - 1])[:points]
+
+    edges = np.linspace(1, size - 1, points - 1).astype(np.int64)
+    lo, hi = edges[:-1], edges[1:]
+    # Bucket i is x[lo[i]:hi[i]], laid out as row i of a padded index matrix
+    index = np.minimum(lo[:, None] + np.arange((hi - lo).max()), size - 1)
+    padding = index >= hi[:, None]
+    # Average of the bucket after each bucket (just the last point for the last)
+    counts = np.diff(np.append(hi, size))
+    next_x = np.add.reduceat(x, hi) / counts
+    next_y = np.add.reduceat(y, hi) / counts
+
+    def largest_area(buckets, a_x, a_y):
+        a_x, a_y = a_x[:, None], a_y[:, None]
+        rows = index[buckets]
+        area = np.abs(
+            (a_x - next_x[buckets, None]) * (y[rows] - a_y)
+            - (a_x - x[rows]) * (next_y[buckets, None] - a_y)
+        )
+        area[padding[buckets]] = -1
+        return lo[buckets] + area.argmax(axis=1)
+
+    buckets = np.arange(points - 2)
+    selected = np.concatenate((
+        [0],
+        largest_area(buckets, np.append(x[0], next_x[:-1]), np.append(y[0], next_y[:-1])),
+        [size - 1],
+    ))
+    for _ in range(LTTB_PASSES):
+        if not len(buckets):
+            return selected
+        anchors = selected[buckets]
+        chosen = largest_area(buckets, x[anchors], y[anchors])
+        moved = chosen != selected[buckets + 1]
+        selected[buckets + 1] = chosen
+        buckets = buckets[moved] + 1
+        buckets = buckets[buckets < points - 2]
+
+    # Buckets before the first one still changing are final; walk the rest
+    if len(buckets):
+        a = selected[buckets[0]]
+        for i in range(buckets[0], points - 2):
+            lo_i, hi_i = lo[i], hi[i]
+            area = np.abs((x[a] - next_x[i]) * (y[lo_i:hi_i] - y[a]) - (x[a] - x[lo_i:hi_i]) * (next_y[i] - y[a]))
+            a = lo_i + int(area.argmax())
+            selected[i + 1] = a
+    return selected
+
+
+def minmax(y, points):
+    """
+    Return the indices of the minimum and maximum of ``points // 2`` equal
+    buckets of ``y``, in order, so spikes survive downsampling.
+    """
+    size = len(y)
+    if points >= size:
+        return np.arange(size)
+
+    buckets = max(1, points // 2)
+    starts = np.linspace(0, size, buckets + 1).astype(np.int64)[:-1]
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(np.append(starts, size)))
+
+    def first_where(extremes):
+        # First index in each bucket holding that bucket's extreme
+        hits = np.flatnonzero(y == extremes[bucket_ids])
+        _, first = np.unique(bucket_ids[hits], return_index=True)
+        return hits[first]
+
+    return np.union1d(
+        first_where(np.minimum.reduceat(y, starts)),
+        first_where(np.maximum.reduceat(y, starts)),
+    )
+
+
+def downsample(arrays, points, method='lttb'):
+    """Return SeriesArrays reduced to at most ``points`` observations"""
+    if method == 'minmax':
+        selected = minmax(arrays.values, points)
+    else:
+        selected = lttb(arrays.days.astype(np.float64), arrays.values, points)
+    return SeriesArrays(arrays.series_id, arrays.days[selected], arrays.values[selected], arrays.version)
+
+
+def downsample_series(series_id, start=None, end=None, points=500, method='lttb'):
+    """
+    Return the stored observations of a series between ``start`` and
+    ``end`` reduced to at most ``points``, as parallel ``dates`` and
+    ``values`` lists. Returns None when the series is not stored.
+
+    Results are cached per blob version, so a refresh never serves a stale
+    downsample.
+    """
+    def cache_key(versions):
+        return f"downsample:{series_id}:{versions[0]}:{start}:{end}:{points}:{method}"
+
+    def compute(series):
+        arrays = series[0]
+        window = arrays.between(start, end)
+        sampled = downsample(window, points, method)
+        return {
+            'series_id': series_id,
+            'version': arrays.version,
+            'method': method,
+            'total': len(window),
+            'points': len(sampled),
+            'dates': np.datetime_as_string(sampled.dates).tolist(),
+            'values': sampled.values.tolist(),
+        }
+
+    result, _ = cached_for_versions([series_id], cache_key, compute)
+    return result
@@ -1,19 +1,147 @@
 import aiohttp
+import codecs
+import json
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from django.conf import settings
 import asyncio
 import re
+import weakref
+from .cache import acache_get, acache_set
+from .circuit import CircuitOpenError, backoff_delay, get_breaker
+from .ratelimit import INTERACTIVE, get_limiter
+from .singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# One pooled session per event loop, shared by every FREDAPI instance
+_sessions = weakref.WeakKeyDictionary()
+# In-flight requests per event loop, so identical concurrent calls share one
+_flights = weakref.WeakKeyDictionary()
+# Long-lived event loop for synchronous callers such as Celery workers
+_sync_loop = None
+
+# Bytes read from an observations response at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+OBSERVATIONS_ARRAY = re.compile(r'"observations"\s*:\s*\[')
+# Largest page FRED's list endpoints return
+PAGE_SIZE = 1000
+
+
+async def iter_observation_batches(stream):
+    """
+    Yield lists of observation objects from a FRED observations payload as
+    the response streams in. Each chunk is decoded once, its complete
+    objects are parsed in a single json.loads call, and only the unparsed
+    tail is kept in memory.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    in_array = False
+    async for chunk in stream.iter_chunked(STREAM_CHUNK_SIZE):
+        buffer += decoder.decode(chunk)
+        if not in_array:
+            match = OBSERVATIONS_ARRAY.search(buffer)
+            if not match:
+                # Keep enough to match a key split across two chunks
+                buffer = buffer[-64:]
+                continue
+            buffer = buffer[match.end():]
+            in_array = True
+
+        # Observation objects are flat, so the first ']' closes the array
+        # and the last '}' before it ends a complete object
+        array_end = buffer.find(']')
+        if array_end != -1:
+            buffer = buffer[:array_end]
+        end = buffer.rfind('}')
+        if end != -1:
+            yield json.loads('[' + buffer[:end + 1].lstrip(' \t\r\n,') + ']')
+            buffer = buffer[end + 1:]
+        if array_end != -1:
+            return
+
+    if in_array:
+        raise ValueError("Truncated FRED observations payload")
+
+
+def get_session():
+    """
+    Return the pooled session of the running event loop, creating it on
+    first use. Connections are kept alive and DNS lookups cached between
+    requests.
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit_per_host=settings.FRED_CONNECTION_LIMIT,
+            ttl_dns_cache=settings.FRED_DNS_CACHE_TTL,
+            keepalive_timeout=settings.FRED_KEEPALIVE_TIMEOUT,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=settings.FRED_REQUEST_TIMEOUT),
+        )
+        _sessions[loop] = session
+    return session
+
+
+def get_flight():
+    """Return the single-flight group of the running event loop"""
+    loop = asyncio.get_running_loop()
+    flight = _flights.get(loop)
+    if flight is None:
+        flight = _flights[loop] = SingleFlight()
+    return flight
+
+
+async def close_session():
+    """Close the pooled session of the running event loop"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session and not session.closed:
+        await session.close()
+
+
+def run_sync(coro):
+    """
+    Run a coroutine from synchronous code on this process' long-lived event
+    loop, so the pooled session survives between calls (e.g. Celery tasks).
+    """
+    global _sync_loop
+    if _sync_loop is None or _sync_loop.is_closed():
+        _sync_loop = asyncio.new_event_loop()
+    return _sync_loop.run_until_complete(coro)
+
+
+def close_pool():
+    """Close the session and event loop used by run_sync"""
+    global _sync_loop
+    if _sync_loop is not None and not _sync_loop.is_closed():
+        _sync_loop.run_until_complete(close_session())
+        _sync_loop.close()
+    _sync_loop = None
+
+
+class FREDAPIError(Exception):
+    """Error response from FRED; ``status`` is the HTTP status code"""
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def retryable(self):
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
 class FREDAPI:
-    def __init__(self):
+    def __init__(self, priority=INTERACTIVE):
+        self.priority = priority
         self.api_key = settings.FRED_API_KEY.strip()  
         if not self._validate_api_key(self.api_key):
             logger.error("Invalid FRED API key format")
             raise ValueError("Invalid FRED API key format. Key must be a 32 character alphanumeric lowercase string.")
-        self.base_url = "https://api.stlouisfed.org/fred"
+        self.base_url = settings.FRED_API_BASE_URL.rstrip('/')
         self.session = None
         
     def _validate_api_key(self, key):
@@ -26,15 +154,55 @@ class FREDAPI:
     async def ensure_session(self):
         """Ensure we have an active session"""
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            self.session = get_session()
         return self.session
         
     async def close(self):
-        """Close the session if it exists"""
-        if self.session and not self.session.closed:
-            await self.session.close()
-            self.session = None
+        """
+        Release this client's reference to the pooled session. The session
+        itself stays open for other clients until close_session is called.
+        """
+        self.session = None
             
+    async def throttle(self):
+        """Wait for the shared FRED rate limiter before making a request"""
+        max_wait = settings.FRED_RATE_LIMIT_MAX_WAIT if self.priority == INTERACTIVE else None
+        await get_limiter().aacquire(self.priority, max_wait=max_wait)
+
+    async def call(self, send):
+        """
+        Run one FRED request through the shared circuit breaker. ``send`` is
+        a coroutine function making the request; network errors, 429 and
+        5xx responses are retried with jittered exponential backoff, and the
+        breaker counts one failure per call once the retries are exhausted.
+        """
+        breaker = get_breaker()
+        # A half-open circuit's trial covers the whole call, retries included
+        trial = await breaker.check()
+        attempts = settings.FRED_RETRY_ATTEMPTS
+        for attempt in range(attempts + 1):
+            if attempt:
+                # Other calls may have opened the circuit during the backoff
+                retry_after = await breaker.retry_after()
+                if retry_after:
+                    raise CircuitOpenError(retry_after)
+            try:
+                result = await send()
+            except (aiohttp.ClientError, asyncio.TimeoutError, FREDAPIError) as e:
+                if isinstance(e, FREDAPIError) and not e.retryable:
+                    # FRED answered, so it is up
+                    await breaker.record_success(trial)
+                    raise
+                if attempt == attempts:
+                    await breaker.record_failure(trial)
+                    raise
+                delay = backoff_delay(attempt, settings.FRED_RETRY_BASE_DELAY, settings.FRED_RETRY_MAX_DELAY)
+                logger.warning(f"FRED request failed ({str(e) or type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            else:
+                await breaker.record_success(trial)
+                return result
+
     async def __aenter__(self):
         await self.ensure_session()
         return self
@@ -43,98 +211,163 @@ class FREDAPI:
         await self.close()
             
     async def get_series(self, series_id, observation_start=None, observation_end=None):
-        """Fetch economic series data from FRED API"""
+        """
+        Fetch economic series data from FRED API. Concurrent calls for the
+        same series and range share one upstream request and one result.
+        """
         if not observation_start:
             
             observation_start = (datetime.now() - timedelta(days=7500)).strftime('%Y-%m-%d')
         if not observation_end:
             observation_end = datetime.now().strftime('%Y-%m-%d')
-            
-        params = {
-            'api_key': self.api_key,
-            'file_type': 'json',
-            'series_id': series_id,
-            'observation_start': observation_start,
-            'observation_end': observation_end,
-            'sort_order': 'desc'  # Get newest data first
-        }
         
+        return await get_flight().do(
+            ('get_series', series_id, observation_start, observation_end),
+            self._fetch_series, series_id, observation_start, observation_end
+        )
+
+    async def get_many(self, series_ids, observation_start=None, observation_end=None):
+        """
+        Fetch several series concurrently and yield ``(series_id, data,
+        error)`` tuples in completion order. A failing series yields its
+        exception as ``error`` instead of failing the whole batch.
+        """
+        async def fetch(series_id):
+            try:
+                data = await self.get_series(series_id, observation_start, observation_end)
+                return series_id, data, None
+            except Exception as e:
+                return series_id, None, e
+
+        tasks = [asyncio.ensure_future(fetch(series_id)) for series_id in dict.fromkeys(series_ids)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stop outstanding fetches if the consumer stops iterating early
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch_series(self, series_id, observation_start, observation_end):
         logger.info(f"Fetching FRED series {series_id} from {observation_start} to {observation_end}")
         
         try:
             await self.ensure_session()
-            series_info = await self.get_series_info(series_id)
+            # Metadata usually comes from the cache; on a miss it is fetched
+            # alongside the observations rather than before them
+            series_info, observations = await asyncio.gather(
+                self.get_series_info(series_id),
+                self.get_observations(
+                    series_id,
+                    observation_start=observation_start,
+                    observation_end=observation_end,
+                    sort_order='desc'  # Get newest data first
+                )
+            )
             if not series_info:
                 raise Exception(f"Series {series_id} not found")
-
-            url = f"{self.base_url}/series/observations"
-            logger.debug(f"Making request to {url}")
             
-            async with self.session.get(url, params=params) as response:
-                response_text = await response.text()
-                logger.debug(f"Raw FRED API response: {response_text}")
-                
-                if response.status != 200:
-                    logger.error(f"FRED API error: {response_text}")
-                    raise Exception(f"FRED API error: {response_text}")
-                    
-                data = await response.json()
-                observations = data.get('observations', [])
-                
-                if not observations:
-                    return {
-                        'series_id': series_id,
-                        'title': series_info.get('title', ''),
-                        'observations': [],
-                        'units': series_info.get('units', ''),
-                        'frequency': series_info.get('frequency', ''),
-                        'error': 'No data available for this series'
-                    }
-                
-                transformed_observations = []
-                for obs in observations:
-                    value = obs.get('value')
-                    if value and value != '.':  # Skip missing or invalid values
-                        try:
-                            float_value = float(value)
-                            transformed_observations.append({
-                                'date': obs.get('date'),
-                                'value': str(float_value)  # Convert back to string to maintain precision
-                            })
-                        except ValueError:
-                            logger.warning(f"Skipping invalid numeric value: {value}")
-                
-                logger.info(f"Transformed {len(transformed_observations)} valid observations")
-                if transformed_observations:
-                    logger.debug(f"Sample observation: {transformed_observations[0]}")
-                else:
-                    logger.warning(f"No valid numeric data found for series {series_id}")
-                    return {
-                        'series_id': series_id,
-                        'title': series_info.get('title', ''),
-                        'observations': [],
-                        'units': series_info.get('units', ''),
-                        'frequency': series_info.get('frequency', ''),
-                        'error': 'No valid numeric data found for this series'
-                    }
-                
+            if observations is None:
+                return {
+                    'series_id': series_id,
+                    'title': series_info.get('title', ''),
+                    'observations': [],
+                    'units': series_info.get('units', ''),
+                    'frequency': series_info.get('frequency', ''),
+                    'error': 'No data available for this series'
+                }
+
+            if observations:
+                logger.debug(f"Sample observation: {observations[0]}")
+            else:
+                logger.warning(f"No valid numeric data found for series {series_id}")
                 return {
                     'series_id': series_id,
                     'title': series_info.get('title', ''),
-                    'observations': transformed_observations,
+                    'observations': [],
                     'units': series_info.get('units', ''),
-                    'frequency': series_info.get('frequency', '')
+                    'frequency': series_info.get('frequency', ''),
+                    'error': 'No valid numeric data found for this series'
                 }
+
+            return {
+                'series_id': series_id,
+                'title': series_info.get('title', ''),
+                'observations': observations,
+                'units': series_info.get('units', ''),
+                'frequency': series_info.get('frequency', '')
+            }
                     
         except Exception as e:
             logger.error(f"Error in get_series: {str(e)}")
             raise
-        finally:
-            if not self.session.closed:
-                await self.close()
+
+    async def get_observations(self, series_id, observation_start=None, observation_end=None, sort_order='asc'):
+        """
+        Fetch the valid numeric observations of a series as a list of
+        ``{'date', 'value'}`` dicts. Returns None when FRED has no
+        observations at all in the requested range.
+        """
+        params = {
+            'api_key': self.api_key,
+            'file_type': 'json',
+            'series_id': series_id,
+            'sort_order': sort_order
+        }
+        if observation_start:
+            params['observation_start'] = str(observation_start)
+        if observation_end:
+            params['observation_end'] = str(observation_end)
+
+        await self.ensure_session()
+        url = f"{self.base_url}/series/observations"
+        logger.debug(f"Making request to {url}")
+
+        async def send():
+            await self.throttle()
+            async with self.session.get(url, params=params) as response:
+                if response.status != 200:
+                    response_text = await response.text()
+                    logger.error(f"FRED API error: {response_text}")
+                    raise FREDAPIError(f"FRED API error: {response_text}", response.status)
+
+                # Parse straight from the stream instead of buffering the body
+                received = 0
+                transformed_observations = []
+                async for batch in iter_observation_batches(response.content):
+                    received += len(batch)
+                    for obs in batch:
+                        value = obs.get('value')
+                        if value and value != '.':  # Skip missing or invalid values
+                            try:
+                                float_value = float(value)
+                                transformed_observations.append({
+                                    'date': obs.get('date'),
+                                    'value': str(float_value)  # Convert back to string to maintain precision
+                                })
+                            except ValueError:
+                                logger.warning(f"Skipping invalid numeric value: {value}")
+
+                if not received:
+                    return None
+
+                logger.info(f"Transformed {len(transformed_observations)} valid observations")
+                return transformed_observations
+
+        return await self.call(send)
                 
-    async def get_series_info(self, series_id):
-        """Get series information from FRED API"""
+    async def get_series_info(self, series_id, use_cache=True):
+        """
+        Get series information from FRED API. Results are kept in the shared
+        FRED cache for FRED_METADATA_CACHE_TTL seconds; pass use_cache=False
+        to bypass it and refresh the cached copy.
+        """
+        cache_key = f"series_info:{series_id}"
+        if use_cache:
+            series_info = await acache_get(cache_key)
+            if series_info is not None:
+                return series_info
+
         params = {
             'api_key': self.api_key,
             'file_type': 'json',
@@ -144,53 +377,123 @@ class FREDAPI:
         try:
             await self.ensure_session()
             url = f"{self.base_url}/series"
-            async with self.session.get(url, params=params) as response:
-                response_text = await response.text()
-                
-                if response.status != 200:
-                    logger.error(f"FRED API series info error: {response_text}")
-                    raise Exception(f"FRED API series info error: {response_text}")
+
+            async def send():
+                await self.throttle()
+                async with self.session.get(url, params=params) as response:
+                    response_text = await response.text()
                     
-                data = await response.json()
-                series = data.get('seriess', [{}])[0]
-                return {
-                    'title': series.get('title', ''),
-                    'units': series.get('units', ''),
-                    'frequency': series.get('frequency', '')
-                }
+                    if response.status != 200:
+                        logger.error(f"FRED API series info error: {response_text}")
+                        raise FREDAPIError(f"FRED API series info error: {response_text}", response.status)
+
+                    return await response.json()
+
+            data = await self.call(send)
+            series = data.get('seriess', [{}])[0]
+            series_info = {
+                'title': series.get('title', ''),
+                'units': series.get('units', ''),
+                'frequency': series.get('frequency', ''),
+                'notes': series.get('notes', ''),
+                'last_updated': series.get('last_updated', '')
+            }
+            await acache_set(cache_key, series_info, settings.FRED_METADATA_CACHE_TTL)
+            return series_info
                     
         except Exception as e:
             logger.error(f"Error in get_series_info: {str(e)}")
             raise
                 
-    async def search_series(self, search_term):
-        """Search for economic series in FRED API"""
+    async def search_series(self, search_term, limit=10):
+        """
+        Search for economic series in FRED API. Concurrent identical searches
+        share one upstream request and one result.
+        """
+        return await get_flight().do(('search_series', search_term, limit), self._search_series, search_term, limit)
+
+    async def _search_series(self, search_term, limit):
         params = {
             'api_key': self.api_key,
             'file_type': 'json',
             'search_text': search_term,
-            'limit': 10
+            'limit': limit
         }
         
         try:
             await self.ensure_session()
             url = f"{self.base_url}/series/search"
-            async with self.session.get(url, params=params) as response:
-                response_text = await response.text()
-                
-                if response.status != 200:
-                    logger.error(f"FRED API search error: {response_text}")
-                    raise Exception(f"FRED API search error: {response_text}")
+
+            async def send():
+                await self.throttle()
+                async with self.session.get(url, params=params) as response:
+                    response_text = await response.text()
                     
-                data = await response.json()
-                return {
-                    'count': data.get('count', 0),
-                    'series': data.get('seriess', [])
-                }
+                    if response.status != 200:
+                        logger.error(f"FRED API search error: {response_text}")
+                        raise FREDAPIError(f"FRED API search error: {response_text}", response.status)
+
+                    return await response.json()
+
+            data = await self.call(send)
+            return {
+                'count': data.get('count', 0),
+                'series': data.get('seriess', [])
+            }
                     
         except Exception as e:
             logger.error(f"Error in search_series: {str(e)}")
             raise
-        finally:
-            if not self.session.closed:
-                await self.close() 
\ No newline at end of file
+
+    async def get_json(self, endpoint, **params):
+        """Fetch one FRED endpoint (e.g. ``series/release``) and return its JSON"""
+        params = dict(params, api_key=self.api_key, file_type='json')
+        await self.ensure_session()
+        url = f"{self.base_url}/{endpoint}"
+
+        async def send():
+            await self.throttle()
+            async with self.session.get(url, params=params) as response:
+                if response.status != 200:
+                    response_text = await response.text()
+                    logger.error(f"FRED API {endpoint} error: {response_text}")
+                    raise FREDAPIError(f"FRED API {endpoint} error: {response_text}", response.status)
+                return await response.json()
+
+        return await self.call(send)
+
+    async def iter_pages(self, endpoint, key, **params):
+        """
+        Yield successive pages of a paginated FRED list endpoint (e.g.
+        ``release/series``), each as the list found under ``key`` in the
+        response.
+        """
+        offset = 0
+        while True:
+            data = await self.get_json(endpoint, limit=PAGE_SIZE, offset=offset, **params)
+            page = data.get(key, [])
+            if page:
+                yield page
+            if len(page) < PAGE_SIZE:
+                return
+            offset += PAGE_SIZE
+
+    async def get_release_id(self, series_id):
+        """Return the ID of the FRED release a series is published in, or None"""
+        data = await self.get_json('series/release', series_id=series_id)
+        releases = data.get('releases', [])
+        return releases[0]['id'] if releases else None
+
+    async def get_release_dates(self, release_id, start):
+        """
+        Return the publication dates of a release from ``start`` (a date)
+        on, including scheduled dates that have no data yet.
+        """
+        data = await self.get_json(
+            'release/dates',
+            release_id=release_id,
+            realtime_start=start.isoformat(),
+            include_release_dates_with_no_data='true',
+            sort_order='asc'
+        )
+        return [date.fromisoformat(entry['date']) for entry in data.get('release_dates', [])]
\ No newline at end of file
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import random
+import re
+from datetime import date, timedelta
+from pathlib import Path
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Synthetic series end on a fixed date so repeated runs see identical data
+SYNTHETIC_END_DATE = date(2024, 1, 1)
+SYNTHETIC_LAST_UPDATED = '2024-01-02 07:45:00-06'
+# Words synthetic catalog titles are built from
+CATALOG_SUBJECTS = ['Unemployment Rate', 'Consumer Price Index', 'Gross Domestic Product',
+                    'Industrial Production', 'Housing Starts', 'Retail Sales', 'Interest Rate']
+CATALOG_REGIONS = ['United States', 'California', 'Texas', 'New York', 'Euro Area', 'Japan']
+CATALOG_RELEASES = 10
+
+
+def _fixture_name(key):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', key) or '_'
+
+
+class FREDStub:
+    """
+    Local FRED-compatible server for measuring ingestion without a live key
+    or network. Serves ``/series``, ``/series/observations`` and
+    ``/series/search``, plus the endpoints the catalog and release calendar
+    syncs use (``/releases``, ``/release/series``, ``/release/dates``,
+    ``/series/release`` and ``/series/updates``).
+
+    Payloads are replayed from ``fixtures_dir`` when a recording exists. In
+    record mode, missing payloads are fetched from ``upstream`` and saved
+    there first. Otherwise, deterministic synthetic payloads of
+    ``observations`` daily points and a catalog of ``catalog_size`` series
+    are served. Every request can be delayed
+    by ``latency`` +/- ``jitter`` seconds and fails with a 500 at
+    ``error_rate``.
+    """
+    def __init__(self, fixtures_dir=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 observations=1000, upstream=None, api_key=None, seed=None, catalog_size=1000):
+        self.fixtures_dir = Path(fixtures_dir) if fixtures_dir else None
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.observations = observations
+        self.catalog_size = catalog_size
+        self.upstream = upstream.rstrip('/') if upstream else None
+        self.api_key = api_key
+        self.random = random.Random(seed)
+        self.synthetic = {}
+        self.upstream_session = None
+
+    def make_app(self):
+        app = web.Application(middlewares=[self.simulate_conditions])
+        app.router.add_get('/fred/series', self.series)
+        app.router.add_get('/fred/series/observations', self.series_observations)
+        app.router.add_get('/fred/series/search', self.series_search)
+        app.router.add_get('/fred/series/updates', self.series_updates)
+        app.router.add_get('/fred/releases', self.releases)
+        app.router.add_get('/fred/release/series', self.release_series)
+        app.router.add_get('/fred/release/dates', self.release_dates)
+        app.router.add_get('/fred/series/release', self.series_release)
+        app.on_cleanup.append(self.close)
+        return app
+
+    async def close(self, app=None):
+        if self.upstream_session is not None:
+            await self.upstream_session.close()
+
+    @web.middleware
+    async def simulate_conditions(self, request, handler):
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return web.json_response(
+                {'error_code': 500, 'error_message': 'Simulated FRED error'},
+                status=500
+            )
+        return await handler(request)
+
+    async def load(self, endpoint, key, params):
+        """
+        Return the recorded payload for an endpoint and key, recording it
+        from upstream first when in record mode. Returns None when neither
+        is available.
+        """
+        path = None
+        if self.fixtures_dir is not None:
+            path = self.fixtures_dir / endpoint.replace('/', '_') / f"{_fixture_name(key)}.json"
+            if path.exists():
+                return json.loads(path.read_text())
+
+        if self.upstream is None:
+            return None
+
+        if self.upstream_session is None:
+            self.upstream_session = aiohttp.ClientSession()
+        params = dict(params, api_key=self.api_key, file_type='json')
+        async with self.upstream_session.get(f"{self.upstream}/{endpoint}", params=params) as response:
+            if response.status != 200:
+                raise web.HTTPBadGateway(text=await response.text())
+            payload = await response.json()
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(payload))
+            logger.info(f"Recorded {endpoint} payload for {key}")
+        return payload
+
+    def synthetic_observations(self, series_id):
+        if series_id not in self.synthetic:
+            rng = random.Random(series_id)
+            value = rng.uniform(1, 100)
+            start = SYNTHETIC_END_DATE - timedelta(days=self.observations - 1)
+            observations = []
+            for day in range(self.observations):
+                value = max(0.0, value + rng.gauss(0, 0.5))
+                observations.append({
+                    'realtime_start': SYNTHETIC_END_DATE.isoformat(),
+                    'realtime_end': SYNTHETIC_END_DATE.isoformat(),
+                    'date': (start + timedelta(days=day)).isoformat(),
+                    'value': f"{value:.2f}"
+                })
+            self.synthetic[series_id] = {'observations': observations}
+        return self.synthetic[series_id]
+
+    def synthetic_catalog(self, release_id=None):
+        catalog = []
+        for n in range(self.catalog_size):
+            if release_id is not None and n % CATALOG_RELEASES + 1 != release_id:
+                continue
+            subject = CATALOG_SUBJECTS[n % len(CATALOG_SUBJECTS)]
+            region = CATALOG_REGIONS[n // len(CATALOG_SUBJECTS) % len(CATALOG_REGIONS)]
+            catalog.append({
+                'id': f"SYN{n:06d}",
+                'title': f"{subject} for {region} ({n})",
+                'frequency': 'Daily',
+                'units': 'Index',
+                'last_updated': SYNTHETIC_LAST_UPDATED,
+                'popularity': n % 101
+            })
+        return catalog
+
+    def page(self, request, key, items):
+        limit = int(request.query.get('limit', 1000))
+        offset = int(request.query.get('offset', 0))
+        return web.json_response({
+            'count': len(items),
+            'offset': offset,
+            'limit': limit,
+            key: items[offset:offset + limit]
+        })
+
+    async def releases(self, request):
+        payload = await self.load('releases', 'releases', {'limit': 1000})
+        if payload is not None:
+            return self.page(request, 'releases', payload.get('releases', []))
+        return self.page(request, 'releases', [
+            {'id': release_id, 'name': f"Synthetic release {release_id}"}
+            for release_id in range(1, CATALOG_RELEASES + 1)
+        ])
+
+    async def release_series(self, request):
+        release_id = request.query.get('release_id', '')
+        payload = await self.load('release/series', release_id, {'release_id': release_id, 'limit': 1000})
+        if payload is not None:
+            # Recordings hold the first page only
+            return self.page(request, 'seriess', payload.get('seriess', []))
+        return self.page(request, 'seriess', self.synthetic_catalog(int(release_id or 0)))
+
+    async def series_release(self, request):
+        series_id = request.query.get('series_id', '')
+        payload = await self.load('series/release', series_id, {'series_id': series_id})
+        if payload is None:
+            release_id = sum(map(ord, series_id)) % CATALOG_RELEASES + 1
+            payload = {'releases': [{'id': release_id, 'name': f"Synthetic release {release_id}"}]}
+        return web.json_response(payload)
+
+    async def release_dates(self, request):
+        release_id = request.query.get('release_id', '')
+        start = request.query.get('realtime_start', SYNTHETIC_END_DATE.isoformat())
+        payload = await self.load('release/dates', f"{release_id}_{start}", {
+            'release_id': release_id,
+            'realtime_start': start,
+            'include_release_dates_with_no_data': 'true',
+            'sort_order': 'asc'
+        })
+        if payload is None:
+            # Synthetic releases publish monthly, each on its own day
+            first = date.fromisoformat(start).replace(day=1)
+            release_dates = []
+            for month in range(12):
+                year, index = divmod(first.month - 1 + month, 12)
+                release_date = date(first.year + year, index + 1, int(release_id or 1) + 5)
+                if release_date.isoformat() >= start:
+                    release_dates.append({'release_id': int(release_id or 1), 'date': release_date.isoformat()})
+            payload = {'release_dates': release_dates}
+        return web.json_response(payload)
+
+    async def series_updates(self, request):
+        return self.page(request, 'seriess', self.synthetic_catalog())
+
+    async def series(self, request):
+        series_id = request.query.get('series_id', '')
+        payload = await self.load('series', series_id, {'series_id': series_id})
+        if payload is None:
+            payload = {'seriess': [{
+                'id': series_id,
+                'title': f"Synthetic series {series_id}",
+                'frequency': 'Daily',
+                'frequency_short': 'D',
+                'units': 'Index',
+                'last_updated': SYNTHETIC_LAST_UPDATED,
+                'popularity': 1,
+                'notes': 'Served by the local FRED stub'
+            }]}
+        return web.json_response(payload)
+
+    async def series_observations(self, request):
+        series_id = request.query.get('series_id', '')
+        payload = await self.load('series/observations', series_id, {'series_id': series_id})
+        if payload is None:
+            payload = self.synthetic_observations(series_id)
+
+        # Recordings hold the full history; apply the request's window here
+        start = request.query.get('observation_start', '0000-00-00')
+        end = request.query.get('observation_end', '9999-99-99')
+        observations = [
+            obs for obs in payload.get('observations', [])
+            if start <= obs['date'] <= end
+        ]
+        if request.query.get('sort_order') == 'desc':
+            observations.reverse()
+        return web.json_response({
+            'observation_start': start,
+            'observation_end': end,
+            'count': len(observations),
+            'observations': observations
+        })
+
+    async def series_search(self, request):
+        search_text = request.query.get('search_text', '')
+        limit = int(request.query.get('limit', 1000))
+        payload = await self.load('series/search', search_text, {'search_text': search_text, 'limit': limit})
+        if payload is None:
+            seriess = [{
+                'id': f"{_fixture_name(search_text).upper()}{i}",
+                'title': f"Synthetic {search_text} series {i}",
+                'frequency': 'Daily',
+                'units': 'Index',
+                'popularity': limit - i
+            } for i in range(limit)]
+            payload = {'count': len(seriess), 'seriess': seriess}
+        return web.json_response(payload)
@@ -0,0 +1,297 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from django.db import connection, transaction
+from django.db.models import Case, F, Max, Value, When
+from django.utils import timezone
+from .columnar import load_series_arrays, replace_series_blob, write_series_blob
+from .models import DerivedSeries, Indicator, Observation
+from .rollups import delete_rollups, update_rollups
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT ... ON CONFLICT statement when upserting observations
+OBSERVATION_BATCH_SIZE = 1000
+# Rows per statement when writing indicators in bulk
+INDICATOR_BATCH_SIZE = 1000
+
+
+def last_observation_date(series_id):
+    """
+    Return the date of the newest stored observation for a series, or None.
+    """
+    return Observation.objects.filter(series_id=series_id).aggregate(
+        last_date=Max('date')
+    )['last_date']
+
+
+def next_observation_start(series_id):
+    """
+    Return the first date that still needs to be fetched for a series, or
+    None when nothing is stored yet and the full history is required.
+    """
+    last_date = last_observation_date(series_id)
+    if last_date is None:
+        return None
+    return last_date + timedelta(days=1)
+
+
+def get_refresh_state(series_id):
+    """
+    Return ``(observation_start, last_updated)`` for a series: the first date
+    still to fetch and the upstream last_updated stamp recorded on its last
+    refresh ('' when unknown).
+    """
+    last_updated = Indicator.objects.filter(series_id=series_id).values_list(
+        'source_last_updated', flat=True
+    ).first()
+    return next_observation_start(series_id), last_updated or ''
+
+
+def stored_series(series_id):
+    """
+    Return a series from the database in the shape of
+    ``FREDAPI.get_series``, marked ``stale``, for serving while FRED is
+    unavailable. Returns None when nothing is stored for the series.
+    """
+    arrays = load_series_arrays(series_id)
+    if arrays is None or not len(arrays):
+        return None
+
+    indicator = Indicator.objects.filter(series_id=series_id).first()
+    return {
+        'series_id': series_id,
+        'title': indicator.name if indicator else series_id,
+        'observations': arrays.to_observations(newest_first=True),
+        'units': indicator.unit if indicator else '',
+        'frequency': indicator.frequency if indicator else '',
+        'stale': True
+    }
+
+
+def store_observations(series_id, observations):
+    """
+    Bulk upsert (date, value) pairs for a series.
+
+    Existing rows for the same date are overwritten so revised values win.
+    Returns the number of rows written.
+    """
+    rows = [
+        Observation(series_id=series_id, date=date, value=float(value))
+        for date, value in observations
+    ]
+    if not rows:
+        return 0
+
+    Observation.objects.bulk_create(
+        rows,
+        batch_size=OBSERVATION_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['series_id', 'date'],
+        update_fields=['value'],
+    )
+    logger.debug(f"Stored {len(rows)} observations for {series_id}")
+    return len(rows)
+
+
+def mark_dirty(derived, since):
+    """
+    Mark a queryset of DerivedSeries as needing recomputation from
+    ``since`` (None for their whole history), keeping any earlier date
+    already marked.
+    """
+    if since is None:
+        return derived.update(dirty=True, dirty_from=None)
+    return derived.update(
+        dirty=True,
+        dirty_from=Case(
+            When(dirty=False, then=Value(since)),
+            # Already due for a full recomputation
+            When(dirty_from__isnull=True, then=None),
+            When(dirty_from__gt=since, then=Value(since)),
+            default=F('dirty_from'),
+        ),
+    )
+
+
+def mark_dependents_dirty(series_id, since):
+    """
+    Mark the derived series that read ``series_id`` dirty from ``since``.
+    Series derived from those are marked when their own values are written.
+    """
+    return mark_dirty(DerivedSeries.objects.filter(dependencies__series_id=series_id), since)
+
+
+def delete_series_data(series_id):
+    """
+    Delete everything stored for a series: its observations, columnar blob
+    and rollups. Returns the number of observations deleted.
+
+    The blob is emptied rather than deleted so its version keeps
+    increasing if the series is stored again.
+    """
+    deleted, _ = Observation.objects.filter(series_id=series_id).delete()
+    replace_series_blob(series_id, [])
+    delete_rollups(series_id)
+    return deleted
+
+
+def store_series_rows(series_id, rows):
+    """
+    Write ``(date, value)`` pairs of a series everywhere it is kept: the
+    observation table, its columnar blob and its rollups. Derived series
+    reading it are marked dirty from the earliest date written, and its
+    alert rules are queued for checking against the new observations.
+
+    Returns the stored SeriesArrays, or None when there was nothing to write.
+    """
+    if not store_observations(series_id, rows):
+        return None
+    since = min(rows)[0]
+    arrays = write_series_blob(series_id, rows)
+    update_rollups(arrays, since=since)
+    mark_dependents_dirty(series_id, since)
+    queue_alert_evaluation(series_id, since)
+    return arrays
+
+
+def replace_series_rows(series_id, rows, since=None):
+    """
+    Replace what is stored for a series from ``since`` onward (its whole
+    history when None) with ``(date, value)`` pairs, so points missing
+    from ``rows`` are deleted from the observation table, blob and
+    rollups. Dependents and alerts are handled as in store_series_rows.
+
+    Returns the stored SeriesArrays.
+    """
+    with transaction.atomic():
+        replaced = Observation.objects.filter(series_id=series_id)
+        if since is not None:
+            replaced = replaced.filter(date__gte=since)
+        replaced.delete()
+        store_observations(series_id, rows)
+        arrays = replace_series_blob(series_id, rows, since)
+        delete_rollups(series_id, since)
+        update_rollups(arrays, since=since)
+        mark_dependents_dirty(series_id, since)
+    if rows:
+        queue_alert_evaluation(series_id, min(rows)[0])
+    return arrays
+
+
+def queue_alert_evaluation(series_id, since):
+    """
+    Check a series' alert rules against its observations dated from
+    ``since`` in a Celery task, once the current transaction commits, so
+    evaluating and pushing alerts can neither slow down nor fail ingest.
+    Runs the check here when the task cannot be queued.
+    """
+    from .tasks import evaluate_series_alerts
+
+    def dispatch():
+        try:
+            evaluate_series_alerts.delay(series_id, since.isoformat())
+        except Exception as e:
+            logger.warning(f"Could not queue alert evaluation for {series_id}, running it inline: {str(e)}")
+            try:
+                evaluate_series_alerts(series_id, since.isoformat())
+            except Exception as e:
+                logger.error(f"Error evaluating alerts for {series_id}: {str(e)}")
+
+    transaction.on_commit(dispatch)
+
+
+def save_indicator(name, country, defaults):
+    """Point the Indicator row ``(name, country)`` at new values, creating it when missing"""
+    # One UPDATE for the usual case, shifting previous_value in the same
+    # statement; only new indicators take the slower create path
+    updated = Indicator.objects.filter(name=name, country=country).update(**defaults)
+    if not updated:
+        Indicator.objects.update_or_create(name=name, country=country, defaults=defaults)
+
+
+def upsert_indicators(items):
+    """
+    Insert or update Indicators from dicts of field values, matching
+    existing rows on ``(country, name)``. Items setting the same fields
+    share one INSERT ... ON CONFLICT statement per batch, which also moves
+    each updated row's old value to previous_value and stamps last_update.
+
+    Returns the Indicator objects written, in item order, with their IDs
+    and previous values as stored.
+    """
+    indicators = []
+    groups = defaultdict(list)
+    for item in items:
+        indicator = Indicator(**item)
+        indicators.append(indicator)
+        groups[frozenset(item) | {'last_update'}].append(indicator)
+
+    for fields, group in groups.items():
+        for start in range(0, len(group), INDICATOR_BATCH_SIZE):
+            _upsert_indicator_batch(group[start:start + INDICATOR_BATCH_SIZE], fields - {'country', 'name'})
+    return indicators
+
+
+def _upsert_indicator_batch(batch, updated):
+    meta = Indicator._meta
+    qn = connection.ops.quote_name
+    columns = [field for field in meta.concrete_fields if not field.primary_key]
+    assignments = [
+        f"{qn(column)} = EXCLUDED.{qn(column)}"
+        for column in sorted(meta.get_field(name).column for name in updated)
+    ]
+    if 'value' in updated:
+        # SET expressions read the row as it was before this statement
+        assignments.insert(0, f"previous_value = {qn(meta.db_table)}.value")
+    placeholders = f"({', '.join(['%s'] * len(columns))})"
+    sql = (
+        f"INSERT INTO {qn(meta.db_table)} ({', '.join(qn(field.column) for field in columns)}) "
+        f"VALUES {', '.join([placeholders] * len(batch))} "
+        f"ON CONFLICT (country, name) DO UPDATE SET {', '.join(assignments)} "
+        f"RETURNING country, name, id, previous_value"
+    )
+    params = [
+        field.get_db_prep_save(field.pre_save(indicator, True), connection)
+        for indicator in batch for field in columns
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        stored = {(country, name): (pk, previous) for country, name, pk, previous in cursor.fetchall()}
+    for indicator in batch:
+        indicator.pk, indicator.previous_value = stored[(indicator.country, indicator.name)]
+        indicator._state.adding = False
+
+
+def apply_series_update(series_id, series_info, observations, country="US"):
+    """
+    Store observations fetched through ``FREDAPI.get_observations`` and point
+    the series' Indicator row at the newest one.
+
+    Returns the number of observations written.
+    """
+    rows = [
+        (date.fromisoformat(obs['date']), obs['value'])
+        for obs in observations
+    ]
+    if store_series_rows(series_id, rows) is None:
+        # Still remember the stamp so the next refresh can skip the series
+        Indicator.objects.filter(series_id=series_id).update(
+            source_last_updated=series_info.get('last_updated', '')
+        )
+        return 0
+
+    latest_date, latest_value = max(rows)
+    defaults = {
+        'value': float(latest_value),
+        'unit': series_info['units'],
+        'category': series_info['frequency'],
+        'frequency': series_info['frequency'],
+        'description': series_info.get('notes', ''),
+        'last_update': timezone.make_aware(datetime.combine(latest_date, datetime.min.time())),
+        'source': 'FRED',
+        'series_id': series_id,
+        'source_last_updated': series_info.get('last_updated', '')
+    }
+    save_indicator(series_info['title'], country, defaults)
+    return len(rows)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from indicators.fred_api import close_pool, run_sync
+from indicators.ingest import delete_series_data
+from indicators.models import Indicator
+from indicators.ratelimit import reset_limiter
+from indicators.refresh import refresh_all
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the FRED refresh engine. Run it against a fred_stub server '
+        'by setting FRED_API_BASE_URL, e.g. http://127.0.0.1:8700/fred'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--series', type=int, default=100,
+                            help='Number of synthetic series IDs (BENCH0001, ...) to refresh')
+        parser.add_argument('--ids', help='Comma-separated series IDs to refresh instead')
+        parser.add_argument('--concurrency', type=int, help='Maximum number of series fetched at the same time')
+        parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs')
+        parser.add_argument('--cold', action='store_true',
+                            help='Delete stored observations, blobs, rollups and indicators of the series before each run')
+        parser.add_argument('--rate-limit', action='store_true',
+                            help='Keep the FRED rate limiter enabled (off by default)')
+
+    def handle(self, *args, **options):
+        if options['ids']:
+            series_ids = [series_id.strip() for series_id in options['ids'].split(',') if series_id.strip()]
+        else:
+            series_ids = [f"BENCH{i:04d}" for i in range(1, options['series'] + 1)]
+
+        overrides = {}
+        if not options['rate_limit']:
+            overrides = {
+                'FRED_RATE_LIMIT_BACKEND': 'local',
+                'FRED_RATE_LIMIT_PER_MINUTE': 10 ** 9,
+                'FRED_RATE_LIMIT_BURST': 10 ** 9,
+            }
+
+        with override_settings(**overrides):
+            reset_limiter()
+            try:
+                for run in range(1, options['repeat'] + 1):
+                    if options['cold']:
+                        for series_id in series_ids:
+                            delete_series_data(series_id)
+                        Indicator.objects.filter(series_id__in=series_ids).delete()
+                    self.report(run, *self.timed_refresh(series_ids, options['concurrency']))
+            finally:
+                close_pool()
+                reset_limiter()
+
+    def timed_refresh(self, series_ids, concurrency):
+        started = time.perf_counter()
+        results = run_sync(refresh_all(series_ids, concurrency=concurrency))
+        return results, time.perf_counter() - started
+
+    def report(self, run, results, wall):
+        failed = [result for result in results if result['status'] == 'failed']
+        statuses = {}
+        for result in results:
+            statuses[result['status']] = statuses.get(result['status'], 0) + 1
+        latencies = sorted(result['elapsed'] for result in results)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        observations = sum(result['observations'] for result in results)
+
+        self.stdout.write(
+            f"Run {run}: {len(results)} series in {wall:.2f}s "
+            f"({len(results) / wall:.1f} series/s, {observations / wall:.0f} observations/s) | "
+            f"latency p50 {statistics.median(latencies):.3f}s p95 {p95:.3f}s max {latencies[-1]:.3f}s | "
+            + ', '.join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+        )
+        for result in failed[:5]:
+            self.stdout.write(self.style.ERROR(f"  {result['series_id']}: {result['error']}"))
@@ -0,0 +1,43 @@
+from aiohttp import web
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from indicators.fred_stub import FREDStub
+
+class Command(BaseCommand):
+    help = 'Run a local FRED-compatible stub server for offline benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8700)
+        parser.add_argument('--fixtures', help='Directory of recorded payloads to replay')
+        parser.add_argument('--record', action='store_true',
+                            help='Fetch payloads missing from --fixtures from the real FRED API and save them')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Random +/- seconds applied to the latency')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 500')
+        parser.add_argument('--observations', type=int, default=1000,
+                            help='Daily observations in synthetic series')
+        parser.add_argument('--catalog-size', type=int, default=1000,
+                            help='Series in the synthetic catalog')
+        parser.add_argument('--seed', type=int, help='Seed for latency and error simulation')
+
+    def handle(self, *args, **options):
+        if options['record'] and not options['fixtures']:
+            self.stderr.write(self.style.ERROR('--record requires --fixtures'))
+            return
+
+        stub = FREDStub(
+            fixtures_dir=options['fixtures'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            observations=options['observations'],
+            upstream='https://api.stlouisfed.org/fred' if options['record'] else None,
+            api_key=settings.FRED_API_KEY,
+            seed=options['seed'],
+            catalog_size=options['catalog_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"FRED stub listening on http://{options['host']}:{options['port']}/fred"
+        ))
+        web.run_app(stub.make_app(), host=options['host'], port=options['port'], print=None)
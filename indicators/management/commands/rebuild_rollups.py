@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from indicators.columnar import load_series_arrays
+from indicators.models import Observation
+from indicators.rollups import update_rollups
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly, quarterly and annual rollups of stored series'
+
+    def add_arguments(self, parser):
+        parser.add_argument('series_ids', nargs='*', help='Series to rebuild (default: every stored series)')
+
+    def handle(self, *args, **options):
+        series_ids = options['series_ids'] or (
+            Observation.objects.values_list('series_id', flat=True).distinct().order_by('series_id')
+        )
+        for series_id in series_ids:
+            arrays = load_series_arrays(series_id)
+            if arrays is None:
+                self.stdout.write(self.style.WARNING(f"No observations stored for {series_id}"))
+                continue
+            written = update_rollups(arrays)
+            self.stdout.write(f"Rebuilt {written} rollups for {series_id}")
+        
+        self.stdout.write(self.style.SUCCESS('Finished rebuilding rollups'))
\ No newline at end of file
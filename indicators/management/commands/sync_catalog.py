@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from indicators.catalog import sync_catalog
+from indicators.fred_api import close_pool, run_sync
+
+class Command(BaseCommand):
+    help = 'Sync the local FRED series catalog used by series search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild the catalog from every FRED release instead of fetching recent updates'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Maximum number of releases fetched at the same time'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            written = run_sync(sync_catalog(full=options['full'], concurrency=options['concurrency']))
+        finally:
+            close_pool()
+        
+        self.stdout.write(self.style.SUCCESS(f"Synced {written} catalog entries"))
\ No newline at end of file
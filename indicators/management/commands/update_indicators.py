@@ -1,30 +1,34 @@
 from django.core.management.base import BaseCommand
-from indicators.tasks import update_indicator
+from indicators.fred_api import close_pool, run_sync
+from indicators.refresh import DEFAULT_SERIES, refresh_all
 
 class Command(BaseCommand):
     help = 'Update all indicators from FRED'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Maximum number of series fetched at the same time'
+        )
+
     def handle(self, *args, **options):
-        # List of important economic indicators from FRED
-        INDICATORS = {
-            'GDP': 'GDP',
-            'Unemployment Rate': 'UNRATE',
-            'CPI': 'CPIAUCSL',
-            'Federal Funds Rate': 'FEDFUNDS',
-            'Industrial Production': 'INDPRO',
-            'Consumer Sentiment': 'UMCSENT',
-            'Retail Sales': 'RSXFS',
-            'Housing Starts': 'HOUST',
-            'PCE': 'PCE',
-            'M2': 'M2'
-        }
+        names = {series_id: name for name, series_id in DEFAULT_SERIES.items()}
+        try:
+            results = run_sync(refresh_all(names, concurrency=options['concurrency']))
+        finally:
+            close_pool()
         
-        for name, series_id in INDICATORS.items():
-            self.stdout.write(f"Updating {name}...")
-            try:
-                update_indicator(series_id=series_id)
-                self.stdout.write(self.style.SUCCESS(f"Successfully updated {name}"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Failed to update {name}: {str(e)}"))
+        for result in results:
+            name = names[result['series_id']]
+            if result['status'] == 'failed':
+                self.stdout.write(self.style.ERROR(f"Failed to update {name}: {result['error']}"))
+            elif result['status'] == 'unchanged':
+                self.stdout.write(f"Skipped {name}: unchanged since the last refresh")
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Successfully updated {name} "
+                    f"({result['observations']} new observations, {result['elapsed']}s)"
+                ))
         
-        self.stdout.write(self.style.SUCCESS('Finished updating all indicators')) 
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('Finished updating all indicators'))
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicators', '0002_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicator',
+            name='series_id',
+            field=models.CharField(blank=True, db_index=True, help_text="FRED series ID the indicator is sourced from (e.g. 'UNRATE')", max_length=50, null=True),
+        ),
+        migrations.CreateModel(
+            name='Observation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series_id', models.CharField(help_text="FRED series ID (e.g. 'UNRATE')", max_length=50)),
+                ('date', models.DateField(help_text='Observation date')),
+                ('value', models.FloatField(help_text='Observed value')),
+            ],
+            options={
+                'unique_together': {('series_id', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicators', '0003_observation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicator',
+            name='source_last_updated',
+            field=models.CharField(blank=True, default='', help_text='Upstream last_updated stamp of the series, used to skip unchanged refreshes', max_length=32),
+        ),
+    ]
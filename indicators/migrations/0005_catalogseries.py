@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:38
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicators', '0004_indicator_source_last_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series_id', models.CharField(help_text="FRED series ID, upper case (e.g. 'UNRATE')", max_length=50, unique=True)),
+                ('title', models.CharField(max_length=500)),
+                ('units', models.CharField(blank=True, max_length=200)),
+                ('frequency', models.CharField(blank=True, max_length=50)),
+                ('popularity', models.IntegerField(default=0, help_text='FRED popularity score (0-100)')),
+                ('last_updated', models.CharField(blank=True, help_text='Upstream last_updated stamp of the series', max_length=32)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'catalog series',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('title', config='english'), name='catalog_title_search'), models.Index(fields=['synced_at'], name='indicators__synced__87ab9c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicators', '0005_catalogseries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeriesSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series_id', models.CharField(max_length=50, unique=True)),
+                ('release_id', models.IntegerField(blank=True, help_text='FRED release the series is published in', null=True)),
+                ('next_release_date', models.DateField(blank=True, help_text="Next publication date from FRED's release calendar", null=True)),
+                ('period', models.DurationField(blank=True, help_text='Typical gap between observations, used when no release date is known', null=True)),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_changed_at', models.DateTimeField(blank=True, help_text='Last time a check found new data', null=True)),
+                ('next_check_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicators', '0006_seriesschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeriesBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series_id', models.CharField(max_length=50, unique=True)),
+                ('days', models.BinaryField(help_text='Little-endian int32 days since 1970-01-01, ascending')),
+                ('values', models.BinaryField(help_text='Little-endian float64 values, one per day')),
+                ('count', models.IntegerField(default=0)),
+                ('version', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,92 @@
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+# Observations before the first boundary share one partition; later ones
+# get a partition per decade, and anything past the last boundary lands
+# in the default partition
+PARTITION_BOUNDARIES = list(range(1950, 2050, 10))
+
+PARTITION_SQL = """
+ALTER TABLE indicators_observation RENAME TO indicators_observation_flat;
+
+CREATE SEQUENCE indicators_observation_part_id_seq AS bigint;
+CREATE TABLE indicators_observation (
+    id bigint NOT NULL DEFAULT nextval('indicators_observation_part_id_seq'),
+    series_id varchar(50) NOT NULL,
+    date date NOT NULL,
+    value double precision NOT NULL,
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+ALTER SEQUENCE indicators_observation_part_id_seq OWNED BY indicators_observation.id;
+
+{partitions}
+CREATE TABLE indicators_observation_default PARTITION OF indicators_observation DEFAULT;
+
+ALTER TABLE indicators_observation
+    ADD CONSTRAINT observation_series_date_value UNIQUE (series_id, date) INCLUDE (value);
+CREATE INDEX observation_date_brin ON indicators_observation USING brin (date);
+
+INSERT INTO indicators_observation (id, series_id, date, value)
+    SELECT id, series_id, date, value FROM indicators_observation_flat;
+SELECT setval('indicators_observation_part_id_seq', COALESCE(MAX(id), 0) + 1, false)
+    FROM indicators_observation;
+DROP TABLE indicators_observation_flat;
+ANALYZE indicators_observation;
+"""
+
+UNPARTITION_SQL = """
+ALTER TABLE indicators_observation RENAME TO indicators_observation_partitioned;
+
+CREATE TABLE indicators_observation (
+    id bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    series_id varchar(50) NOT NULL,
+    date date NOT NULL,
+    value double precision NOT NULL,
+    CONSTRAINT indicators_observation_series_id_date_uniq UNIQUE (series_id, date)
+);
+
+INSERT INTO indicators_observation (id, series_id, date, value)
+    SELECT id, series_id, date, value FROM indicators_observation_partitioned;
+SELECT setval(pg_get_serial_sequence('indicators_observation', 'id'), COALESCE(MAX(id), 0) + 1, false)
+    FROM indicators_observation;
+DROP TABLE indicators_observation_partitioned;
+"""
+
+
+def partition_sql():
+    bounds = ['MINVALUE'] + [f"'{year}-01-01'" for year in PARTITION_BOUNDARIES]
+    names = [f"before_{PARTITION_BOUNDARIES[0]}"] + [f"{year}s" for year in PARTITION_BOUNDARIES[:-1]]
+    partitions = '\n'.join(
+        f"CREATE TABLE indicators_observation_{name} PARTITION OF indicators_observation "
+        f"FOR VALUES FROM ({start}) TO ({end});"
+        for name, start, end in zip(names, bounds, bounds[1:])
+    )
+    return PARTITION_SQL.format(partitions=partitions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicators', '0007_seriesblob'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            partition_sql(),
+            UNPARTITION_SQL,
+            state_operations=[
+                migrations.AlterUniqueTogether(
+                    name='observation',
+                    unique_together=set(),
+                ),
+                migrations.AddConstraint(
+                    model_name='observation',
+                    constraint=models.UniqueConstraint(fields=('series_id', 'date'), include=('value',), name='observation_series_date_value'),
+                ),
+                migrations.AddIndex(
+                    model_name='observation',
+                    index=django.contrib.postgres.indexes.BrinIndex(fields=['date'], name='observation_date_brin'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicators', '0008_partition_observations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeriesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series_id', models.CharField(max_length=50)),
+                ('frequency', models.CharField(choices=[('M', 'Monthly'), ('Q', 'Quarterly'), ('A', 'Annual')], max_length=1)),
+                ('period_start', models.DateField(help_text='First day of the period')),
+                ('mean', models.FloatField(help_text="Average of the period's observations")),
+                ('last', models.FloatField(help_text='Last observation of the period')),
+                ('count', models.IntegerField(help_text='Observations in the period')),
+                ('change', models.FloatField(blank=True, help_text='Change in last value from the previous period (MoM, QoQ or YoY)', null=True)),
+                ('pct_change', models.FloatField(blank=True, help_text='change as a percentage', null=True)),
+                ('yoy_change', models.FloatField(blank=True, help_text='Change in last value from the same period a year earlier', null=True)),
+                ('yoy_pct_change', models.FloatField(blank=True, help_text='yoy_change as a percentage', null=True)),
+            ],
+            options={
+                'ordering': ['series_id', 'frequency', 'period_start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='seriesrollup',
+            constraint=models.UniqueConstraint(fields=('series_id', 'frequency', 'period_start'), name='rollup_series_frequency_period'),
+        ),
+    ]
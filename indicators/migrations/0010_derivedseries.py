@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicators', '0009_seriesrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DerivedSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series_id', models.CharField(help_text="ID the series is stored and served under (e.g. 'REALFEDFUNDS')", max_length=50, unique=True)),
+                ('name', models.CharField(help_text='Name of the Indicator row kept up to date', max_length=100)),
+                ('country', models.CharField(default='US', max_length=100)),
+                ('unit', models.CharField(blank=True, max_length=50)),
+                ('expression', models.TextField(help_text="e.g. 'FEDFUNDS - pct_change(CPIAUCSL, 12)'")),
+                ('frequency', models.CharField(choices=[('D', 'Daily'), ('W', 'Weekly'), ('M', 'Monthly'), ('Q', 'Quarterly'), ('A', 'Annual')], default='M', help_text='Calendar the inputs are aligned on; function windows count its periods', max_length=1)),
+                ('aggregation', models.CharField(choices=[('last', 'Last'), ('first', 'First'), ('mean', 'Mean'), ('sum', 'Sum'), ('min', 'Minimum'), ('max', 'Maximum')], default='last', help_text='How inputs observed more often than the frequency are reduced', max_length=5)),
+                ('dirty', models.BooleanField(default=True, help_text='Whether the stored values are out of date')),
+                ('dirty_from', models.DateField(blank=True, help_text='Earliest input date that changed; empty recomputes the whole series', null=True)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, help_text='Why the last recomputation failed')),
+            ],
+            options={
+                'verbose_name_plural': 'derived series',
+                'indexes': [models.Index(fields=['dirty'], name='indicators__dirty_155d4b_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DerivedDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series_id', models.CharField(db_index=True, max_length=50)),
+                ('derived', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependencies', to='indicators.derivedseries')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='deriveddependency',
+            constraint=models.UniqueConstraint(fields=('derived', 'series_id'), name='derived_dependency_unique'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('indicators', '0010_derivedseries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('series_id', models.CharField(help_text="Series the rule watches (e.g. 'UNRATE')", max_length=50)),
+                ('kind', models.CharField(choices=[('above', 'Value above threshold'), ('below', 'Value below threshold'), ('rise', 'Rises by at least threshold over periods'), ('fall', 'Falls by at least threshold over periods'), ('zscore', 'More than threshold standard deviations from the preceding periods')], max_length=10)),
+                ('threshold', models.FloatField()),
+                ('periods', models.IntegerField(default=1, help_text='Observations the change is measured over, or the z-score window')),
+                ('active', models.BooleanField(default=True)),
+                ('checked_through', models.DateField(blank=True, help_text='Newest observation already checked; older ones never trigger the rule', null=True)),
+                ('last_triggered_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AlertEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Date of the observation that triggered the rule')),
+                ('value', models.FloatField(help_text='Observed value')),
+                ('metric', models.FloatField(help_text='Value, change or z-score compared with the threshold')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='indicators.alertrule')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='alertrule',
+            index=models.Index(fields=['series_id', 'active'], name='indicators__series__4b2979_idx'),
+        ),
+    ]
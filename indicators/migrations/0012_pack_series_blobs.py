@@ -0,0 +1,41 @@
+from datetime import date
+import numpy as np
+from django.db import migrations
+
+# Layout of SeriesBlob columns, as in indicators.columnar
+DAY_DTYPE = np.dtype('<i4')
+VALUE_DTYPE = np.dtype('<f8')
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def pack_series_blobs(apps, schema_editor):
+    # Series stored before blobs existed have observations but no blob;
+    # pack them so reads never have to
+    Observation = apps.get_model('indicators', 'Observation')
+    SeriesBlob = apps.get_model('indicators', 'SeriesBlob')
+    packed = set(SeriesBlob.objects.values_list('series_id', flat=True))
+    series_ids = Observation.objects.values_list('series_id', flat=True).distinct().order_by('series_id')
+    for series_id in series_ids.iterator():
+        if series_id in packed:
+            continue
+        rows = list(Observation.objects.filter(series_id=series_id).order_by('date').values_list('date', 'value'))
+        days = np.fromiter((day.toordinal() - EPOCH_ORDINAL for day, _ in rows), dtype=DAY_DTYPE, count=len(rows))
+        values = np.fromiter((value for _, value in rows), dtype=VALUE_DTYPE, count=len(rows))
+        SeriesBlob.objects.create(
+            series_id=series_id,
+            days=days.tobytes(),
+            values=values.tobytes(),
+            count=len(rows),
+            version=1,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicators', '0011_alertrule'),
+    ]
+
+    operations = [
+        migrations.RunPython(pack_series_blobs, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,38 @@
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.conf import settings
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 
 
+class IndicatorQuerySet(models.QuerySet):
+    """
+    Keeps previous_value in step with value for set-based writes: whenever
+    value is written, previous_value takes the stored value in the same
+    statement.
+    """
+    def update(self, **kwargs):
+        if 'value' in kwargs:
+            kwargs.setdefault('previous_value', F('value'))
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        fields = list(fields)
+        shift = 'value' in fields and 'previous_value' not in fields
+        if shift:
+            objs = list(objs)
+            fields.append('previous_value')
+            for obj in objs:
+                obj.previous_value = F('value')
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        if shift:
+            for obj in objs:
+                # Only the database knows the shifted value; load it on access
+                del obj.previous_value
+        return rows
+
+
 class Indicator(models.Model):
     """
     Model to store macroeconomic indicators like interest rates, inflation, PMI, etc.
@@ -45,6 +76,21 @@ class Indicator(models.Model):
         blank=True,
         help_text="Detailed description of what the indicator measures"
     )
+    series_id = models.CharField(
+        max_length=50,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="FRED series ID the indicator is sourced from (e.g. 'UNRATE')"
+    )
+    source_last_updated = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        help_text="Upstream last_updated stamp of the series, used to skip unchanged refreshes"
+    )
+
+    objects = IndicatorQuerySet.as_manager()
     
     class Meta:
         indexes = [
@@ -59,10 +105,301 @@ class Indicator(models.Model):
         return f"{self.country} - {self.name}: {self.value} {self.unit}"
     
     def save(self, *args, **kwargs):
-        if self.pk:  # If updating existing record
-            old_record = Indicator.objects.get(pk=self.pk)
-            self.previous_value = old_record.value
+        update_fields = kwargs.get('update_fields')
+        shift = self.pk and not self._state.adding and (update_fields is None or 'value' in update_fields)
+        if shift:  # If updating existing record
+            # Copy the stored value in the UPDATE itself instead of reading
+            # the old row first
+            self.previous_value = F('value')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'previous_value'}
         super().save(*args, **kwargs)
+        if shift:
+            # Only the database knows the shifted value; load it on access
+            del self.previous_value
+
+class Observation(models.Model):
+    """
+    A single dated value of a FRED series. Keeping the full history lets
+    refreshes fetch only what is newer than the last stored date.
+    """
+    series_id = models.CharField(
+        max_length=50,
+        help_text="FRED series ID (e.g. 'UNRATE')"
+    )
+    date = models.DateField(help_text="Observation date")
+    value = models.FloatField(help_text="Observed value")
+
+    class Meta:
+        # On PostgreSQL the table is range-partitioned by date (see
+        # migration 0008); the primary key there is (id, date)
+        constraints = [
+            # Covers (series, date range) reads as index-only scans
+            models.UniqueConstraint(
+                fields=['series_id', 'date'],
+                include=['value'],
+                name='observation_series_date_value'
+            ),
+        ]
+        indexes = [
+            BrinIndex(fields=['date'], name='observation_date_brin'),
+        ]
+
+    def __str__(self):
+        return f"{self.series_id} {self.date}: {self.value}"
+
+class SeriesBlob(models.Model):
+    """
+    Every observation of a series packed into two binary columns, loaded
+    as NumPy arrays without copying (see indicators.columnar). ``version``
+    increases on every write so results derived from it can be cached.
+    """
+    series_id = models.CharField(max_length=50, unique=True)
+    days = models.BinaryField(help_text="Little-endian int32 days since 1970-01-01, ascending")
+    values = models.BinaryField(help_text="Little-endian float64 values, one per day")
+    count = models.IntegerField(default=0)
+    version = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.series_id} ({self.count} observations, v{self.version})"
+
+class SeriesRollup(models.Model):
+    """
+    One period (month, quarter or year) of a series, precomputed at ingest
+    so charts and cards do not aggregate raw history on every request.
+    """
+    FREQUENCY_CHOICES = [
+        ('M', 'Monthly'),
+        ('Q', 'Quarterly'),
+        ('A', 'Annual'),
+    ]
+
+    series_id = models.CharField(max_length=50)
+    frequency = models.CharField(max_length=1, choices=FREQUENCY_CHOICES)
+    period_start = models.DateField(help_text="First day of the period")
+    mean = models.FloatField(help_text="Average of the period's observations")
+    last = models.FloatField(help_text="Last observation of the period")
+    count = models.IntegerField(help_text="Observations in the period")
+    change = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Change in last value from the previous period (MoM, QoQ or YoY)"
+    )
+    pct_change = models.FloatField(null=True, blank=True, help_text="change as a percentage")
+    yoy_change = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Change in last value from the same period a year earlier"
+    )
+    yoy_pct_change = models.FloatField(null=True, blank=True, help_text="yoy_change as a percentage")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['series_id', 'frequency', 'period_start'],
+                name='rollup_series_frequency_period'
+            ),
+        ]
+        ordering = ['series_id', 'frequency', 'period_start']
+
+    def __str__(self):
+        return f"{self.series_id} {self.frequency} {self.period_start}: {self.last}"
+
+class CatalogSeries(models.Model):
+    """
+    Local mirror of FRED series metadata, searched instead of calling
+    FRED's series search for every keystroke.
+    """
+    series_id = models.CharField(
+        max_length=50,
+        unique=True,
+        help_text="FRED series ID, upper case (e.g. 'UNRATE')"
+    )
+    title = models.CharField(max_length=500)
+    units = models.CharField(max_length=200, blank=True)
+    frequency = models.CharField(max_length=50, blank=True)
+    popularity = models.IntegerField(default=0, help_text="FRED popularity score (0-100)")
+    last_updated = models.CharField(
+        max_length=32,
+        blank=True,
+        help_text="Upstream last_updated stamp of the series"
+    )
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'catalog series'
+        indexes = [
+            # series_id prefixes use the varchar_pattern_ops index Postgres
+            # gets for the unique column; titles use full-text search
+            GinIndex(SearchVector('title', config='english'), name='catalog_title_search'),
+            models.Index(fields=['synced_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.series_id}: {self.title}"
+
+class SeriesSchedule(models.Model):
+    """
+    When a FRED series is next expected to publish and when it should next
+    be checked, so refreshes follow release calendars instead of a fixed
+    polling interval.
+    """
+    series_id = models.CharField(max_length=50, unique=True)
+    release_id = models.IntegerField(null=True, blank=True, help_text="FRED release the series is published in")
+    next_release_date = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Next publication date from FRED's release calendar"
+    )
+    period = models.DurationField(
+        null=True,
+        blank=True,
+        help_text="Typical gap between observations, used when no release date is known"
+    )
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    last_changed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last time a check found new data"
+    )
+    next_check_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.series_id} (next check {self.next_check_at})"
+
+class DerivedSeries(models.Model):
+    """
+    A series computed from an expression over other stored series, such as
+    ``FEDFUNDS - pct_change(CPIAUCSL, 12)``, and stored like a FRED series
+    (see indicators.derived). When an input gains observations the series
+    is marked dirty from the earliest changed date and recomputed from there.
+    """
+    FREQUENCY_CHOICES = [
+        ('D', 'Daily'),
+        ('W', 'Weekly'),
+        ('M', 'Monthly'),
+        ('Q', 'Quarterly'),
+        ('A', 'Annual'),
+    ]
+    AGGREGATION_CHOICES = [
+        ('last', 'Last'),
+        ('first', 'First'),
+        ('mean', 'Mean'),
+        ('sum', 'Sum'),
+        ('min', 'Minimum'),
+        ('max', 'Maximum'),
+    ]
+
+    series_id = models.CharField(
+        max_length=50,
+        unique=True,
+        help_text="ID the series is stored and served under (e.g. 'REALFEDFUNDS')"
+    )
+    name = models.CharField(max_length=100, help_text="Name of the Indicator row kept up to date")
+    country = models.CharField(max_length=100, default="US")
+    unit = models.CharField(max_length=50, blank=True)
+    expression = models.TextField(help_text="e.g. 'FEDFUNDS - pct_change(CPIAUCSL, 12)'")
+    frequency = models.CharField(
+        max_length=1,
+        choices=FREQUENCY_CHOICES,
+        default='M',
+        help_text="Calendar the inputs are aligned on; function windows count its periods"
+    )
+    aggregation = models.CharField(
+        max_length=5,
+        choices=AGGREGATION_CHOICES,
+        default='last',
+        help_text="How inputs observed more often than the frequency are reduced"
+    )
+    dirty = models.BooleanField(default=True, help_text="Whether the stored values are out of date")
+    dirty_from = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Earliest input date that changed; empty recomputes the whole series"
+    )
+    computed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, help_text="Why the last recomputation failed")
+
+    class Meta:
+        verbose_name_plural = 'derived series'
+        indexes = [
+            models.Index(fields=['dirty']),
+        ]
+
+    def __str__(self):
+        return f"{self.series_id} = {self.expression}"
+
+class DerivedDependency(models.Model):
+    """
+    An edge of the derived series dependency graph: ``derived`` reads
+    ``series_id``, which may itself be derived.
+    """
+    derived = models.ForeignKey(DerivedSeries, on_delete=models.CASCADE, related_name='dependencies')
+    series_id = models.CharField(max_length=50, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['derived', 'series_id'], name='derived_dependency_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.derived.series_id} <- {self.series_id}"
+
+class AlertRule(models.Model):
+    """
+    A condition on a series checked whenever new observations of it are
+    stored (see indicators.alerts), e.g. UNRATE rising 0.3 over 3
+    observations or any value more than 3 standard deviations out.
+    """
+    KIND_CHOICES = [
+        ('above', 'Value above threshold'),
+        ('below', 'Value below threshold'),
+        ('rise', 'Rises by at least threshold over periods'),
+        ('fall', 'Falls by at least threshold over periods'),
+        ('zscore', 'More than threshold standard deviations from the preceding periods'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='alert_rules')
+    name = models.CharField(max_length=100)
+    series_id = models.CharField(max_length=50, help_text="Series the rule watches (e.g. 'UNRATE')")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    threshold = models.FloatField()
+    periods = models.IntegerField(
+        default=1,
+        help_text="Observations the change is measured over, or the z-score window"
+    )
+    active = models.BooleanField(default=True)
+    checked_through = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Newest observation already checked; older ones never trigger the rule"
+    )
+    last_triggered_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Each ingest loads only the active rules of its own series
+            models.Index(fields=['series_id', 'active']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.series_id} {self.kind} {self.threshold})"
+
+class AlertEvent(models.Model):
+    """An observation that met an AlertRule's condition"""
+    rule = models.ForeignKey(AlertRule, on_delete=models.CASCADE, related_name='events')
+    date = models.DateField(help_text="Date of the observation that triggered the rule")
+    value = models.FloatField(help_text="Observed value")
+    metric = models.FloatField(help_text="Value, change or z-score compared with the threshold")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.rule.name} on {self.date}: {self.metric}"
 
 class Task(models.Model):
     STATUS_CHOICES = [
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import threading
+import time
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes. Interactive requests (websocket users, health checks) may
+# use every token; background refreshes leave a reserve untouched for them.
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+BUCKET_KEY = 'fred:ratelimit:bucket'
+# Seconds to use the local bucket after Redis fails before trying it again
+REDIS_RETRY_DELAY = 30
+
+# Atomically refill the bucket and try to take one token. Returns 0 when a
+# token was taken, otherwise the seconds to wait before one is available.
+TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens - 1 >= reserve then
+    tokens = tokens - 1
+else
+    wait = (reserve + 1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class LocalTokenBucket:
+    """
+    In-process stand-in for the Redis bucket, used when Redis is disabled or
+    unreachable. Only limits the current process.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.ts = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, reserve):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.ts) * self.rate)
+            self.ts = now
+            if self.tokens - 1 >= reserve:
+                self.tokens -= 1
+                return 0
+            return (reserve + 1 - self.tokens) / self.rate
+
+    def level(self):
+        """Return the tokens currently in the bucket without taking one"""
+        with self.lock:
+            return min(self.capacity, self.tokens + (time.monotonic() - self.ts) * self.rate)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every process calling FRED, stored in Redis.
+    """
+    def __init__(self):
+        self.rate = settings.FRED_RATE_LIMIT_PER_MINUTE / 60
+        self.capacity = settings.FRED_RATE_LIMIT_BURST
+        self.reserves = {
+            INTERACTIVE: 0,
+            BACKGROUND: self.capacity * settings.FRED_RATE_LIMIT_INTERACTIVE_SHARE,
+        }
+        self.local_bucket = LocalTokenBucket(self.rate, self.capacity)
+        self.client = None
+        self.redis = None
+        self.redis_retry_at = 0
+        if settings.FRED_RATE_LIMIT_BACKEND == 'redis':
+            self.client = client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                socket_connect_timeout=1,
+                socket_timeout=1
+            )
+            self.redis = client.register_script(TAKE_TOKEN_SCRIPT)
+
+    def try_acquire(self, priority=INTERACTIVE):
+        """
+        Try to take one token. Returns 0 on success, otherwise the number of
+        seconds to wait before trying again.
+        """
+        reserve = self.reserves[priority]
+        if self.redis is not None and time.monotonic() >= self.redis_retry_at:
+            try:
+                return float(self.redis(keys=[BUCKET_KEY], args=[self.rate, self.capacity, reserve]))
+            except redis.RedisError as e:
+                logger.warning(f"Rate limiter falling back to local bucket: {str(e)}")
+                self.redis_retry_at = time.monotonic() + REDIS_RETRY_DELAY
+        return self.local_bucket.take(reserve)
+
+    def available(self):
+        """Return the tokens currently in the bucket without taking one"""
+        if self.redis is not None and time.monotonic() >= self.redis_retry_at:
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                pipe.time()
+                pipe.hmget(BUCKET_KEY, 'tokens', 'ts')
+                (seconds, micros), (tokens, ts) = pipe.execute()
+            except redis.RedisError as e:
+                logger.warning(f"Rate limiter falling back to local bucket: {str(e)}")
+                self.redis_retry_at = time.monotonic() + REDIS_RETRY_DELAY
+            else:
+                if tokens is None:
+                    return float(self.capacity)
+                now = seconds + micros / 1000000
+                return min(self.capacity, float(tokens) + max(0, now - float(ts)) * self.rate)
+        return self.local_bucket.level()
+
+    def acquire(self, priority=INTERACTIVE, max_wait=None):
+        """Block until a token is available"""
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire(priority)
+            if not wait:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise RateLimitExceeded("FRED rate limit exceeded")
+            time.sleep(wait)
+
+    async def aacquire(self, priority=INTERACTIVE, max_wait=None):
+        """Wait without blocking the event loop until a token is available"""
+        loop = asyncio.get_running_loop()
+        deadline = None if max_wait is None else loop.time() + max_wait
+        while True:
+            if self.redis is not None:
+                wait = await asyncio.to_thread(self.try_acquire, priority)
+            else:
+                wait = self.try_acquire(priority)
+            if not wait:
+                return
+            if deadline is not None and loop.time() + wait > deadline:
+                raise RateLimitExceeded("FRED rate limit exceeded")
+            await asyncio.sleep(wait)
+
+
+_limiter = None
+
+
+def get_limiter():
+    """Return the process-wide rate limiter"""
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter()
+    return _limiter
+
+
+def reset_limiter():
+    """Drop the process-wide limiter so the next call re-reads settings"""
+    global _limiter
+    _limiter = None
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import time
+from channels.db import database_sync_to_async
+from django.conf import settings
+from .fred_api import FREDAPI
+from .ingest import apply_series_update, get_refresh_state
+from .ratelimit import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+# Common economic indicators from FRED, keyed by display name
+DEFAULT_SERIES = {
+    'GDP': 'GDP',
+    'Unemployment Rate': 'UNRATE',
+    'CPI': 'CPIAUCSL',
+    'Federal Funds Rate': 'FEDFUNDS',
+    'Industrial Production': 'INDPRO',
+    'Consumer Sentiment': 'UMCSENT',
+    'Retail Sales': 'RSXFS',
+    'Housing Starts': 'HOUST',
+    'PCE': 'PCE',
+    'M2': 'M2'
+}
+
+
+async def refresh_series(series_id, semaphore, country="US"):
+    """
+    Fetch new observations for one series and store them.
+
+    The series' metadata is checked first; when FRED's last_updated stamp
+    matches the one recorded on the previous refresh, the observation
+    download and the database write are skipped.
+
+    Never raises: failures are reported in the returned result dict so one
+    bad series cannot abort the rest of a batch.
+    """
+    result = {'series_id': series_id, 'status': 'success', 'observations': 0}
+    async with semaphore:
+        # Time the work itself, not the wait for a free slot
+        started = time.perf_counter()
+        try:
+            observation_start, last_updated = await database_sync_to_async(get_refresh_state)(series_id)
+            async with FREDAPI(priority=BACKGROUND) as fred_api:
+                series_info = await fred_api.get_series_info(series_id, use_cache=False)
+                if last_updated and series_info.get('last_updated') == last_updated:
+                    result['status'] = 'unchanged'
+                else:
+                    observations = await fred_api.get_observations(
+                        series_id, observation_start=observation_start
+                    )
+                    result['observations'] = await database_sync_to_async(apply_series_update)(
+                        series_id, series_info, observations or [], country
+                    )
+                    if not observations:
+                        result['status'] = 'no_data'
+        except Exception as e:
+            logger.error(f"Error refreshing {series_id}: {str(e)}")
+            result['status'] = 'failed'
+            result['error'] = str(e)
+        result['elapsed'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+async def refresh_all(series_ids, concurrency=None, country="US"):
+    """
+    Refresh many series concurrently, at most ``concurrency`` at a time.
+
+    Returns one result dict per series, in the order given, with its status
+    ('success', 'unchanged', 'no_data' or 'failed'), observations written and
+    elapsed seconds.
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.FRED_REFRESH_CONCURRENCY)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        refresh_series(series_id, semaphore, country)
+        for series_id in series_ids
+    ))
+    failed = sum(1 for result in results if result['status'] == 'failed')
+    logger.info(
+        f"Refreshed {len(results) - failed}/{len(results)} series "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return results
@@ -0,0 +1,136 @@
+import logging
+from datetime import date
+import numpy as np
+from django.db.models import Q
+from .models import SeriesRollup
+
+logger = logging.getLogger(__name__)
+
+# Months per period for each rollup frequency
+PERIOD_MONTHS = {'M': 1, 'Q': 3, 'A': 12}
+# Rows per INSERT ... ON CONFLICT statement when upserting rollups
+ROLLUP_BATCH_SIZE = 1000
+
+
+def _changes(last, lagged):
+    change = last - lagged
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(lagged != 0, change / np.abs(lagged) * 100, np.nan)
+    return change, pct
+
+
+def compute_rollups(arrays, frequency):
+    """
+    Aggregate SeriesArrays into periods of ``frequency`` ('M', 'Q' or 'A').
+
+    Returns a dict of equal-length arrays: ``period`` (months since
+    1970-01 of each period's start), ``mean``, ``last``, ``count``,
+    ``change``/``pct_change`` against the previous period and
+    ``yoy_change``/``yoy_pct_change`` against the same period a year
+    earlier. Changes are NaN where the earlier period has no data.
+    """
+    months = PERIOD_MONTHS[frequency]
+    keys = arrays.dates.astype('datetime64[M]').astype(np.int64) // months
+    if not len(keys):
+        return None
+
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+    ends = np.append(starts[1:], len(keys))
+    periods = keys[starts]
+    count = ends - starts
+    mean = np.add.reduceat(arrays.values, starts) / count
+    last = arrays.values[ends - 1]
+
+    def lagged_last(lag):
+        # Last value ``lag`` periods earlier, where that period exists
+        lagged = np.full(len(periods), np.nan)
+        pos = np.searchsorted(periods, periods - lag)
+        found = periods[np.minimum(pos, len(periods) - 1)] == periods - lag
+        lagged[found] = last[pos[found]]
+        return lagged
+
+    change, pct_change = _changes(last, lagged_last(1))
+    yoy_change, yoy_pct_change = _changes(last, lagged_last(12 // months))
+    return {
+        'period': periods * months,
+        'mean': mean,
+        'last': last,
+        'count': count,
+        'change': change,
+        'pct_change': pct_change,
+        'yoy_change': yoy_change,
+        'yoy_pct_change': yoy_pct_change,
+    }
+
+
+def _period_start(month_index):
+    year, month = divmod(int(month_index), 12)
+    return date(1970 + year, month + 1, 1)
+
+
+def _optional(value):
+    return None if np.isnan(value) else float(value)
+
+
+def delete_rollups(series_id, since=None):
+    """
+    Delete the rollups of a series for the periods from the one containing
+    ``since`` onward, or all of them when ``since`` is None. Returns the
+    number of rollup rows deleted.
+    """
+    rollups = SeriesRollup.objects.filter(series_id=series_id)
+    if since is not None:
+        since_month = (since.year - 1970) * 12 + since.month - 1
+        rollups = rollups.filter(Q(*[
+            Q(frequency=frequency, period_start__gte=_period_start(since_month - since_month % months))
+            for frequency, months in PERIOD_MONTHS.items()
+        ], _connector=Q.OR))
+    deleted, _ = rollups.delete()
+    return deleted
+
+
+def update_rollups(arrays, since=None):
+    """
+    Recompute and store the rollups of a series from the period containing
+    ``since`` onward, or all of them when ``since`` is None.
+
+    Only a year of history before ``since`` is read, which is all the
+    period-over-period and year-over-year changes depend on.
+    Returns the number of rollup rows written.
+    """
+    if since is not None:
+        arrays = arrays.between(start=date(since.year - 1, 1, 1))
+    since_month = None if since is None else (since.year - 1970) * 12 + since.month - 1
+
+    rows = []
+    for frequency, months in PERIOD_MONTHS.items():
+        rollups = compute_rollups(arrays, frequency)
+        if rollups is None:
+            continue
+        for i, period in enumerate(rollups['period']):
+            if since_month is not None and period + months <= since_month:
+                continue  # Period ended before anything changed
+            rows.append(SeriesRollup(
+                series_id=arrays.series_id,
+                frequency=frequency,
+                period_start=_period_start(period),
+                mean=float(rollups['mean'][i]),
+                last=float(rollups['last'][i]),
+                count=int(rollups['count'][i]),
+                change=_optional(rollups['change'][i]),
+                pct_change=_optional(rollups['pct_change'][i]),
+                yoy_change=_optional(rollups['yoy_change'][i]),
+                yoy_pct_change=_optional(rollups['yoy_pct_change'][i]),
+            ))
+    if not rows:
+        return 0
+
+    SeriesRollup.objects.bulk_create(
+        rows,
+        batch_size=ROLLUP_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['series_id', 'frequency', 'period_start'],
+        update_fields=['mean', 'last', 'count', 'change', 'pct_change', 'yoy_change', 'yoy_pct_change'],
+    )
+    logger.debug(f"Stored {len(rows)} rollups for {arrays.series_id}")
+    return len(rows)
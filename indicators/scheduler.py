@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from datetime import datetime, time as dt_time, timedelta
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .catalog import FRED_TIMEZONE
+from .fred_api import FREDAPI
+from .models import DerivedSeries, Indicator, Observation, SeriesSchedule
+from .ratelimit import BACKGROUND
+from .refresh import DEFAULT_SERIES, refresh_all
+
+logger = logging.getLogger(__name__)
+
+# Recent observations used to learn a series' cadence
+PERIOD_SAMPLE = 13
+
+
+def release_time(release_date):
+    """Return when a release published on ``release_date`` is first checked"""
+    hour, minute = map(int, settings.FRED_RELEASE_TIME.split(':'))
+    return datetime.combine(release_date, dt_time(hour, minute), tzinfo=FRED_TIMEZONE)
+
+
+def expected_release(schedule):
+    """
+    Return when new data for a series is next expected, or None if unknown.
+
+    The release calendar wins when its next date has not been seen yet;
+    otherwise the cadence learned from past observations is projected from
+    the last time new data arrived.
+    """
+    if schedule.next_release_date:
+        changed = schedule.last_changed_at
+        if changed is None or changed.astimezone(FRED_TIMEZONE).date() < schedule.next_release_date:
+            return release_time(schedule.next_release_date)
+    if schedule.period and schedule.last_changed_at:
+        return schedule.last_changed_at + schedule.period
+    return None
+
+
+def plan_next_check(schedule, now):
+    """
+    Return when a series should next be checked.
+
+    Before an expected release the check waits for it. Once the release is
+    due but not seen, checks repeat with gaps that grow with how overdue it
+    is, capped at FRED_SCHEDULE_POLL_INTERVAL within the release window and
+    FRED_SCHEDULE_MAX_INTERVAL after it.
+    """
+    max_interval = timedelta(seconds=settings.FRED_SCHEDULE_MAX_INTERVAL)
+    expected = expected_release(schedule)
+    if expected is None:
+        return now + max_interval
+    if expected > now:
+        return min(expected, now + max_interval)
+
+    overdue = now - expected
+    if overdue < timedelta(seconds=settings.FRED_RELEASE_WINDOW):
+        cap = timedelta(seconds=settings.FRED_SCHEDULE_POLL_INTERVAL)
+    else:
+        cap = max_interval
+    return now + max(timedelta(seconds=settings.FRED_SCHEDULE_MIN_INTERVAL), min(overdue, cap))
+
+
+def observation_period(series_id):
+    """Return the median gap between a series' recent observations, or None"""
+    dates = list(
+        Observation.objects.filter(series_id=series_id)
+        .order_by('-date').values_list('date', flat=True)[:PERIOD_SAMPLE]
+    )
+    gaps = sorted(newer - older for newer, older in zip(dates, dates[1:]))
+    return gaps[len(gaps) // 2] if gaps else None
+
+
+def ensure_schedules():
+    """
+    Create schedules for the default series and every indicator sourced
+    from FRED. Returns their series IDs.
+    """
+    series_ids = set(DEFAULT_SERIES.values())
+    series_ids.update(
+        Indicator.objects.filter(source='FRED').exclude(series_id__isnull=True).exclude(series_id='')
+        .values_list('series_id', flat=True)
+    )
+    # Derived series are computed locally, never fetched from FRED
+    derived_ids = set(DerivedSeries.objects.values_list('series_id', flat=True))
+    SeriesSchedule.objects.filter(series_id__in=derived_ids).delete()
+    series_ids -= derived_ids
+    SeriesSchedule.objects.bulk_create(
+        [SeriesSchedule(series_id=series_id) for series_id in series_ids],
+        ignore_conflicts=True,
+    )
+    return series_ids
+
+
+def claim_due_schedules(now):
+    """
+    Return the series due for a check. Their next check is pushed out by
+    FRED_SCHEDULE_POLL_INTERVAL so overlapping dispatch runs skip them, and
+    a check lost to a crashed worker is retried after that.
+    """
+    with transaction.atomic():
+        due = list(
+            SeriesSchedule.objects.select_for_update(skip_locked=True)
+            .filter(next_check_at__lte=now)
+            .values_list('series_id', flat=True)
+        )
+        SeriesSchedule.objects.filter(series_id__in=due).update(
+            next_check_at=now + timedelta(seconds=settings.FRED_SCHEDULE_POLL_INTERVAL)
+        )
+    return due
+
+
+def record_checks(results, now):
+    """Plan the next check of each series from ``refresh_all`` results"""
+    schedules = SeriesSchedule.objects.in_bulk(
+        [result['series_id'] for result in results], field_name='series_id'
+    )
+    for result in results:
+        schedule = schedules.get(result['series_id'])
+        if schedule is None:
+            continue
+        schedule.last_checked_at = now
+        if result['status'] == 'success':
+            schedule.last_changed_at = now
+        schedule.next_check_at = plan_next_check(schedule, now)
+    SeriesSchedule.objects.bulk_update(
+        schedules.values(), ['last_checked_at', 'last_changed_at', 'next_check_at']
+    )
+
+
+def load_schedules():
+    series_ids = ensure_schedules()
+    schedules = list(SeriesSchedule.objects.filter(series_id__in=series_ids))
+    for schedule in schedules:
+        schedule.period = observation_period(schedule.series_id)
+    return schedules
+
+
+def save_calendar(schedules, now):
+    for schedule in schedules:
+        # A calendar change can only bring the next check forward
+        schedule.next_check_at = min(schedule.next_check_at, plan_next_check(schedule, now))
+    SeriesSchedule.objects.bulk_update(
+        schedules, ['release_id', 'next_release_date', 'period', 'next_check_at']
+    )
+
+
+async def refresh_due_series():
+    """
+    Refresh every series whose next check is due and plan the following
+    one. Returns the ``refresh_all`` results.
+    """
+    await database_sync_to_async(ensure_schedules)()
+    due = await database_sync_to_async(claim_due_schedules)(timezone.now())
+    if not due:
+        return []
+    results = await refresh_all(due)
+    await database_sync_to_async(record_checks)(results, timezone.now())
+    return results
+
+
+async def sync_release_calendar(concurrency=None):
+    """
+    Look up each scheduled series' FRED release and its next publication
+    date, and relearn each series' cadence from its stored observations.
+    Returns the number of schedules updated.
+    """
+    schedules = await database_sync_to_async(load_schedules)()
+    today = timezone.now().astimezone(FRED_TIMEZONE).date()
+    semaphore = asyncio.Semaphore(concurrency or settings.FRED_REFRESH_CONCURRENCY)
+
+    async with FREDAPI(priority=BACKGROUND) as fred_api:
+        async def find_release(schedule):
+            if schedule.release_id is not None:
+                return
+            async with semaphore:
+                try:
+                    schedule.release_id = await fred_api.get_release_id(schedule.series_id)
+                except Exception as e:
+                    logger.error(f"Error finding the release of {schedule.series_id}: {str(e)}")
+
+        async def next_release_date(release_id):
+            async with semaphore:
+                try:
+                    dates = await fred_api.get_release_dates(release_id, today)
+                except Exception as e:
+                    logger.error(f"Error fetching dates of release {release_id}: {str(e)}")
+                    raise
+            return next((release_date for release_date in dates if release_date >= today), None)
+
+        await asyncio.gather(*(find_release(schedule) for schedule in schedules))
+        # Many series share a release, so each release is looked up once
+        release_ids = sorted({schedule.release_id for schedule in schedules if schedule.release_id is not None})
+        results = await asyncio.gather(*(
+            next_release_date(release_id) for release_id in release_ids
+        ), return_exceptions=True)
+        next_dates = {
+            release_id: result for release_id, result in zip(release_ids, results)
+            if not isinstance(result, Exception)
+        }
+
+    for schedule in schedules:
+        # Keep the previous date when the lookup failed
+        if schedule.release_id in next_dates:
+            schedule.next_release_date = next_dates[schedule.release_id]
+    await database_sync_to_async(save_calendar)(schedules, timezone.now())
+    logger.info(f"Synced the release calendar of {len(schedules)} series")
+    return len(schedules)
@@ -1,5 +1,9 @@
 from rest_framework import serializers
-from .models import Indicator, Task
+from .derived import Expression, ExpressionError, check_cycles
+from .analytics import MAX_WINDOW
+from .models import (
+    AlertEvent, AlertRule, CatalogSeries, DerivedDependency, DerivedSeries, Indicator, Observation, SeriesRollup, Task
+)
 
 
 class IndicatorSerializer(serializers.ModelSerializer):
@@ -29,6 +33,95 @@ class BulkIndicatorSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'last_update': {'required': False}
         }
+        # Existing (country, name) pairs are upserted, not rejected, and
+        # checking them one query per item defeats the batch
+        validators = []
+
+
+class BulkIndicatorUpdateSerializer(IndicatorSerializer):
+    """
+    IndicatorSerializer for bulk updates; (country, name) uniqueness is
+    checked for the whole batch at once by the view instead of per item.
+    """
+    class Meta(IndicatorSerializer.Meta):
+        validators = []
+
+
+class SeriesRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeriesRollup
+        fields = [
+            'series_id', 'frequency', 'period_start', 'mean', 'last', 'count',
+            'change', 'pct_change', 'yoy_change', 'yoy_pct_change'
+        ]
+
+
+class DerivedSeriesSerializer(serializers.ModelSerializer):
+    dependencies = serializers.SlugRelatedField(many=True, read_only=True, slug_field='series_id')
+
+    class Meta:
+        model = DerivedSeries
+        fields = [
+            'id', 'series_id', 'name', 'country', 'unit', 'expression', 'frequency', 'aggregation',
+            'dependencies', 'dirty', 'dirty_from', 'computed_at', 'error'
+        ]
+        read_only_fields = ['id', 'dependencies', 'dirty', 'dirty_from', 'computed_at', 'error']
+
+    def validate(self, attrs):
+        series_id = attrs.get('series_id', getattr(self.instance, 'series_id', '')).upper()
+        expression = attrs.get('expression', getattr(self.instance, 'expression', ''))
+        try:
+            parsed = Expression(expression)
+            check_cycles(series_id, parsed.dependencies)
+        except ExpressionError as e:
+            raise serializers.ValidationError({'expression': str(e)})
+
+        if self.instance is None or series_id != self.instance.series_id:
+            # Recomputing would overwrite the stored data of that series
+            if (
+                CatalogSeries.objects.filter(series_id=series_id).exists()
+                or Indicator.objects.filter(series_id=series_id).exists()
+                or Observation.objects.filter(series_id=series_id).exists()
+            ):
+                raise serializers.ValidationError(
+                    {'series_id': f"{series_id} is already a FRED or stored series"}
+                )
+            if self.instance is not None and DerivedDependency.objects.filter(series_id=self.instance.series_id).exists():
+                raise serializers.ValidationError(
+                    {'series_id': f"{self.instance.series_id} is read by other derived series"}
+                )
+        attrs['series_id'] = series_id
+        return attrs
+
+
+class AlertRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AlertRule
+        fields = [
+            'id', 'name', 'series_id', 'kind', 'threshold', 'periods', 'active',
+            'checked_through', 'last_triggered_at', 'created_at'
+        ]
+        read_only_fields = ['id', 'checked_through', 'last_triggered_at', 'created_at']
+
+    def validate_series_id(self, value):
+        return value.upper()
+
+    def validate(self, attrs):
+        kind = attrs.get('kind', getattr(self.instance, 'kind', None))
+        periods = attrs.get('periods', getattr(self.instance, 'periods', 1))
+        minimum = 2 if kind == 'zscore' else 1
+        if not minimum <= periods <= MAX_WINDOW:
+            raise serializers.ValidationError({'periods': f"Must be between {minimum} and {MAX_WINDOW}"})
+        return attrs
+
+
+class AlertEventSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='rule.name', read_only=True)
+    series_id = serializers.CharField(source='rule.series_id', read_only=True)
+
+    class Meta:
+        model = AlertEvent
+        fields = ['id', 'rule', 'name', 'series_id', 'date', 'value', 'metric', 'created_at']
 
 
 class TaskSerializer(serializers.ModelSerializer):
@@ -0,0 +1,27 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key: the first caller starts the
+    coroutine and every caller arriving before it finishes awaits the same
+    result (or exception). Results are shared, so callers must not mutate
+    them.
+    """
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key, func, *args, **kwargs):
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self.calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        # Shielded so one caller going away does not cancel the others' call
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self.calls.get(key) is future:
+            del self.calls[key]
+        if not future.cancelled():
+            future.exception()  # Mark as retrieved even if every caller left
@@ -1,12 +1,20 @@
 import logging
+from datetime import date
 from celery import shared_task
 from django.conf import settings
-from fredapi import Fred
-from .models import Indicator, Task
+from .alerts import evaluate_alerts
+from .catalog import sync_catalog
+from .circuit import backoff_delay, get_breaker
+from .columnar import load_series_arrays
+from .derived import refresh_derived
+from .models import Task
+from .fred_api import FREDAPI, run_sync
+from .ratelimit import BACKGROUND
+from .refresh import DEFAULT_SERIES, refresh_all
+from .scheduler import refresh_due_series, sync_release_calendar
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
-fred = Fred(api_key=settings.FRED_API_KEY)
 
 def test_fred_connection():
     """
@@ -15,17 +23,15 @@ def test_fred_connection():
     try:
         # Try fetching GDP data
         series_id = 'GDP'
-        series_info = fred.get_series_info(series_id)
-        series_data = fred.get_series(series_id)
+        series_data = run_sync(FREDAPI(priority=BACKGROUND).get_series(series_id))
         
-        if series_data.empty:
+        if not series_data['observations']:
             return "No data found for GDP"
         
-        # Get the latest data point
-        latest_value = series_data.iloc[-1]
-        latest_date = series_data.index[-1]
+        # Observations come newest first
+        latest = series_data['observations'][0]
         
-        return f"Successfully fetched GDP data: {latest_value} as of {latest_date}"
+        return f"Successfully fetched GDP data: {latest['value']} as of {latest['date']}"
         
     except Exception as exc:
         return f"Error: {str(exc)}"
@@ -33,76 +39,105 @@ def test_fred_connection():
 @shared_task(
     bind=True,
     max_retries=3,
-    default_retry_delay=300,  # 5 min
 )
 def update_indicator(self, series_id, country="US"):
     """
-    Update a single indicator from FRED API.
+    Update a single indicator from FRED API. Failures are retried with
+    jittered exponential backoff, and never before an open circuit closes.
     """
-    try:
-        print(f"Fetching data for {series_id}")
-        # Get series information
-        series_info = fred.get_series_info(series_id)
-        series_data = fred.get_series(series_id)
-        
-        if series_data.empty:
-            print(f"No data found for series {series_id}")
-            return
-        
-        # Get the latest data point
-        latest_value = series_data.iloc[-1]
-        latest_date = series_data.index[-1]
-        
-        print(f"Got data for {series_id}: {latest_value} as of {latest_date}")
-        
-        indicator, created = Indicator.objects.update_or_create(
-            name=series_info.title,
-            country=country,
-            defaults={
-                'value': float(latest_value),
-                'unit': series_info.units,
-                'category': series_info.frequency,
-                'frequency': series_info.frequency,
-                'description': series_info.notes,
-                'last_update': latest_date,
-                'source': 'FRED'
-            }
+    result = run_sync(refresh_all([series_id], concurrency=1, country=country))[0]
+    if result['status'] == 'failed':
+        logger.error(f"Error updating series {series_id}: {result['error']}")
+        countdown = max(
+            backoff_delay(self.request.retries, settings.FRED_TASK_RETRY_BASE_DELAY, settings.FRED_TASK_RETRY_MAX_DELAY),
+            run_sync(get_breaker().retry_after())
         )
-        
-        print(f"{'Created' if created else 'Updated'} indicator: {indicator}")
-        return True
-        
-    except Exception as exc:
-        print(f"Error updating series {series_id}: {exc}")
-        raise exc
+        raise self.retry(exc=Exception(result['error']), countdown=countdown)
+    
+    logger.info(f"Updated series {series_id}: {result['status']}, {result['observations']} new observations")
+    recompute_if_changed([result])
+    return result
 
 @shared_task
-def update_all_indicators():
+def update_all_indicators(series_ids=None):
     """
-    Update all common FRED indicators.
+    Update the given FRED series, or all common FRED indicators, concurrently.
     """
-    # List of economic indicators from FRED
-    INDICATORS = {
-        'GDP': 'GDP',
-        'Unemployment Rate': 'UNRATE',
-        'CPI': 'CPIAUCSL',
-        'Federal Funds Rate': 'FEDFUNDS',
-        'Industrial Production': 'INDPRO',
-        'Consumer Sentiment': 'UMCSENT',
-        'Retail Sales': 'RSXFS',
-        'Housing Starts': 'HOUST',
-        'PCE': 'PCE',
-        'M2': 'M2'
-    }
+    if series_ids is None:
+        series_ids = DEFAULT_SERIES.values()
+    results = run_sync(refresh_all(series_ids))
     
-    for name, series_id in INDICATORS.items():
-        try:
-            update_indicator(series_id=series_id)
-        except Exception as e:
-            logger.error(f"Error updating {name}: {e}")
+    for result in results:
+        if result['status'] == 'failed':
+            logger.error(f"Error updating {result['series_id']}: {result['error']}")
     
-    logger.info(f"Updated {len(INDICATORS)} indicators")
-    return True
+    logger.info(f"Updated {len(results)} indicators")
+    recompute_if_changed(results)
+    return results
+
+@shared_task
+def refresh_due_indicators():
+    """
+    Refresh the series whose next scheduled check is due.
+    """
+    results = run_sync(refresh_due_series())
+    
+    for result in results:
+        if result['status'] == 'failed':
+            logger.error(f"Error updating {result['series_id']}: {result['error']}")
+    
+    if results:
+        changed = sum(1 for result in results if result['status'] == 'success')
+        logger.info(f"Checked {len(results)} due series, {changed} with new data")
+    recompute_if_changed(results)
+    return results
+
+@shared_task
+def recompute_derived_series():
+    """
+    Recompute the derived series whose inputs changed since they were last
+    computed, only from the earliest changed date onward.
+    """
+    recomputed = refresh_derived()
+    if recomputed:
+        logger.info(f"Recomputed derived series: {', '.join(recomputed)}")
+    return recomputed
+
+def recompute_if_changed(results):
+    """
+    Queue derived series recomputation after a refresh stored new data.
+    Recomputation is deferred to its own task so refreshes finishing
+    together share one pass.
+    """
+    if any(result['status'] == 'success' and result['observations'] for result in results):
+        recompute_derived_series.delay()
+
+@shared_task
+def evaluate_series_alerts(series_id, since):
+    """
+    Check the alert rules of a stored series against its observations
+    dated from ``since`` (an ISO date) and push the hits to their owners.
+    """
+    arrays = load_series_arrays(series_id)
+    if arrays is None:
+        return 0
+    return len(evaluate_alerts(arrays, date.fromisoformat(since)))
+
+@shared_task
+def sync_series_calendar():
+    """
+    Refresh the release calendar the refresh scheduler works from.
+    """
+    return run_sync(sync_release_calendar())
+
+@shared_task
+def sync_series_catalog(full=False):
+    """
+    Bring the local FRED series catalog used by series search up to date.
+    """
+    written = run_sync(sync_catalog(full=full))
+    logger.info(f"Synced {written} catalog entries")
+    return written
 
 @shared_task(bind=True, name='indicators.run_task')
 def run_task(self, task_id):
@@ -1,2 +1,1296 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from importlib import import_module
+from pathlib import Path
+from unittest import mock
+import aiohttp
+import numpy as np
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from asgiref.sync import async_to_sync
+from celery.exceptions import Retry
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from websocket.consumers import EconomicDataConsumer
+from .alerts import alert_group, evaluate_alerts
+from .alignment import align, fill, frame_series, parse_series_specs, period_dates, period_keys, resample
+from .analytics import (
+    apply_transforms,
+    parse_transforms,
+    percentile,
+    rolling_mean,
+    rolling_std,
+    transform_series,
+    zscore,
+)
+from .catalog import FRED_TIMEZONE, search_catalog, store_catalog_entries
+from .circuit import CircuitBreaker, CircuitOpenError
+from .columnar import SeriesArrays, load_series_arrays, write_series_blob
+from .correlation import MIN_OVERLAP, correlate_series, lagged_correlations
+from .derived import Expression, recompute, save_dependencies
+from .downsample import downsample_series, lttb, minmax
+from .fred_api import FREDAPI, FREDAPIError, close_pool, close_session, get_session, iter_observation_batches, run_sync
+from .fred_stub import FREDStub, SYNTHETIC_LAST_UPDATED
+from .ingest import get_refresh_state, next_observation_start, store_observations, store_series_rows, upsert_indicators
+from .models import (
+    AlertEvent,
+    AlertRule,
+    DerivedSeries,
+    Indicator,
+    Observation,
+    SeriesBlob,
+    SeriesRollup,
+    SeriesSchedule,
+)
+from .ratelimit import BACKGROUND, INTERACTIVE, RateLimitExceeded, get_limiter, reset_limiter
+from .refresh import refresh_all
+from .rollups import compute_rollups, update_rollups
+from .scheduler import observation_period, plan_next_check
+from .singleflight import SingleFlight
+from .tasks import update_all_indicators, update_indicator
+from .views import DerivedSeriesViewSet, IndicatorViewSet
 
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'fred': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'fred'},
+}
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+def month(index):
+    """First day of the ``index``-th month counted from January 2020"""
+    return date(2020 + index // 12, index % 12 + 1, 1)
+
+
+class ChunkedStream:
+    """Stands in for an aiohttp response body that arrives in fixed chunks"""
+    def __init__(self, payload, size):
+        self.chunks = [payload[i:i + size] for i in range(0, len(payload), size)]
+
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class RecordingStub(FREDStub):
+    """FREDStub that records requests and how many were in flight at once"""
+    def __init__(self, fail=(), **options):
+        super().__init__(**options)
+        self.fail = set(fail)
+        self.requests = []
+        self.connections = set()
+        self.in_flight = self.max_in_flight = 0
+
+    def requested(self, path):
+        return [query for request_path, query in self.requests if request_path == f'/fred/{path}']
+
+    @web.middleware
+    async def simulate_conditions(self, request, handler):
+        self.requests.append((request.path, dict(request.query)))
+        self.connections.add(id(request.transport))
+        if request.query.get('series_id') in self.fail:
+            return web.json_response({'error_code': 500, 'error_message': 'Failing on purpose'}, status=500)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await super().simulate_conditions(request, handler)
+        finally:
+            self.in_flight -= 1
+
+
+@asynccontextmanager
+async def fred_stub(**options):
+    """Serve a RecordingStub locally and point FREDAPI at it"""
+    stub = RecordingStub(**options)
+    server = TestServer(stub.make_app(), host='127.0.0.1')
+    await server.start_server()
+    settings = override_settings(
+        CACHES=LOCAL_CACHES,
+        FRED_API_KEY='a' * 32,
+        FRED_API_BASE_URL=str(server.make_url('/fred')),
+        FRED_RATE_LIMIT_BACKEND='local',
+        FRED_RATE_LIMIT_PER_MINUTE=60000,
+        FRED_RATE_LIMIT_BURST=1000,
+        FRED_RETRY_ATTEMPTS=0,
+    )
+    settings.enable()
+    caches['fred'].clear()
+    reset_limiter()
+    try:
+        yield stub
+    finally:
+        await close_session()
+        await server.close()
+        settings.disable()
+        reset_limiter()
+
+
+class RefreshTestCase(TransactionTestCase):
+    """
+    Base for tests running refresh_series, which reads and writes through
+    channels' database_sync_to_async; that closes the connection a TestCase
+    transaction lives on.
+    """
+    def setUp(self):
+        queue = mock.patch('indicators.tasks.evaluate_series_alerts.delay')
+        queue.start()
+        self.addCleanup(queue.stop)
+
+
+class IncrementalRefreshTests(RefreshTestCase):
+    def test_next_observation_start(self):
+        self.assertIsNone(next_observation_start('TESTSERIES'))
+        store_series_rows('TESTSERIES', [(month(i), float(i)) for i in range(3)])
+        self.assertEqual(next_observation_start('TESTSERIES'), month(2) + timedelta(days=1))
+        self.assertEqual(get_refresh_state('TESTSERIES'), (month(2) + timedelta(days=1), ''))
+
+    async def test_refresh_fetches_only_new_observations(self):
+        async with fred_stub(observations=30) as stub:
+            first, = await refresh_all(['TESTSERIES'])
+            self.assertEqual((first['status'], first['observations']), ('success', 30))
+            self.assertNotIn('observation_start', stub.requested('series/observations')[0])
+
+            # A newer stamp forces a download, which starts after the stored history
+            await Indicator.objects.filter(series_id='TESTSERIES').aupdate(source_last_updated='older')
+            second, = await refresh_all(['TESTSERIES'])
+        self.assertEqual((second['status'], second['observations']), ('no_data', 0))
+        self.assertEqual(stub.requested('series/observations')[1]['observation_start'], '2024-01-02')
+
+
+class RefreshAllTests(RefreshTestCase):
+    async def test_concurrency_and_results(self):
+        series_ids = [f'TEST{i}' for i in range(6)]
+        async with fred_stub(latency=0.02, observations=5, fail={'TEST3'}) as stub:
+            results = await refresh_all(series_ids, concurrency=2)
+
+        self.assertEqual(stub.max_in_flight, 2)
+        self.assertEqual([result['series_id'] for result in results], series_ids)
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['success', 'success', 'success', 'failed', 'success', 'success']
+        )
+        self.assertIn('Failing on purpose', results[3]['error'])
+        # Metadata and observations requests, each delayed by the stub
+        for result in results[:3] + results[4:]:
+            self.assertGreaterEqual(result['elapsed'], 0.04)
+            self.assertEqual(result['observations'], 5)
+
+
+class SessionPoolTests(SimpleTestCase):
+    async def test_clients_share_one_session_and_connection(self):
+        async with fred_stub() as stub:
+            async with FREDAPI() as first:
+                await first.get_series_info('TEST1')
+            async with FREDAPI() as second:
+                await second.get_series_info('TEST2')
+            # Leaving a client drops its reference but keeps the pool open
+            self.assertIsNone(first.session)
+            self.assertIsNone(second.session)
+            session = get_session()
+            self.assertFalse(session.closed)
+            self.assertEqual(len(stub.requested('series')), 2)
+            self.assertEqual(len(stub.connections), 1)
+
+            await close_session()
+            self.assertTrue(session.closed)
+            self.assertIsNot(get_session(), session)
+
+    def test_run_sync_keeps_session_between_calls(self):
+        async def current_session():
+            return get_session()
+
+        self.addCleanup(close_pool)
+        session = run_sync(current_session())
+        self.assertIs(run_sync(current_session()), session)
+        close_pool()
+        self.assertTrue(session.closed)
+        self.assertIsNot(run_sync(current_session()), session)
+
+
+class SeriesMetadataTests(SimpleTestCase):
+    async def test_metadata_miss_fetched_alongside_observations(self):
+        async with fred_stub(latency=0.05, observations=10) as stub:
+            data = await FREDAPI().get_series('TEST', '2023-12-01', '2024-01-01')
+            self.assertEqual(stub.max_in_flight, 2)
+            self.assertEqual(data['title'], 'Synthetic series TEST')
+            self.assertEqual(len(data['observations']), 10)
+            self.assertIsNotNone(await caches['fred'].aget('series_info:TEST'))
+
+            # Cached metadata is not requested again
+            await FREDAPI().get_series('TEST', '2023-12-30', '2024-01-01')
+        self.assertEqual(len(stub.requested('series')), 1)
+        self.assertEqual(len(stub.requested('series/observations')), 2)
+
+
+class UnchangedSeriesTests(RefreshTestCase):
+    async def test_unchanged_series_skips_download(self):
+        async with fred_stub(observations=5) as stub:
+            first, = await refresh_all(['TESTSERIES'])
+            second, = await refresh_all(['TESTSERIES'])
+        self.assertEqual(first['status'], 'success')
+        self.assertEqual((second['status'], second['observations']), ('unchanged', 0))
+        # Metadata is always checked fresh; observations only when it changed
+        self.assertEqual(len(stub.requested('series')), 2)
+        self.assertEqual(len(stub.requested('series/observations')), 1)
+        indicator = await Indicator.objects.aget(series_id='TESTSERIES')
+        self.assertEqual(indicator.source_last_updated, SYNTHETIC_LAST_UPDATED)
+
+
+@override_settings(
+    FRED_RATE_LIMIT_BACKEND='local',
+    FRED_RATE_LIMIT_PER_MINUTE=60,
+    FRED_RATE_LIMIT_BURST=8,
+    FRED_RATE_LIMIT_INTERACTIVE_SHARE=0.25,
+)
+class RateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        # Freeze the bucket's clock so no tokens refill mid-test
+        clock = mock.patch('indicators.ratelimit.time.monotonic', return_value=1000.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+        reset_limiter()
+        self.addCleanup(reset_limiter)
+        self.limiter = get_limiter()
+
+    def take(self, priority):
+        taken = 0
+        while not self.limiter.try_acquire(priority):
+            taken += 1
+        return taken
+
+    def test_background_leaves_interactive_reserve(self):
+        self.assertEqual(self.take(BACKGROUND), 6)
+        # Background waits for a token above the reserve of 2
+        self.assertEqual(self.limiter.try_acquire(BACKGROUND), 1.0)
+        self.assertEqual(self.take(INTERACTIVE), 2)
+        self.assertEqual(self.limiter.try_acquire(INTERACTIVE), 1.0)
+        self.assertEqual(self.limiter.try_acquire(BACKGROUND), 3.0)
+
+    def test_interactive_can_use_every_token(self):
+        self.assertEqual(self.take(INTERACTIVE), 8)
+        self.assertEqual(self.take(BACKGROUND), 0)
+
+    def test_available_takes_nothing(self):
+        self.assertEqual(self.limiter.available(), 8)
+        self.take(BACKGROUND)
+        self.assertEqual(self.limiter.available(), 2)
+        self.assertEqual(self.limiter.available(), 2)
+
+    def test_acquire_without_waiting(self):
+        self.take(INTERACTIVE)
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.acquire(INTERACTIVE, max_wait=0)
+
+
+class ObservationParserTests(SimpleTestCase):
+    observations = [
+        {'realtime_start': '2024-01-01', 'date': '2023-01-01', 'value': '1.5'},
+        {'realtime_start': '2024-01-01', 'date': '2023-02-01', 'value': '.'},
+        {'realtime_start': '2024-01-01', 'date': '2023-03-01', 'value': '-2.25', 'note': 'Zürich €'},
+    ]
+    payload = json.dumps({
+        'units': 'Index 2015=100 – €',
+        'count': 3,
+        'observations': observations,
+        'limit': 100000,
+    }, ensure_ascii=False).encode('utf-8')
+
+    async def parse(self, payload, size):
+        batches = [batch async for batch in iter_observation_batches(ChunkedStream(payload, size))]
+        return [observation for batch in batches for observation in batch]
+
+    async def test_every_chunk_size(self):
+        # Sizes 1-7 split the key, objects and multi-byte characters at every offset
+        for size in [*range(1, 8), 64, len(self.payload)]:
+            with self.subTest(size=size):
+                self.assertEqual(await self.parse(self.payload, size), self.observations)
+
+    async def test_every_split_point(self):
+        for split in range(1, len(self.payload)):
+            stream = ChunkedStream(b'', 1)
+            stream.chunks = [self.payload[:split], self.payload[split:]]
+            with self.subTest(split=split):
+                batches = [batch async for batch in iter_observation_batches(stream)]
+                self.assertEqual(sum(batches, []), self.observations)
+
+    async def test_truncated_payload(self):
+        with self.assertRaisesMessage(ValueError, 'Truncated'):
+            await self.parse(self.payload[:self.payload.index(b'-2.25')], 16)
+
+    async def test_no_observations_key(self):
+        self.assertEqual(await self.parse(b'{"error_code": 400}', 4), [])
+
+
+class StubReplayTests(SimpleTestCase):
+    def setUp(self):
+        fixtures = tempfile.TemporaryDirectory()
+        self.addCleanup(fixtures.cleanup)
+        self.fixtures = Path(fixtures.name)
+
+    def record(self, endpoint, key, payload):
+        path = self.fixtures / endpoint.replace('/', '_') / f'{key}.json'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload))
+
+    async def test_replays_recorded_observations(self):
+        self.record('series/observations', 'TEST', {'observations': [
+            {'date': f'2024-01-0{day}', 'value': str(day)} for day in range(1, 6)
+        ]})
+        async with fred_stub(fixtures_dir=self.fixtures):
+            observations = await FREDAPI().get_observations(
+                'TEST', observation_start='2024-01-02', observation_end='2024-01-04', sort_order='desc'
+            )
+        self.assertEqual([obs['date'] for obs in observations], ['2024-01-04', '2024-01-03', '2024-01-02'])
+
+    async def test_synthetic_data_is_deterministic(self):
+        async with fred_stub(observations=20):
+            first = await FREDAPI().get_observations('TEST')
+        async with fred_stub(observations=20):
+            second = await FREDAPI().get_observations('TEST')
+        self.assertEqual(len(first), 20)
+        self.assertEqual(first, second)
+
+    async def test_records_missing_payloads_from_upstream(self):
+        async with fred_stub(observations=3) as upstream:
+            upstream_url = settings.FRED_API_BASE_URL
+            async with fred_stub(fixtures_dir=self.fixtures, upstream=upstream_url, api_key='b' * 32):
+                recorded = await FREDAPI().get_observations('TEST')
+            self.assertEqual(len(upstream.requested('series/observations')), 1)
+
+        path = self.fixtures / 'series_observations' / 'TEST.json'
+        self.assertEqual(len(json.loads(path.read_text())['observations']), 3)
+        # Replayed from the recording once upstream is gone
+        async with fred_stub(fixtures_dir=self.fixtures, observations=10):
+            self.assertEqual(await FREDAPI().get_observations('TEST'), recorded)
+
+
+class SingleFlightTests(SimpleTestCase):
+    async def test_concurrent_calls_share_one_request(self):
+        async with fred_stub(latency=0.02, observations=10) as stub:
+            results = await asyncio.gather(*(
+                FREDAPI().get_series('TEST', '2023-12-01', '2024-01-01') for _ in range(5)
+            ))
+            # Once finished, the same call goes upstream again
+            await FREDAPI().get_series('TEST', '2023-12-01', '2024-01-01')
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(len(stub.requested('series')), 1)
+        self.assertEqual(len(stub.requested('series/observations')), 2)
+
+    async def test_exception_shared_and_key_released(self):
+        calls = []
+
+        async def fail():
+            calls.append(1)
+            await asyncio.sleep(0)
+            raise ValueError('down')
+
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do('key', fail) for _ in range(3)), return_exceptions=True)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(flight.calls, {})
+
+
+class GetManyTests(SimpleTestCase):
+    async def test_failures_reported_per_series(self):
+        async with fred_stub(observations=10, fail={'BAD'}) as stub:
+            results = {
+                series_id: (data, error)
+                async for series_id, data, error in FREDAPI().get_many(['A', 'BAD', 'B', 'A'], '2023-12-01')
+            }
+        self.assertEqual(sorted(results), ['A', 'B', 'BAD'])
+        self.assertEqual(len(results['A'][0]['observations']), 10)
+        self.assertIsNone(results['B'][1])
+        self.assertIsNone(results['BAD'][0])
+        self.assertIsInstance(results['BAD'][1], FREDAPIError)
+        # The repeated ID is fetched once
+        self.assertEqual(len(stub.requested('series/observations')), 3)
+
+
+class IngestionTaskTests(RefreshTestCase):
+    def setUp(self):
+        super().setUp()
+        recompute = mock.patch('indicators.tasks.recompute_derived_series.delay')
+        self.recompute = recompute.start()
+        self.addCleanup(recompute.stop)
+        self.addCleanup(close_pool)
+        # Served from run_sync's own loop, which runs while a task waits on it
+        stub = fred_stub(observations=5, fail={'BAD'})
+        self.stub = run_sync(stub.__aenter__())
+        self.addCleanup(lambda: run_sync(stub.__aexit__(None, None, None)))
+
+    def test_update_indicator(self):
+        result = update_indicator('TEST')
+        self.assertEqual((result['status'], result['observations']), ('success', 5))
+        self.assertEqual(Observation.objects.filter(series_id='TEST').count(), 5)
+        self.recompute.assert_called_once_with()
+
+    def test_tasks_share_the_pooled_session(self):
+        async def current_session():
+            return get_session()
+
+        session = run_sync(current_session())
+        update_indicator('TEST1')
+        update_indicator('TEST2')
+        self.assertIs(run_sync(current_session()), session)
+        # Successive tasks reuse the kept-alive connection
+        self.assertEqual(len(self.stub.connections), 1)
+
+    def test_update_all_indicators(self):
+        results = update_all_indicators(['TEST1', 'BAD', 'TEST2'])
+        self.assertEqual([result['status'] for result in results], ['success', 'failed', 'success'])
+        self.assertEqual(Observation.objects.filter(series_id__in=['TEST1', 'TEST2']).count(), 10)
+
+    @override_settings(FRED_CIRCUIT_FAILURE_THRESHOLD=1, FRED_CIRCUIT_OPEN_SECONDS=600)
+    def test_failure_retried_after_circuit_closes(self):
+        with mock.patch('indicators.tasks.update_indicator.retry', side_effect=Retry()) as retry:
+            with self.assertRaises(Retry):
+                update_indicator('BAD')
+        self.assertIn('Failing on purpose', str(retry.call_args.kwargs['exc']))
+        self.assertGreater(retry.call_args.kwargs['countdown'], 590)
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES,
+    FRED_CIRCUIT_FAILURE_THRESHOLD=3,
+    FRED_CIRCUIT_FAILURE_WINDOW=60,
+    FRED_CIRCUIT_OPEN_SECONDS=30,
+)
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        caches['fred'].clear()
+        self.breaker = CircuitBreaker('test')
+
+    async def fail(self, times):
+        for _ in range(times):
+            await self.breaker.record_failure()
+
+    async def test_closed_below_threshold(self):
+        await self.fail(2)
+        await self.breaker.check()
+        self.assertEqual(await self.breaker.retry_after(), 0)
+
+    async def test_success_resets_failures(self):
+        await self.fail(2)
+        await self.breaker.record_success()
+        await self.fail(2)
+        await self.breaker.check()
+
+    async def test_opens_at_threshold(self):
+        await self.fail(3)
+        with self.assertRaises(CircuitOpenError) as raised:
+            await self.breaker.check()
+        self.assertAlmostEqual(raised.exception.retry_after, 30, delta=1)
+
+    def later(self, seconds=31):
+        return mock.patch('indicators.circuit.time.time', return_value=time.time() + seconds)
+
+    async def test_half_open_admits_one_trial(self):
+        await self.fail(3)
+        with self.later():
+            self.assertTrue(await self.breaker.check())
+            # Other callers, in this process or another, keep failing fast
+            with self.assertRaises(CircuitOpenError):
+                await self.breaker.check()
+            with self.assertRaises(CircuitOpenError):
+                await CircuitBreaker('test').check()
+
+    async def test_half_open_failure_reopens(self):
+        await self.fail(3)
+        with self.later():
+            trial = await self.breaker.check()
+            await self.breaker.record_failure(trial)
+            with self.assertRaises(CircuitOpenError) as raised:
+                await self.breaker.check()
+        self.assertAlmostEqual(raised.exception.retry_after, 30, delta=1)
+
+    async def test_half_open_success_closes(self):
+        await self.fail(3)
+        with self.later():
+            trial = await self.breaker.check()
+            await self.breaker.record_success(trial)
+            self.assertFalse(await self.breaker.check())
+            await self.fail(2)
+            self.assertFalse(await self.breaker.check())
+
+    async def test_closes_when_window_passes_without_trial(self):
+        await self.fail(3)
+        with self.later(91):
+            self.assertFalse(await self.breaker.check())
+
+    async def test_state_kept_locally_without_cache(self):
+        down = ConnectionError('down')
+        cache = mock.Mock(**{f"{name}.side_effect": down for name in ('get', 'set', 'add', 'incr', 'delete')})
+        with mock.patch('indicators.cache.caches', {'fred': cache}):
+            await self.fail(3)
+            with self.assertRaises(CircuitOpenError):
+                await self.breaker.check()
+            with self.later():
+                self.assertTrue(await self.breaker.check())
+                with self.assertRaises(CircuitOpenError):
+                    await self.breaker.check()
+
+    @override_settings(FRED_API_KEY='a' * 32, FRED_RETRY_ATTEMPTS=2, FRED_RETRY_BASE_DELAY=0)
+    async def test_call_counts_one_failure_after_retries(self):
+        send = mock.AsyncMock(side_effect=aiohttp.ClientConnectionError('refused'))
+        with mock.patch('indicators.fred_api.get_breaker', return_value=self.breaker):
+            with self.assertRaises(aiohttp.ClientConnectionError):
+                await FREDAPI().call(send)
+        self.assertEqual(send.await_count, 3)
+        self.assertEqual(await caches['fred'].aget(self.breaker.failures_key), 1)
+
+    @override_settings(FRED_API_KEY='a' * 32, FRED_RETRY_ATTEMPTS=2, FRED_RETRY_BASE_DELAY=0)
+    async def test_trial_call_keeps_its_claim_across_retries(self):
+        await self.fail(3)
+        send = mock.AsyncMock(side_effect=[aiohttp.ClientConnectionError('refused'), {'ok': True}])
+        with self.later(), mock.patch('indicators.fred_api.get_breaker', return_value=self.breaker):
+            self.assertEqual(await FREDAPI().call(send), {'ok': True})
+            self.assertFalse(await self.breaker.check())
+        self.assertEqual(send.await_count, 2)
+
+
+@override_settings(CACHES=LOCAL_CACHES, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, FRED_API_KEY='a' * 32)
+class BatchConsumerTests(SimpleTestCase):
+    async def test_open_circuit_serves_stored_series(self):
+        async def get_series(series_id, *args):
+            if series_id == 'LIVE':
+                return {'series_id': 'LIVE', 'observations': []}
+            raise CircuitOpenError(30)
+
+        def stored_series(series_id):
+            return {'series_id': series_id, 'observations': [], 'stale': True} if series_id == 'STORED' else None
+
+        communicator = WebsocketCommunicator(EconomicDataConsumer.as_asgi(), '/ws/economic-data/')
+        communicator.scope['user'] = get_user_model()(username='batch')
+        with mock.patch.object(FREDAPI, 'get_series', side_effect=get_series), \
+                mock.patch('websocket.consumers.stored_series', side_effect=stored_series):
+            await communicator.connect()
+            await communicator.receive_json_from()
+            await communicator.send_json_to({'type': 'get_many_series', 'series_ids': ['LIVE', 'STORED', 'MISSING']})
+            messages = [await communicator.receive_json_from() for _ in range(4)]
+            await communicator.disconnect()
+
+        self.assertEqual(messages[-1]['type'], 'batch_complete')
+        self.assertEqual(sorted(messages[-1]['succeeded']), ['LIVE', 'STORED'])
+        self.assertEqual(messages[-1]['failed'], ['MISSING'])
+        stored = next(message for message in messages if message.get('series_id') == 'STORED')
+        self.assertTrue(stored['data']['stale'])
+
+
+class CatalogSearchTests(TestCase):
+    def setUp(self):
+        store_catalog_entries([
+            {'id': 'UNRATE', 'title': 'Unemployment Rate', 'popularity': 95},
+            {'id': 'UNRATENSA', 'title': 'Unemployment Rate (Not Seasonally Adjusted)', 'popularity': 60},
+            {'id': 'CAUR', 'title': 'Unemployment Rate in California', 'popularity': 70},
+            {'id': 'UNEMPLOY', 'title': 'Unemployment Level', 'popularity': 80},
+            {'id': 'GDP', 'title': 'Gross Domestic Product', 'popularity': 90},
+        ])
+
+    def ids(self, term, limit=10):
+        return [entry['id'] for entry in search_catalog(term, limit)['series']]
+
+    def test_exact_id_then_id_prefix_then_titles(self):
+        self.assertEqual(self.ids('unrate'), ['UNRATE', 'UNRATENSA'])
+        self.assertEqual(self.ids('unr'), ['UNRATE', 'UNRATENSA'])
+        # 'un' also prefixes 'Unemployment', but ID matches rank above title matches
+        ids = self.ids('un')
+        self.assertEqual(sorted(ids[:3]), ['UNEMPLOY', 'UNRATE', 'UNRATENSA'])
+        self.assertEqual(ids[3:], ['CAUR'])
+        self.assertEqual(self.ids('gdp'), ['GDP'])
+
+    def test_partial_last_word_matches_titles(self):
+        # Equal relevance falls back to popularity
+        self.assertEqual(self.ids('unemployment rat'), ['UNRATE', 'CAUR', 'UNRATENSA'])
+        self.assertEqual(self.ids('unemployment rat', limit=1), ['UNRATE'])
+        self.assertEqual(self.ids('employment'), [])
+        self.assertEqual(search_catalog('  '), {'count': 0, 'series': []})
+
+
+@override_settings(
+    FRED_RELEASE_TIME='07:30',
+    FRED_RELEASE_WINDOW=12 * 60 * 60,
+    FRED_SCHEDULE_MIN_INTERVAL=300,
+    FRED_SCHEDULE_POLL_INTERVAL=1800,
+    FRED_SCHEDULE_MAX_INTERVAL=24 * 60 * 60,
+)
+class SchedulerTests(TestCase):
+    now = datetime(2024, 3, 1, 12, 0, tzinfo=FRED_TIMEZONE)
+
+    def next_check(self, **fields):
+        return plan_next_check(SeriesSchedule(series_id='TEST', **fields), self.now) - self.now
+
+    def test_waits_for_the_next_release(self):
+        self.assertEqual(self.next_check(), timedelta(days=1))
+        self.assertEqual(self.next_check(next_release_date=date(2024, 3, 2)), timedelta(hours=19, minutes=30))
+        self.assertEqual(self.next_check(next_release_date=date(2024, 3, 9)), timedelta(days=1))
+
+    def test_polls_an_overdue_release(self):
+        # Released at 07:30 today and not seen yet: poll at most every 30 minutes
+        self.assertEqual(self.next_check(next_release_date=date(2024, 3, 1)), timedelta(minutes=30))
+        with override_settings(FRED_RELEASE_TIME='11:58'):
+            self.assertEqual(self.next_check(next_release_date=date(2024, 3, 1)), timedelta(minutes=5))
+        # Past the release window, back off to the daily check
+        self.assertEqual(self.next_check(next_release_date=date(2024, 2, 28)), timedelta(days=1))
+
+    def test_cadence_used_once_the_release_is_seen(self):
+        changed = self.now - timedelta(days=29)
+        self.assertEqual(
+            self.next_check(next_release_date=date(2024, 3, 1), last_changed_at=self.now, period=timedelta(days=1)),
+            timedelta(days=1)
+        )
+        self.assertEqual(self.next_check(last_changed_at=changed, period=timedelta(days=29, hours=2)), timedelta(hours=2))
+
+    def test_observation_period(self):
+        self.assertIsNone(observation_period('TEST'))
+        store_series_rows('TEST', [(month(i), float(i)) for i in range(24)])
+        self.assertEqual(observation_period('TEST'), timedelta(days=31))
+
+
+class SeriesBlobTests(TestCase):
+    def test_pack_round_trip(self):
+        rows = [(month(2), 3.0), (month(0), 1.0), (month(1), 2.5)]
+        write_series_blob('TESTCOL', rows)
+
+        blob = SeriesBlob.objects.get(series_id='TESTCOL')
+        self.assertEqual((blob.count, blob.version, len(bytes(blob.days))), (3, 1, 12))
+        arrays = load_series_arrays('TESTCOL')
+        self.assertEqual(arrays.dates.tolist(), [month(0), month(1), month(2)])
+        self.assertEqual(arrays.values.tolist(), [1.0, 2.5, 3.0])
+
+    def test_loaded_arrays_are_read_only_views(self):
+        write_series_blob('TESTCOL', [(month(0), 1.0)])
+        arrays = load_series_arrays('TESTCOL')
+        self.assertFalse(arrays.days.flags.writeable)
+        self.assertFalse(arrays.values.flags.owndata)
+        with self.assertRaises(ValueError):
+            arrays.values[0] = 2.0
+
+    def test_merge_prefers_revisions(self):
+        write_series_blob('TESTCOL', [(month(i), float(i)) for i in range(3)])
+        arrays = write_series_blob('TESTCOL', [(month(1), 10.0), (month(3), 3.0)])
+        self.assertEqual(arrays.version, 2)
+        self.assertEqual(load_series_arrays('TESTCOL').values.tolist(), [0.0, 10.0, 2.0, 3.0])
+
+    def test_between_is_inclusive(self):
+        arrays = SeriesArrays.from_rows('TESTCOL', [(month(i), float(i)) for i in range(6)])
+        window = arrays.between(month(1), month(3))
+        self.assertEqual(window.values.tolist(), [1.0, 2.0, 3.0])
+        self.assertTrue(np.shares_memory(window.values, arrays.values))
+
+    def test_first_write_packs_stored_history(self):
+        Observation.objects.bulk_create([Observation(series_id='TESTCOL', date=month(i), value=i) for i in range(3)])
+        arrays = write_series_blob('TESTCOL', [(month(3), 3.0)])
+        self.assertEqual(arrays.values.tolist(), [0.0, 1.0, 2.0, 3.0])
+
+    def test_reads_do_not_pack(self):
+        Observation.objects.create(series_id='TESTCOL', date=month(0), value=1.0)
+        self.assertIsNone(load_series_arrays('TESTCOL'))
+        self.assertFalse(SeriesBlob.objects.exists())
+
+    def test_migration_packs_unblobbed_series(self):
+        Observation.objects.bulk_create([Observation(series_id='TESTCOL', date=month(i), value=i) for i in range(3)])
+        write_series_blob('TESTDONE', [(month(0), 5.0)])
+        migration = import_module('indicators.migrations.0012_pack_series_blobs')
+        migration.pack_series_blobs(apps, None)
+
+        self.assertEqual(load_series_arrays('TESTCOL').values.tolist(), [0.0, 1.0, 2.0])
+        self.assertEqual(SeriesBlob.objects.get(series_id='TESTDONE').version, 1)
+
+
+class PartitionedObservationTests(TestCase):
+    def partition_of(self, day):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tableoid::regclass::text FROM indicators_observation WHERE series_id = %s AND date = %s",
+                ['TESTPART', day],
+            )
+            return cursor.fetchone()[0]
+
+    def test_table_is_range_partitioned(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT partstrat FROM pg_partitioned_table WHERE partrelid = 'indicators_observation'::regclass"
+            )
+            self.assertEqual(cursor.fetchone(), ('r',))
+
+    def test_rows_land_in_decade_partitions(self):
+        store_observations('TESTPART', [(date(1947, 1, 1), 1.0), (date(1985, 6, 1), 2.0), (date(2061, 1, 1), 3.0)])
+        self.assertEqual(self.partition_of(date(1947, 1, 1)), 'indicators_observation_before_1950')
+        self.assertEqual(self.partition_of(date(1985, 6, 1)), 'indicators_observation_1980s')
+        self.assertEqual(self.partition_of(date(2061, 1, 1)), 'indicators_observation_default')
+
+    def test_upsert_overwrites_across_partitions(self):
+        store_observations('TESTPART', [(date(1985, 6, 1), 2.0), (date(2015, 6, 1), 3.0)])
+        store_observations('TESTPART', [(date(1985, 6, 1), 4.0), (date(2015, 6, 1), 5.0)])
+        values = dict(Observation.objects.filter(series_id='TESTPART').values_list('date', 'value'))
+        self.assertEqual(values, {date(1985, 6, 1): 4.0, date(2015, 6, 1): 5.0})
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        # Two years of monthly values rising by one a month
+        self.arrays = SeriesArrays.from_rows('TESTROLL', [(month(i), 100.0 + i) for i in range(24)])
+
+    def test_month_over_month(self):
+        rollups = compute_rollups(self.arrays, 'M')
+        self.assertEqual(len(rollups['period']), 24)
+        self.assertTrue(np.isnan(rollups['change'][0]))
+        self.assertEqual(rollups['change'][13], 1.0)
+        self.assertAlmostEqual(rollups['pct_change'][13], 100 / 112)
+        self.assertEqual(rollups['yoy_change'][13], 12.0)
+        self.assertAlmostEqual(rollups['yoy_pct_change'][13], 1200 / 101)
+        self.assertTrue(np.isnan(rollups['yoy_change'][11]))
+
+    def test_quarter_over_quarter(self):
+        rollups = compute_rollups(self.arrays, 'Q')
+        self.assertEqual(len(rollups['period']), 8)
+        self.assertEqual((rollups['mean'][0], rollups['last'][0], rollups['count'][0]), (101.0, 102.0, 3))
+        self.assertEqual(rollups['change'][1], 3.0)
+        self.assertAlmostEqual(rollups['pct_change'][1], 300 / 102)
+        self.assertEqual(rollups['yoy_change'][4], 12.0)
+        self.assertTrue(np.isnan(rollups['yoy_change'][3]))
+
+    def test_year_over_year(self):
+        rollups = compute_rollups(self.arrays, 'A')
+        self.assertEqual(rollups['mean'].tolist(), [105.5, 117.5])
+        self.assertEqual(rollups['last'].tolist(), [111.0, 123.0])
+        self.assertEqual(rollups['yoy_change'][1], 12.0)
+
+    def test_zero_base_has_no_percentage(self):
+        arrays = SeriesArrays.from_rows('TESTROLL', [(month(0), 0.0), (month(1), 5.0)])
+        rollups = compute_rollups(arrays, 'M')
+        self.assertEqual(rollups['change'][1], 5.0)
+        self.assertTrue(np.isnan(rollups['pct_change'][1]))
+
+    def test_gap_months_have_no_change(self):
+        arrays = SeriesArrays.from_rows('TESTROLL', [(month(0), 1.0), (month(2), 3.0)])
+        self.assertTrue(np.isnan(compute_rollups(arrays, 'M')['change'][1]))
+        self.assertEqual(compute_rollups(arrays, 'Q')['count'].tolist(), [2])
+
+    def test_update_since_rewrites_later_periods_only(self):
+        self.assertEqual(update_rollups(self.arrays), 24 + 8 + 2)
+        # Months 20-23, the last two quarters and 2021
+        self.assertEqual(update_rollups(self.arrays, since=month(20)), 4 + 2 + 1)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class StoredRollupTests(TestCase):
+    def test_revision_updates_stored_rollups(self):
+        store_series_rows('TESTROLL', [(month(i), 100.0 + i) for i in range(24)])
+        store_series_rows('TESTROLL', [(month(13), 200.0)])
+
+        rollup = SeriesRollup.objects.get(series_id='TESTROLL', frequency='M', period_start=date(2021, 2, 1))
+        self.assertEqual((rollup.last, rollup.change, rollup.yoy_change), (200.0, 88.0, 99.0))
+        following = SeriesRollup.objects.get(series_id='TESTROLL', frequency='M', period_start=date(2021, 3, 1))
+        self.assertEqual(following.change, -86.0)
+        quarter = SeriesRollup.objects.get(series_id='TESTROLL', frequency='Q', period_start=date(2021, 1, 1))
+        self.assertAlmostEqual(quarter.mean, (112.0 + 200.0 + 114.0) / 3)
+
+
+def sequential_lttb(x, y, points):
+    """Textbook LTTB, one bucket after another"""
+    edges = np.linspace(1, len(x) - 1, points - 1).astype(np.int64)
+    selected, a = [0], 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else len(x)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected.append(a)
+    return np.array(selected + [len(x) - 1])
+
+
+class LTTBTests(SimpleTestCase):
+    def test_matches_sequential_selection(self):
+        rng = np.random.default_rng(7)
+        x = np.arange(5000, dtype=np.float64)
+        for y in (rng.standard_normal(5000), np.cumsum(rng.standard_normal(5000))):
+            for points in (3, 4, 50, 999):
+                np.testing.assert_array_equal(lttb(x, y, points), sequential_lttb(x, y, points))
+
+    def test_keeps_endpoints_and_spike(self):
+        y = np.zeros(1000)
+        y[500] = 50.0
+        selected = lttb(np.arange(1000, dtype=np.float64), y, 20)
+        self.assertEqual(len(selected), 20)
+        self.assertEqual((selected[0], selected[-1]), (0, 999))
+        self.assertIn(500, selected)
+
+    def test_small_requests(self):
+        x = np.arange(10, dtype=np.float64)
+        self.assertEqual(lttb(x, x, 10).tolist(), list(range(10)))
+        self.assertEqual(lttb(x, x, 2).tolist(), [0, 9])
+        self.assertEqual(lttb(x, x, 1).tolist(), [0])
+
+
+class MinMaxTests(SimpleTestCase):
+    def test_keeps_each_buckets_extremes(self):
+        y = np.array([5.0, 1.0, 9.0, 3.0, 2.0, 8.0, 0.0, 4.0])
+        # Buckets [0:4] and [4:8]
+        self.assertEqual(minmax(y, 4).tolist(), [1, 2, 5, 6])
+
+    def test_extremes_at_bucket_edges(self):
+        y = np.array([9.0, 5.0, 5.0, 0.0, 7.0, 5.0, 5.0, 1.0])
+        self.assertEqual(minmax(y, 4).tolist(), [0, 3, 4, 7])
+
+    def test_first_of_equal_extremes(self):
+        self.assertEqual(minmax(np.full(10, 3.0), 4).tolist(), [0, 5])
+
+    def test_short_series_kept(self):
+        self.assertEqual(minmax(np.arange(3.0), 4).tolist(), [0, 1, 2])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class DownsampleSeriesTests(TestCase):
+    def test_window_and_cache_per_version(self):
+        write_series_blob('TESTDOWN', [(month(i), float(i)) for i in range(36)])
+        result = downsample_series('TESTDOWN', start=month(12), end=month(23), points=5)
+        self.assertEqual((result['total'], result['points'], result['version']), (12, 5, 1))
+        self.assertEqual((result['dates'][0], result['dates'][-1]), ('2021-01-01', '2021-12-01'))
+
+        write_series_blob('TESTDOWN', [(month(12), 100.0)])
+        result = downsample_series('TESTDOWN', start=month(12), end=month(23), points=5)
+        self.assertEqual((result['version'], result['values'][0]), (2, 100.0))
+        self.assertIsNone(downsample_series('TESTNONE'))
+
+
+class TransformTests(SimpleTestCase):
+    def assertValues(self, actual, expected):
+        np.testing.assert_allclose(actual, expected, equal_nan=True)
+
+    def test_rolling_windows(self):
+        values = np.arange(1.0, 7.0)
+        self.assertValues(rolling_mean(values, 3), [np.nan, np.nan, 2, 3, 4, 5])
+        self.assertValues(rolling_std(values, 3), [np.nan, np.nan, 1, 1, 1, 1])
+
+    def test_rolling_window_skips_nan(self):
+        values = np.array([1.0, np.nan, 3.0, 4.0, 5.0])
+        self.assertValues(rolling_mean(values, 2), [np.nan, np.nan, np.nan, 3.5, 4.5])
+
+    def test_zscore_and_percentile(self):
+        self.assertValues(zscore(np.array([1.0, 2.0, 3.0])), [-1, 0, 1])
+        self.assertValues(percentile(np.array([3.0, 1.0, 2.0])), [100, 100 / 3, 200 / 3])
+        self.assertValues(percentile(np.array([1.0, 3.0, 2.0]), 2), [np.nan, 100, 50])
+
+    def test_chain_runs_in_order(self):
+        arrays = SeriesArrays.from_rows('TESTAN', [(month(i), 100 * 1.1 ** i) for i in range(4)])
+        steps = parse_transforms('pct_change:1, rolling_mean:2')
+        self.assertEqual(steps, [('pct_change', 1), ('rolling_mean', 2)])
+        self.assertValues(apply_transforms(arrays, steps).values, [np.nan, np.nan, 10, 10])
+
+    def test_undefined_results_become_nan(self):
+        arrays = SeriesArrays.from_rows('TESTAN', [(month(0), 0.0), (month(1), -1.0), (month(2), 1.0)])
+        self.assertValues(apply_transforms(arrays, parse_transforms('log')).values, [np.nan, np.nan, 0])
+        self.assertValues(apply_transforms(arrays, parse_transforms('pct_change')).values, [np.nan, np.nan, -200])
+
+    def test_invalid_chains(self):
+        for spec in ('', 'median:3', 'log:2', 'rolling_mean', 'diff:0', 'zscore:1', ','.join(['diff'] * 11)):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_transforms(spec)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class TransformSeriesTests(TestCase):
+    def test_windows_are_warm_at_range_start(self):
+        write_series_blob('TESTAN', [(month(i), float(i)) for i in range(24)])
+        result = transform_series('TESTAN', parse_transforms('rolling_mean:3'), start=month(12), end=month(14))
+        self.assertEqual(result['dates'], ['2021-01-01', '2021-02-01', '2021-03-01'])
+        self.assertEqual(result['values'], [11.0, 12.0, 13.0])
+
+    def test_undefined_values_dropped(self):
+        write_series_blob('TESTAN', [(month(i), float(i)) for i in range(5)])
+        result = transform_series('TESTAN', parse_transforms('diff:2'))
+        self.assertEqual((result['points'], result['values']), (3, [2.0, 2.0, 2.0]))
+        self.assertIsNone(transform_series('TESTNONE', parse_transforms('log')))
+
+
+class LaggedCorrelationTests(SimpleTestCase):
+    def setUp(self):
+        self.leader = np.random.default_rng(3).standard_normal(60)
+
+    def test_peak_at_lead(self):
+        # The follower repeats the leader three periods later
+        follower = np.concatenate([np.zeros(3), self.leader[:-3]])
+        result = lagged_correlations(np.vstack([self.leader, follower]), 5)
+        self.assertEqual(result.shape, (11, 2, 2))
+        self.assertAlmostEqual(result[5 + 3, 0, 1], 1.0)
+        self.assertAlmostEqual(result[5 - 3, 1, 0], 1.0)
+        self.assertEqual(np.abs(result[:, 0, 1]).argmax(), 5 + 3)
+        np.testing.assert_allclose(result[5], result[5].T)
+
+    def test_matches_pearson_over_common_periods(self):
+        other = self.leader * 0.5 + np.random.default_rng(4).standard_normal(60)
+        other[[5, 17, 40]] = np.nan
+        result = lagged_correlations(np.vstack([self.leader, other]), 2)
+        both = ~np.isnan(other[1:])
+        expected = np.corrcoef(self.leader[:-1][both], other[1:][both])[0, 1]
+        self.assertAlmostEqual(result[2 + 1, 0, 1], expected)
+
+    def test_short_overlap_is_nan(self):
+        matrix = np.vstack([self.leader[:MIN_OVERLAP], self.leader[:MIN_OVERLAP]])
+        result = lagged_correlations(matrix, 1)
+        self.assertAlmostEqual(result[1, 0, 1], 1.0)
+        self.assertTrue(np.isnan(result[2, 0, 1]))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CorrelateSeriesTests(TestCase):
+    def test_lead_lag_between_stored_series(self):
+        values = np.random.default_rng(5).standard_normal(48)
+        write_series_blob('TESTLEAD', [(month(i), values[i]) for i in range(48)])
+        write_series_blob('TESTLAG', [(month(i + 2), values[i]) for i in range(46)])
+
+        result, missing = correlate_series(['TESTLEAD', 'TESTLAG'], max_lag=4)
+        self.assertEqual(missing, [])
+        self.assertEqual(result['lags'], [-4, -3, -2, -1, 0, 1, 2, 3, 4])
+        self.assertEqual(result['peak_lag'], [[0, 2], [-2, 0]])
+        self.assertEqual(result['peak_correlation'][0][1], 1.0)
+        self.assertEqual(result['periods'], 48)
+
+    def test_missing_series(self):
+        write_series_blob('TESTLEAD', [(month(0), 1.0)])
+        self.assertEqual(correlate_series(['TESTLEAD', 'TESTNONE']), (None, ['TESTNONE']))
+
+
+class AlignmentTests(SimpleTestCase):
+    def test_weeks_start_on_monday(self):
+        days = SeriesArrays.from_rows('TESTW', [(date(2024, 1, 1) + timedelta(i), 0.0) for i in range(9)]).days
+        keys = period_keys(days, 'W')
+        self.assertEqual(len(set(keys[:7])), 1)
+        self.assertNotEqual(keys[6], keys[7])
+        self.assertEqual(str(period_dates(keys[7:8], 'W')[0]), '2024-01-08')
+
+    def test_aggregations(self):
+        arrays = SeriesArrays.from_rows('TESTQ', [(month(i), float(i + 1)) for i in range(5)])
+        expected = {
+            'last': [3, 5], 'first': [1, 4], 'mean': [2, 4.5], 'sum': [6, 9], 'min': [1, 4], 'max': [3, 5],
+        }
+        for how, values in expected.items():
+            keys, result = resample(arrays, 'Q', how)
+            self.assertEqual(result.tolist(), values, how)
+        self.assertEqual(period_dates(keys, 'Q').astype(str).tolist(), ['2020-01-01', '2020-04-01'])
+
+    def test_fills(self):
+        row = [np.nan, 1.0, np.nan, np.nan, np.nan, 5.0, np.nan]
+        for method, limit, expected in [
+            ('ffill', None, [np.nan, 1, 1, 1, 1, 5, 5]),
+            ('ffill', 2, [np.nan, 1, 1, 1, np.nan, 5, 5]),
+            ('bfill', None, [1, 1, 5, 5, 5, 5, np.nan]),
+            ('bfill', 1, [1, 1, np.nan, np.nan, 5, 5, np.nan]),
+            ('interpolate', None, [np.nan, 1, 2, 3, 4, 5, np.nan]),
+        ]:
+            with self.subTest(method=method, limit=limit):
+                matrix = fill(np.array([row]), method, limit)
+                np.testing.assert_array_equal(matrix[0], expected)
+
+    def test_outer_and_inner_joins(self):
+        monthly = SeriesArrays.from_rows('TESTM', [(month(i), float(i)) for i in range(1, 7)])
+        quarterly = SeriesArrays.from_rows('TESTQ', [(month(0), 10.0), (month(3), 20.0)])
+        keys, matrix = align([monthly, quarterly], 'M', fills=['none', 'ffill'])
+        self.assertEqual(period_dates(keys, 'M')[0], np.datetime64('2020-01-01'))
+        np.testing.assert_array_equal(matrix[1], [10, 10, 10, 20, 20, 20, 20])
+        self.assertTrue(np.isnan(matrix[0, 0]))
+
+        keys, matrix = align([monthly, quarterly], 'M', join='inner')
+        self.assertEqual(matrix.tolist(), [[3.0], [20.0]])
+
+    def test_parse_series_specs(self):
+        self.assertEqual(
+            parse_series_specs('gdp:mean:ffill, UNRATE', default_fill='bfill'),
+            [('GDP', 'mean', 'ffill'), ('UNRATE', 'last', 'bfill')],
+        )
+        for spec in (':mean', 'GDP:median', 'GDP:last:pad', 'GDP:last:ffill:x'):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_series_specs(spec)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class FrameSeriesTests(TestCase):
+    def test_frame_on_quarterly_calendar(self):
+        write_series_blob('TESTM', [(month(i), float(i)) for i in range(12)])
+        write_series_blob('TESTQ', [(month(3), 20.0), (month(9), 40.0)])
+
+        frame, missing = frame_series([('TESTM', 'mean', 'none'), ('TESTQ', 'last', 'ffill')], 'Q', end=month(8))
+        self.assertEqual(missing, [])
+        self.assertEqual(frame['index'], ['2020-01-01', '2020-04-01', '2020-07-01'])
+        self.assertEqual(frame['data'], {'TESTM': [1.0, 4.0, 7.0], 'TESTQ': [None, 20.0, 20.0]})
+        self.assertEqual(frame_series([('TESTNONE', 'last', 'none')], 'M'), (None, ['TESTNONE']))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RecomputeTests(TestCase):
+    def setUp(self):
+        store_series_rows('TESTIN', [(month(i), float(i)) for i in range(24)])
+
+    def create(self, expression, frequency='M'):
+        derived = DerivedSeries.objects.create(
+            series_id='TESTOUT', name='Test output', expression=expression, frequency=frequency
+        )
+        save_dependencies(derived, Expression(expression).dependencies)
+        return derived
+
+    def stored(self, series_id='TESTOUT'):
+        return dict(Observation.objects.filter(series_id=series_id).values_list('date', 'value'))
+
+    def test_incremental_window(self):
+        derived = self.create('diff(TESTIN, 1)')
+        self.assertEqual(recompute(derived), 23)
+
+        store_series_rows('TESTIN', [(month(20), 100.0)])
+        derived.refresh_from_db()
+        self.assertEqual((derived.dirty, derived.dirty_from), (True, month(20)))
+        # Only the changed month and the ones after it are rewritten
+        self.assertEqual(recompute(derived), 4)
+
+        values = self.stored()
+        self.assertEqual(values[month(19)], 1.0)
+        self.assertEqual(values[month(20)], 81.0)
+        self.assertEqual(values[month(21)], -79.0)
+        self.assertEqual(values[month(23)], 1.0)
+        self.assertEqual(len(values), 23)
+        self.assertFalse(DerivedSeries.objects.get(pk=derived.pk).dirty)
+
+    def test_full_sample_expression_recomputes_everything(self):
+        derived = self.create('zscore(TESTIN)')
+        recompute(derived)
+        store_series_rows('TESTIN', [(month(20), 100.0)])
+        derived.refresh_from_db()
+        self.assertEqual(recompute(derived), 24)
+
+    def test_full_recompute_replaces_old_points(self):
+        derived = self.create('TESTIN * 2')
+        recompute(derived)
+        DerivedSeries.objects.filter(pk=derived.pk).update(frequency='Q', dirty=True, dirty_from=None)
+        derived.refresh_from_db()
+        self.assertEqual(recompute(derived), 8)
+        self.assertEqual(sorted(self.stored()), [month(i) for i in range(0, 24, 3)])
+        self.assertEqual(len(load_series_arrays('TESTOUT')), 8)
+
+    def test_full_recompute_keeps_versions_increasing(self):
+        derived = self.create('TESTIN * 2')
+        recompute(derived)
+        version = SeriesBlob.objects.get(series_id='TESTOUT').version
+        self.assertEqual(downsample_series('TESTOUT', points=3)['values'][-1], 46.0)
+
+        DerivedSeries.objects.filter(pk=derived.pk).update(expression='TESTIN * 3', dirty=True, dirty_from=None)
+        derived.refresh_from_db()
+        recompute(derived)
+        self.assertGreater(SeriesBlob.objects.get(series_id='TESTOUT').version, version)
+        self.assertEqual(downsample_series('TESTOUT', points=3)['values'][-1], 69.0)
+
+    def test_incremental_recompute_deletes_undefined_points(self):
+        derived = self.create('log(TESTIN)')
+        self.assertEqual(recompute(derived), 23)
+
+        store_series_rows('TESTIN', [(month(20), -1.0)])
+        derived.refresh_from_db()
+        self.assertEqual(recompute(derived), 3)
+        self.assertNotIn(month(20), self.stored())
+        self.assertIn(month(21), self.stored())
+        self.assertNotIn(month(20), load_series_arrays('TESTOUT').dates.tolist())
+        self.assertFalse(SeriesRollup.objects.filter(series_id='TESTOUT', frequency='M', period_start=month(20)).exists())
+        self.assertEqual(SeriesRollup.objects.get(series_id='TESTOUT', frequency='Q', period_start=month(18)).count, 2)
+
+    def test_failure_waits_for_a_change(self):
+        derived = self.create('TESTIN + TESTLATER')
+        self.assertEqual(recompute(derived), 0)
+        derived.refresh_from_db()
+        self.assertEqual((derived.dirty, derived.computed_at), (False, None))
+        self.assertIn('TESTLATER', derived.error)
+        self.assertEqual(recompute(derived), 0)
+
+        store_series_rows('TESTLATER', [(month(i), 1.0) for i in range(24)])
+        derived.refresh_from_db()
+        self.assertEqual(recompute(derived), 24)
+        derived.refresh_from_db()
+        self.assertEqual(derived.error, '')
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class DerivedSeriesViewTests(TestCase):
+    def setUp(self):
+        store_series_rows('TESTIN', [(month(i), float(i)) for i in range(3)])
+        self.user = get_user_model().objects.create_user(username='derived', password='unused-password')
+
+    def create(self):
+        request = APIRequestFactory().post(
+            '/api/derived-series/', {'series_id': 'TESTOUT', 'name': 'Test', 'expression': 'TESTIN + 1'}, format='json'
+        )
+        force_authenticate(request, user=self.user)
+        return DerivedSeriesViewSet.as_view({'post': 'create'})(request)
+
+    def test_recompute_queued_after_commit(self):
+        with mock.patch('indicators.tasks.recompute_derived_series.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                self.assertEqual(self.create().status_code, 201)
+            delay.assert_not_called()
+            for callback in callbacks:
+                callback()
+        delay.assert_called_once_with()
+
+    def test_recompute_inline_without_a_broker(self):
+        no_broker = OSError('no broker')
+        with mock.patch('indicators.tasks.recompute_derived_series.delay', side_effect=no_broker), \
+                mock.patch('indicators.tasks.evaluate_series_alerts.delay', side_effect=no_broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create()
+        self.assertEqual(len(load_series_arrays('TESTOUT')), 3)
+
+
+@override_settings(CACHES=LOCAL_CACHES, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class AlertTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alerts', password='unused-password')
+        self.arrays = store_series_rows('TESTALERT', [(month(i), float(i % 3)) for i in range(12)])
+
+    def rule(self, kind, threshold, periods=1):
+        return AlertRule.objects.create(
+            user=self.user, name=kind, series_id='TESTALERT', kind=kind, threshold=threshold, periods=periods
+        )
+
+    def test_triggers_and_pushes(self):
+        above = self.rule('above', 1.5)
+        fall = self.rule('fall', 2)
+        self.rule('below', -1)
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(alert_group(self.user.pk), channel)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            events = evaluate_alerts(self.arrays, month(6))
+
+        hits = sorted((event.rule.kind, event.date) for event in events)
+        self.assertEqual(hits, [
+            ('above', month(8)), ('above', month(11)), ('fall', month(6)), ('fall', month(9)),
+        ])
+        self.assertEqual(AlertEvent.objects.filter(rule=above).count(), 2)
+        fall.refresh_from_db()
+        self.assertEqual(fall.checked_through, month(11))
+        self.assertIsNotNone(fall.last_triggered_at)
+
+        message = async_to_sync(layer.receive)(channel)
+        self.assertEqual(message['type'], 'alert.triggered')
+        self.assertEqual(len(message['alerts']), 4)
+
+    def test_checked_observations_do_not_retrigger(self):
+        self.rule('above', 1.5)
+        self.assertEqual(len(evaluate_alerts(self.arrays, month(0))), 4)
+        self.assertEqual(evaluate_alerts(self.arrays, month(0)), [])
+
+        arrays = store_series_rows('TESTALERT', [(month(12), 5.0)])
+        self.assertEqual([event.date for event in evaluate_alerts(arrays, month(12))], [month(12)])
+
+    def test_ingest_queues_evaluation_after_commit(self):
+        with mock.patch('indicators.tasks.evaluate_series_alerts.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                store_series_rows('TESTALERT', [(month(12), 5.0)])
+            delay.assert_not_called()
+            for callback in callbacks:
+                callback()
+        delay.assert_called_once_with('TESTALERT', '2021-01-01')
+
+    def test_ingest_evaluates_inline_without_a_broker(self):
+        self.rule('above', 4)
+        with mock.patch('indicators.tasks.evaluate_series_alerts.delay', side_effect=OSError('no broker')):
+            with self.captureOnCommitCallbacks(execute=True):
+                store_series_rows('TESTALERT', [(month(12), 5.0)])
+        self.assertEqual(AlertEvent.objects.get().date, month(12))
+
+
+class BulkIndicatorTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='bulk', password='unused-password')
+        self.factory = APIRequestFactory()
+
+    def post(self, action, data):
+        request = self.factory.post(f'/api/indicators/{action}/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return IndicatorViewSet.as_view({'post': action})(request)
+
+    def items(self, count, value=1.0):
+        return [
+            {'name': f"Indicator {i}", 'country': 'US', 'category': 'Test', 'value': value + i, 'unit': '%'}
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        # One upsert inside a savepoint, whatever the batch size
+        with self.assertNumQueries(3):
+            response = self.post('bulk_create', self.items(50))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Indicator.objects.count(), 50)
+
+        response = self.post('bulk_create', self.items(2, value=10.0) + [{'name': 'No category'}])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual(response.data['errors'][0]['index'], 2)
+        indicator = Indicator.objects.get(name='Indicator 1')
+        self.assertEqual((indicator.value, indicator.previous_value), (11.0, 2.0))
+        self.assertGreater(indicator.last_update, Indicator.objects.get(name='Indicator 3').last_update)
+        self.assertEqual(Indicator.objects.count(), 50)
+
+        self.assertEqual(self.post('bulk_create', {'name': 'x'}).status_code, 400)
+
+    def test_bulk_update(self):
+        self.post('bulk_create', self.items(50))
+        ids = list(Indicator.objects.order_by('pk').values_list('pk', flat=True))
+        data = [{'id': pk, 'value': 100.0} for pk in ids]
+
+        # Read, one batched UPDATE inside a savepoint, read back
+        with self.assertNumQueries(5):
+            response = self.post('bulk_update', data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['updated']), 50)
+        indicator = Indicator.objects.get(pk=ids[0])
+        self.assertEqual((indicator.value, indicator.previous_value), (100.0, 1.0))
+
+        response = self.post('bulk_update', [
+            {'id': ids[0], 'value': 200.0},
+            {'id': ids[1], 'name': 'Indicator 2'},
+            {'id': 0, 'value': 1.0},
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([item['id'] for item in response.data['updated']], [ids[0]])
+        self.assertEqual(len(response.data['errors']), 2)
+
+    def test_bulk_delete(self):
+        self.post('bulk_create', self.items(50))
+        ids = list(Indicator.objects.values_list('pk', flat=True))
+
+        with self.assertNumQueries(4):
+            response = self.post('bulk_delete', {'ids': ids[:40]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Indicator.objects.count(), 10)
+
+        response = self.post('bulk_delete', {'ids': ids[38:42]})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['deleted'], ids[40:42])
+        self.assertEqual(response.data['errors'], [{'id': ids[38], 'error': 'Not found'}, {'id': ids[39], 'error': 'Not found'}])
+
+        self.assertEqual(self.post('bulk_delete', {'ids': 'all'}).status_code, 400)
+
+    def test_upsert_returns_stored_rows(self):
+        first = upsert_indicators([{'name': 'Rate', 'country': 'US', 'category': 'Test', 'value': 1.5, 'unit': '%'}])
+        self.assertIsNone(first[0].previous_value)
+        second = upsert_indicators([
+            {'name': 'Rate', 'country': 'US', 'category': 'Test', 'value': 2.5, 'unit': '%'},
+            {'name': 'Rate', 'country': 'UK', 'category': 'Test', 'value': 0.5, 'unit': '%'},
+        ])
+        self.assertEqual(second[0].pk, first[0].pk)
+        self.assertEqual(second[0].previous_value, Decimal('1.5'))
+        self.assertIsNone(second[1].previous_value)
+        self.assertEqual(Indicator.objects.get(pk=second[1].pk).country, 'UK')
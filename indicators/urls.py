@@ -1,11 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import IndicatorViewSet, create_task, list_tasks, run_task, delete_task
+from .views import (
+    IndicatorViewSet, SeriesRollupViewSet, DerivedSeriesViewSet, AlertRuleViewSet, AlertEventViewSet, create_task, list_tasks, run_task, delete_task, series_points,
+    series_analytics, series_correlations, series_frame
+)
 
 app_name = 'indicators'
 
 router = DefaultRouter()
 router.register(r'indicators', IndicatorViewSet)
+router.register(r'rollups', SeriesRollupViewSet)
+router.register(r'derived', DerivedSeriesViewSet)
+router.register(r'alert-rules', AlertRuleViewSet, basename='alert-rule')
+router.register(r'alert-events', AlertEventViewSet, basename='alert-event')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -13,4 +20,8 @@ urlpatterns = [
     path('tasks/', list_tasks, name='list_tasks'),
     path('tasks/<int:task_id>/run/', run_task, name='run_task'),
     path('tasks/<int:task_id>/', delete_task, name='delete_task'),
+    path('series/frame/', series_frame, name='series_frame'),
+    path('series/correlations/', series_correlations, name='series_correlations'),
+    path('series/<str:series_id>/points/', series_points, name='series_points'),
+    path('series/<str:series_id>/analytics/', series_analytics, name='series_analytics'),
 ] 
\ No newline at end of file
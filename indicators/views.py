@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.shortcuts import render
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action, api_view, permission_classes
@@ -5,11 +6,55 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated
 from django_celery_beat.models import PeriodicTask, IntervalSchedule
-from .models import Indicator, Task
-from .serializers import IndicatorSerializer, IndicatorListSerializer, BulkIndicatorSerializer, TaskSerializer
+from .models import AlertEvent, AlertRule, DerivedDependency, DerivedSeries, Indicator, SeriesRollup, Task
+from .serializers import (
+    IndicatorSerializer, IndicatorListSerializer, BulkIndicatorSerializer, SeriesRollupSerializer, TaskSerializer,
+    DerivedSeriesSerializer, AlertRuleSerializer, AlertEventSerializer, BulkIndicatorUpdateSerializer
+)
 from .tasks import run_manual_task, run_scheduled_task
+from .derived import Expression, delete_derived_data, queue_derived_recompute, save_dependencies
+from .ingest import INDICATOR_BATCH_SIZE, last_observation_date, upsert_indicators
+from .downsample import METHODS, downsample_series
+from .analytics import parse_transforms, transform_series
+from .alignment import FREQUENCIES, JOINS, frame_series, parse_series_specs
+from .correlation import MAX_CORRELATION_SERIES, MAX_LAG, correlate_series
+from datetime import date
 import json
 
+def as_id(value):
+    """Return ``value`` as an Indicator ID, or None when it cannot be one"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def unique_conflicts(indicators):
+    """
+    Return the IDs of renamed ``indicators`` whose (country, name) would
+    clash with another indicator, checked with one query for the batch.
+    """
+    if not indicators:
+        return set()
+    pairs = {}
+    conflicts = set()
+    for indicator in indicators:
+        key = (indicator.country, indicator.name)
+        if key in pairs:
+            conflicts.add(indicator.pk)
+        pairs.setdefault(key, indicator.pk)
+    taken = Indicator.objects.filter(
+        name__in={name for _, name in pairs}
+    ).exclude(pk__in=[indicator.pk for indicator in indicators]).values_list('country', 'name')
+    conflicts.update(pairs[key] for key in taken if key in pairs)
+    return conflicts
+
+
+# Most points a chart may ask for from series_points
+MAX_CHART_POINTS = 5000
+# Most series one frame may join
+MAX_FRAME_SERIES = 20
+
 
 class IndicatorViewSet(viewsets.ModelViewSet):
     """
@@ -32,13 +77,37 @@ class IndicatorViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
         """
-        Create multiple indicators in a single request.
+        Create multiple indicators in a single request. Items whose country
+        and name already exist update that indicator instead, so repeated
+        syncs are idempotent.
         """
-        serializer = BulkIndicatorSerializer(data=request.data, many=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = request.data
+        if not isinstance(data, list):
+            return Response(
+                {'error': 'Expected a list of items'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        valid = {}
+        errors = []
+        for index, item in enumerate(data):
+            serializer = BulkIndicatorSerializer(data=item)
+            if serializer.is_valid():
+                # A later item for the same indicator wins; one upsert
+                # statement cannot write a row twice
+                fields = serializer.validated_data
+                valid.pop((fields['country'], fields['name']), None)
+                valid[fields['country'], fields['name']] = fields
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        with transaction.atomic():
+            indicators = upsert_indicators(list(valid.values()))
+        created = BulkIndicatorSerializer(indicators, many=True).data
+
+        if errors:
+            return Response({'created': created, 'errors': errors}, status=status.HTTP_207_MULTI_STATUS)
+        return Response(created, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['post'])
     def bulk_update(self, request):
@@ -51,27 +120,46 @@ class IndicatorViewSet(viewsets.ModelViewSet):
                 {'error': 'Expected a list of items'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        updated = []
+
+        # One query for every indicator named in the request
+        indicators = Indicator.objects.in_bulk(
+            {as_id(item.get('id')) for item in data if isinstance(item, dict)} - {None}
+        )
+        changed = {}
         errors = []
-        
         for item in data:
-            try:
-                indicator = Indicator.objects.get(id=item.get('id'))
-                serializer = IndicatorSerializer(indicator, data=item, partial=True)
-                if serializer.is_valid():
-                    serializer.save()
-                    updated.append(serializer.data)
-                else:
-                    errors.append(serializer.errors)
-            except Indicator.DoesNotExist:
-                errors.append({'id': item.get('id'), 'error': 'Not found'})
-        
+            item_id = item.get('id') if isinstance(item, dict) else None
+            indicator = indicators.get(as_id(item_id))
+            if indicator is None:
+                errors.append({'id': item_id, 'error': 'Not found'})
+                continue
+            serializer = BulkIndicatorUpdateSerializer(indicator, data=item, partial=True)
+            if not serializer.is_valid():
+                errors.append(serializer.errors)
+                continue
+            for field, value in serializer.validated_data.items():
+                setattr(indicator, field, value)
+            changed.setdefault(indicator.pk, set()).update(serializer.validated_data)
+
+        renamed = [indicators[pk] for pk, fields in changed.items() if fields & {'country', 'name'}]
+        for pk in unique_conflicts(renamed):
+            errors.append({'id': pk, 'error': 'An indicator with this country and name already exists'})
+            del changed[pk]
+
+        # One batched UPDATE per set of fields written
+        groups = {}
+        for pk, fields in changed.items():
+            groups.setdefault(frozenset(fields), []).append(indicators[pk])
+        with transaction.atomic():
+            for fields, group in groups.items():
+                Indicator.objects.bulk_update(group, list(fields), batch_size=INDICATOR_BATCH_SIZE)
+        updated = IndicatorSerializer(Indicator.objects.filter(pk__in=changed).order_by('pk'), many=True).data
+
         response_data = {
             'updated': updated,
             'errors': errors
         }
-        
+
         if errors:
             return Response(response_data, status=status.HTTP_207_MULTI_STATUS)
         return Response(response_data)
@@ -87,23 +175,22 @@ class IndicatorViewSet(viewsets.ModelViewSet):
                 {'error': 'Expected a list of IDs'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        deleted = []
-        errors = []
-        
-        for id in ids:
-            try:
-                indicator = Indicator.objects.get(id=id)
-                indicator.delete()
-                deleted.append(id)
-            except Indicator.DoesNotExist:
-                errors.append({'id': id, 'error': 'Not found'})
-        
+
+        with transaction.atomic():
+            found = set(Indicator.objects.filter(
+                id__in={as_id(id) for id in ids} - {None}
+            ).values_list('id', flat=True))
+            # Indicator has no dependents, so this is a single DELETE ... WHERE id IN
+            Indicator.objects.filter(id__in=found).delete()
+
+        deleted = [id for id in ids if as_id(id) in found]
+        errors = [{'id': id, 'error': 'Not found'} for id in ids if as_id(id) not in found]
+
         response_data = {
             'deleted': deleted,
             'errors': errors
         }
-        
+
         if errors:
             return Response(response_data, status=status.HTTP_207_MULTI_STATUS)
         return Response(response_data)
@@ -133,6 +220,263 @@ class IndicatorViewSet(viewsets.ModelViewSet):
         serializer = IndicatorListSerializer(latest, many=True)
         return Response(serializer.data)
 
+class SeriesRollupViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Precomputed monthly, quarterly and annual rollups of FRED series, e.g.
+    ``?series_id=UNRATE&frequency=M&period_start__gte=2020-01-01``.
+    """
+    queryset = SeriesRollup.objects.all()
+    serializer_class = SeriesRollupSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = {
+        'series_id': ['exact'],
+        'frequency': ['exact'],
+        'period_start': ['gte', 'lte'],
+    }
+    ordering_fields = ['period_start']
+    ordering = ['series_id', 'frequency', 'period_start']
+
+class DerivedSeriesViewSet(viewsets.ModelViewSet):
+    """
+    Series defined by expressions over other series, e.g.
+    ``{"series_id": "REALFEDFUNDS", "name": "Real Fed Funds Rate",
+    "expression": "FEDFUNDS - pct_change(CPIAUCSL, 12)"}``. Values are
+    served like any stored series once computed.
+    """
+    queryset = DerivedSeries.objects.prefetch_related('dependencies').order_by('series_id')
+    serializer_class = DerivedSeriesSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        self._save(serializer)
+
+    def perform_update(self, serializer):
+        derived = serializer.instance
+        self._save(serializer, old=(derived.series_id, derived.name, derived.country))
+
+    def destroy(self, request, *args, **kwargs):
+        derived = self.get_object()
+        readers = list(
+            DerivedDependency.objects.filter(series_id=derived.series_id)
+            .values_list('derived__series_id', flat=True)
+        )
+        if readers:
+            return Response(
+                {'error': f"{derived.series_id} is read by {', '.join(readers)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return super().destroy(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            delete_derived_data(instance.series_id)
+            instance.delete()
+
+    def _save(self, serializer, old=None):
+        # A new or edited definition is recomputed over its whole history
+        with transaction.atomic():
+            derived = serializer.save(dirty=True, dirty_from=None)
+            if old is not None and (derived.series_id, derived.name, derived.country) != old:
+                # The recompute stores under the new ID and Indicator row only
+                delete_derived_data(old[0])
+            save_dependencies(derived, Expression(derived.expression).dependencies)
+            queue_derived_recompute()
+
+class AlertRuleViewSet(viewsets.ModelViewSet):
+    """
+    The current user's alert rules. Rules are checked whenever their series
+    stores new observations, and hits are pushed to the user's websocket
+    connections as 'alerts' messages.
+    """
+    serializer_class = AlertRuleSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['series_id', 'kind', 'active']
+
+    def get_queryset(self):
+        return AlertRule.objects.filter(user=self.request.user).order_by('-created_at')
+
+    def perform_create(self, serializer):
+        # Only observations stored from now on can trigger the rule
+        series_id = serializer.validated_data['series_id']
+        serializer.save(user=self.request.user, checked_through=last_observation_date(series_id))
+
+class AlertEventViewSet(viewsets.ReadOnlyModelViewSet):
+    """Alerts triggered for the current user's rules, newest first"""
+    serializer_class = AlertEventSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['rule']
+
+    def get_queryset(self):
+        return AlertEvent.objects.filter(rule__user=self.request.user).select_related('rule')
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def series_points(request, series_id):
+    """
+    Return a stored series downsampled for charting, e.g.
+    ``?start=2000-01-01&end=2020-12-31&points=800&method=lttb``.
+    ``method`` is 'lttb' (shape-preserving, the default) or 'minmax'
+    (keeps every bucket's extremes).
+    """
+    params = request.query_params
+    try:
+        start = date.fromisoformat(params['start']) if params.get('start') else None
+        end = date.fromisoformat(params['end']) if params.get('end') else None
+        points = int(params.get('points', 500))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    method = params.get('method', 'lttb')
+    if method not in METHODS:
+        return Response(
+            {'error': f"method must be one of {', '.join(METHODS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not 2 <= points <= MAX_CHART_POINTS:
+        return Response(
+            {'error': f"points must be between 2 and {MAX_CHART_POINTS}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    data = downsample_series(series_id.upper(), start, end, points, method)
+    if data is None:
+        return Response(
+            {'error': f'Series {series_id} is not stored'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def series_analytics(request, series_id):
+    """
+    Return a stored series run through a chain of transforms, e.g.
+    ``?transforms=pct_change:12,zscore:60&start=2000-01-01&points=800``.
+    Transforms are applied left to right: rolling_mean:N, rolling_std:N,
+    zscore[:N], percentile[:N], diff[:N], pct_change[:N] and log.
+    ``points`` is optional and downsamples the result.
+    """
+    params = request.query_params
+    try:
+        steps = parse_transforms(params.get('transforms', ''))
+        start = date.fromisoformat(params['start']) if params.get('start') else None
+        end = date.fromisoformat(params['end']) if params.get('end') else None
+        points = int(params['points']) if params.get('points') else None
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if points is not None and not 2 <= points <= MAX_CHART_POINTS:
+        return Response(
+            {'error': f"points must be between 2 and {MAX_CHART_POINTS}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    data = transform_series(series_id.upper(), steps, start, end, points)
+    if data is None:
+        return Response(
+            {'error': f'Series {series_id} is not stored'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def series_correlations(request):
+    """
+    Return lead/lag correlation matrices between stored series, e.g.
+    ``?series=UNRATE,UMCSENT,HOUST&frequency=M&max_lag=12``. Series are
+    aligned on ``frequency`` (D, W, M, Q or A); an optional ``transforms``
+    chain such as ``pct_change:12`` is applied to each series first.
+    """
+    params = request.query_params
+    series_ids = list(dict.fromkeys(
+        s.strip().upper() for s in params.get('series', '').split(',') if s.strip()
+    ))
+    if not 2 <= len(series_ids) <= MAX_CORRELATION_SERIES:
+        return Response(
+            {'error': f"series must list between 2 and {MAX_CORRELATION_SERIES} series IDs"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    frequency = params.get('frequency', 'M').upper()
+    if frequency not in FREQUENCIES:
+        return Response(
+            {'error': f"frequency must be one of {', '.join(FREQUENCIES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        max_lag = int(params.get('max_lag', 12))
+        start = date.fromisoformat(params['start']) if params.get('start') else None
+        end = date.fromisoformat(params['end']) if params.get('end') else None
+        steps = parse_transforms(params['transforms']) if params.get('transforms') else None
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 <= max_lag <= MAX_LAG:
+        return Response(
+            {'error': f"max_lag must be between 0 and {MAX_LAG}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    data, missing = correlate_series(series_ids, frequency, max_lag, start, end, steps)
+    if missing:
+        return Response(
+            {'error': f"Series not stored: {', '.join(missing)}"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def series_frame(request):
+    """
+    Join stored series onto one calendar and return them as a single
+    columnar frame, e.g.
+    ``?series=GDP:last:ffill,UNRATE:mean,FEDFUNDS&frequency=M``.
+
+    Each series may carry its own ``aggregation:fill`` rules; ``how``
+    (last, first, mean, sum, min or max) and ``fill`` (none, ffill, bfill
+    or interpolate) set the defaults. ``limit`` caps how many periods a
+    value is carried forward or back and ``join=inner`` keeps only periods
+    every series covers.
+    """
+    params = request.query_params
+    frequency = params.get('frequency', 'M').upper()
+    join = params.get('join', 'outer')
+    if frequency not in FREQUENCIES:
+        return Response(
+            {'error': f"frequency must be one of {', '.join(FREQUENCIES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if join not in JOINS:
+        return Response(
+            {'error': f"join must be one of {', '.join(JOINS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        specs = parse_series_specs(
+            params.get('series', ''), params.get('how', 'last'), params.get('fill', 'none')
+        )
+        start = date.fromisoformat(params['start']) if params.get('start') else None
+        end = date.fromisoformat(params['end']) if params.get('end') else None
+        limit = int(params['limit']) if params.get('limit') else None
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    series_ids = [series_id for series_id, _, _ in specs]
+    if not 1 <= len(series_ids) <= MAX_FRAME_SERIES or len(set(series_ids)) != len(series_ids):
+        return Response(
+            {'error': f"series must list between 1 and {MAX_FRAME_SERIES} distinct series IDs"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if limit is not None and limit < 1:
+        return Response({'error': "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+
+    frame, missing = frame_series(specs, frequency, start, end, limit, join)
+    if missing:
+        return Response(
+            {'error': f"Series not stored: {', '.join(missing)}"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(frame)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_tasks(request):
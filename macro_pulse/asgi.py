@@ -20,6 +20,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'macro_pulse.settings')
 # is populated before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
+# The pooled FRED session (indicators.fred_api.get_session) is tied to the
+# server's event loop and lives for the whole process: Daphne does not send
+# ASGI lifespan events, so there is no shutdown hook to close it from and the
+# sockets are released when the process exits.
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AllowedHostsOriginValidator(
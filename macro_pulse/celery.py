@@ -1,6 +1,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown, worker_shutdown
 from django.conf import settings
 
 
@@ -44,10 +45,27 @@ app.conf.update(
 def debug_task(self):
     print(f'Request: {self.request!r}')
 
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_fred_pool(**kwargs):
+    """Close the pooled FRED connections when a worker process exits"""
+    from indicators.fred_api import close_pool
+    close_pool()
+
 # Configure periodic tasks
 app.conf.beat_schedule = {
-    'update-indicators-every-6-hours': {
-        'task': 'indicators.tasks.update_all_indicators',
-        'schedule': crontab(hour='*/6'),
+    # Each series is refreshed just after its expected release rather than
+    # on a fixed cadence; see indicators.scheduler
+    'refresh-due-indicators-every-minute': {
+        'task': 'indicators.tasks.refresh_due_indicators',
+        'schedule': crontab(),
+    },
+    'sync-release-calendar-daily': {
+        'task': 'indicators.tasks.sync_series_calendar',
+        'schedule': crontab(hour=5, minute=0),
+    },
+    'sync-series-catalog-daily': {
+        'task': 'indicators.tasks.sync_series_catalog',
+        'schedule': crontab(hour=4, minute=30),
     },
 } 
\ No newline at end of file
@@ -220,7 +220,17 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # Shared by all web and worker processes (FRED metadata, rate limits, ...)
+    'fred': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'redis://{os.getenv("REDIS_HOST", "localhost")}:{os.getenv("REDIS_PORT", "6379")}/{os.getenv("FRED_CACHE_REDIS_DB", "1")}',
+        'KEY_PREFIX': 'fred',
+        'OPTIONS': {
+            'socket_connect_timeout': 1,
+            'socket_timeout': 1,
+        },
+    },
 }
 
 # JWT Settings
@@ -249,11 +259,42 @@ SIMPLE_JWT = {
 FRED_API_KEY = os.getenv('FRED_API_KEY', '')
 if not FRED_API_KEY:
     raise ValueError("FRED_API_KEY environment variable is not set")
+FRED_API_BASE_URL = os.getenv('FRED_API_BASE_URL', 'https://api.stlouisfed.org/fred')  # Point at a fred_stub server for offline runs
+FRED_REFRESH_CONCURRENCY = int(os.getenv('FRED_REFRESH_CONCURRENCY', 10))  # Series refreshed in parallel
+FRED_CONNECTION_LIMIT = int(os.getenv('FRED_CONNECTION_LIMIT', 20))  # Pooled connections per host
+FRED_DNS_CACHE_TTL = int(os.getenv('FRED_DNS_CACHE_TTL', 300))  # Seconds
+FRED_KEEPALIVE_TIMEOUT = int(os.getenv('FRED_KEEPALIVE_TIMEOUT', 60))  # Seconds an idle connection is kept
+FRED_REQUEST_TIMEOUT = int(os.getenv('FRED_REQUEST_TIMEOUT', 30))  # Seconds
+FRED_DERIVED_CACHE_TTL = int(os.getenv('FRED_DERIVED_CACHE_TTL', 24 * 60 * 60))  # Seconds downsampled/transformed series are cached; keys include the series version
+FRED_METADATA_CACHE_TTL = int(os.getenv('FRED_METADATA_CACHE_TTL', 6 * 60 * 60))  # Seconds series info is cached
+# Cluster-wide FRED rate limit (token bucket in Redis, or per process with 'local')
+FRED_RATE_LIMIT_BACKEND = os.getenv('FRED_RATE_LIMIT_BACKEND', 'redis')
+FRED_RATE_LIMIT_PER_MINUTE = int(os.getenv('FRED_RATE_LIMIT_PER_MINUTE', 120))
+FRED_RATE_LIMIT_BURST = int(os.getenv('FRED_RATE_LIMIT_BURST', 20))
+FRED_RATE_LIMIT_INTERACTIVE_SHARE = float(os.getenv('FRED_RATE_LIMIT_INTERACTIVE_SHARE', 0.25))  # Burst kept for interactive requests
+FRED_RATE_LIMIT_MAX_WAIT = int(os.getenv('FRED_RATE_LIMIT_MAX_WAIT', 10))  # Seconds an interactive request may wait
+FRED_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('FRED_CIRCUIT_FAILURE_THRESHOLD', 5))  # Failures that open the circuit
+FRED_CIRCUIT_FAILURE_WINDOW = int(os.getenv('FRED_CIRCUIT_FAILURE_WINDOW', 60))  # Seconds failures are counted over
+FRED_CIRCUIT_OPEN_SECONDS = int(os.getenv('FRED_CIRCUIT_OPEN_SECONDS', 60))  # Seconds to fail fast once open
+FRED_RETRY_ATTEMPTS = int(os.getenv('FRED_RETRY_ATTEMPTS', 2))  # In-request retries for transient errors
+FRED_RETRY_BASE_DELAY = float(os.getenv('FRED_RETRY_BASE_DELAY', 0.5))  # Seconds, doubled per retry
+FRED_RETRY_MAX_DELAY = float(os.getenv('FRED_RETRY_MAX_DELAY', 8))  # Upper bound for one retry delay
+FRED_TASK_RETRY_BASE_DELAY = int(os.getenv('FRED_TASK_RETRY_BASE_DELAY', 60))  # Celery task retry delay, doubled per retry
+FRED_TASK_RETRY_MAX_DELAY = int(os.getenv('FRED_TASK_RETRY_MAX_DELAY', 1800))  # Upper bound for one task retry delay
+FRED_RELEASE_TIME = os.getenv('FRED_RELEASE_TIME', '07:30')  # US Central time of the first check on a release date
+FRED_RELEASE_WINDOW = int(os.getenv('FRED_RELEASE_WINDOW', 12 * 60 * 60))  # Seconds of close polling after an expected release
+FRED_SCHEDULE_MIN_INTERVAL = int(os.getenv('FRED_SCHEDULE_MIN_INTERVAL', 300))  # Shortest gap between checks of a series
+FRED_SCHEDULE_POLL_INTERVAL = int(os.getenv('FRED_SCHEDULE_POLL_INTERVAL', 1800))  # Longest gap while a release is due
+FRED_SCHEDULE_MAX_INTERVAL = int(os.getenv('FRED_SCHEDULE_MAX_INTERVAL', 24 * 60 * 60))  # Longest gap between checks of a series
 
 # Channels configuration
+# Redis-backed so Celery workers can push alerts to websocket consumers
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {
+            "hosts": [f'redis://{os.getenv("REDIS_HOST", "localhost")}:{os.getenv("REDIS_PORT", "6379")}/{os.getenv("CHANNELS_REDIS_DB", "2")}'],
+        },
     },
 }
 
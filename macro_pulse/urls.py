@@ -15,6 +15,7 @@ from rest_framework.response import Response
 from django.db import connections
 from django.core.cache import cache
 from indicators.tasks import health_check_task
+from indicators.ratelimit import INTERACTIVE, get_limiter
 import requests
 from django.conf import settings
 import redis
@@ -75,15 +76,22 @@ class HealthCheckView(APIView):
             health["celery"] = f"error: {str(e)}"
             health["status"] = "error"
 
-        # FRED API check
+        # FRED API check. Report the rate limiter's bucket level and only
+        # probe FRED when a token is free right now, so health checks never
+        # block on the limiter or push an empty bucket further into debt.
         try:
-            fred_url = f"https://api.stlouisfed.org/fred/category?category_id=0&api_key={settings.FRED_API_KEY}&file_type=json"
-            r = requests.get(fred_url, timeout=3)
-            if r.status_code == 200:
-                health["fred_api"] = "ok"
+            limiter = get_limiter()
+            health["fred_rate_limit"] = f"{limiter.available():.1f}/{limiter.capacity} tokens"
+            if limiter.try_acquire(INTERACTIVE):
+                health["fred_api"] = "skipped: rate limit reached"
             else:
-                health["fred_api"] = f"error: status {r.status_code}"
-                health["status"] = "error"
+                fred_url = f"{settings.FRED_API_BASE_URL}/category?category_id=0&api_key={settings.FRED_API_KEY}&file_type=json"
+                r = requests.get(fred_url, timeout=3)
+                if r.status_code == 200:
+                    health["fred_api"] = "ok"
+                else:
+                    health["fred_api"] = f"error: status {r.status_code}"
+                    health["status"] = "error"
         except Exception as e:
             health["fred_api"] = f"error: {str(e)}"
             health["status"] = "error"
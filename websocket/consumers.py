@@ -2,10 +2,20 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 import json
 from datetime import datetime
 import logging
+from channels.db import database_sync_to_async
+from indicators.alerts import alert_group
+from indicators.circuit import CircuitOpenError
 from indicators.fred_api import FREDAPI
+from indicators.catalog import search_catalog
+from indicators.ingest import stored_series
 
 logger = logging.getLogger(__name__)
 
+# Most series a client may request in one get_many_series message
+MAX_BATCH_SERIES = 50
+# Most results a search_series message may ask for
+MAX_SEARCH_RESULTS = 50
+
 class EconomicDataConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         """Handle WebSocket connection"""
@@ -17,12 +27,18 @@ class EconomicDataConsumer(AsyncWebsocketConsumer):
             
         logger.info(f"WebSocket connection established for user: {user.username}")
         await self.accept()
+        await self.subscribe_alerts(user)
         await self.send_welcome_message(user.username)
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
         user = self.scope["user"]
         logger.info(f"WebSocket connection closed for user: {user.username if not user.is_anonymous else 'anonymous'}")
+        if getattr(self, 'alert_group', None):
+            try:
+                await self.channel_layer.group_discard(self.alert_group, self.channel_name)
+            except Exception as e:
+                logger.warning(f"Could not unsubscribe from alerts: {str(e)}")
 
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
@@ -37,6 +53,23 @@ class EconomicDataConsumer(AsyncWebsocketConsumer):
             logger.error(f"Error processing message: {str(e)}")
             await self.send_error("Internal server error")
 
+    async def subscribe_alerts(self, user):
+        """Join the user's alert group so triggered alert rules are pushed here"""
+        try:
+            await self.channel_layer.group_add(alert_group(user.id), self.channel_name)
+            self.alert_group = alert_group(user.id)
+        except Exception as e:
+            # The connection still serves data requests without alerts
+            logger.warning(f"Could not subscribe {user.username} to alerts: {str(e)}")
+
+    async def alert_triggered(self, event):
+        """Forward alert events pushed to the user's group by the ingest"""
+        await self.send(text_data=json.dumps({
+            'type': 'alerts',
+            'alerts': event['alerts'],
+            'timestamp': datetime.now().isoformat()
+        }))
+
     async def send_welcome_message(self, username):
         await self.send(text_data=json.dumps({
             'type': 'welcome',
@@ -63,9 +96,21 @@ class EconomicDataConsumer(AsyncWebsocketConsumer):
                 return
                 
             try:
-                fred_api = FREDAPI()
-                series_data = await fred_api.get_series(series_id)
-                logger.info(f"FRED API response for series {series_id}: {series_data}")
+                series_data = await self.get_fred_api().get_series(series_id)
+                logger.info(f"FRED API returned {len(series_data['observations'])} observations for series {series_id}")
+                await self.send(text_data=json.dumps({
+                    'type': 'series_data',
+                    'series_id': series_id,
+                    'data': series_data,
+                    'timestamp': datetime.now().isoformat()
+                }))
+            except CircuitOpenError as e:
+                # FRED is down: serve what was last stored instead
+                series_data = await database_sync_to_async(stored_series)(series_id)
+                if series_data is None:
+                    await self.send_error(f"Error fetching series data: {str(e)}")
+                    return
+                logger.warning(f"Serving stored data for {series_id}: {str(e)}")
                 await self.send(text_data=json.dumps({
                     'type': 'series_data',
                     'series_id': series_id,
@@ -76,6 +121,49 @@ class EconomicDataConsumer(AsyncWebsocketConsumer):
                 logger.error(f"Error fetching series data: {str(e)}")
                 await self.send_error(f"Error fetching series data: {str(e)}")
                 
+        elif message_type == 'get_many_series':
+            series_ids = data.get('series_ids')
+            if not isinstance(series_ids, list) or not series_ids:
+                await self.send_error("A non-empty list of series IDs is required")
+                return
+            if len(series_ids) > MAX_BATCH_SERIES:
+                await self.send_error(f"At most {MAX_BATCH_SERIES} series can be requested at once")
+                return
+            
+            # Send each series as soon as it arrives rather than waiting for
+            # the slowest one
+            succeeded, failed = [], []
+            async for series_id, series_data, error in self.get_fred_api().get_many(series_ids):
+                if isinstance(error, CircuitOpenError):
+                    # FRED is down: serve what was last stored instead
+                    series_data = await database_sync_to_async(stored_series)(series_id)
+                    if series_data is not None:
+                        logger.warning(f"Serving stored data for {series_id}: {str(error)}")
+                        error = None
+                if error is not None:
+                    logger.error(f"Error fetching series data for {series_id}: {error}")
+                    failed.append(series_id)
+                    await self.send(text_data=json.dumps({
+                        'type': 'series_error',
+                        'series_id': series_id,
+                        'message': f"Error fetching series data: {error}",
+                        'timestamp': datetime.now().isoformat()
+                    }))
+                else:
+                    succeeded.append(series_id)
+                    await self.send(text_data=json.dumps({
+                        'type': 'series_data',
+                        'series_id': series_id,
+                        'data': series_data,
+                        'timestamp': datetime.now().isoformat()
+                    }))
+            await self.send(text_data=json.dumps({
+                'type': 'batch_complete',
+                'succeeded': succeeded,
+                'failed': failed,
+                'timestamp': datetime.now().isoformat()
+            }))
+                
         elif message_type == 'search_series':
             search_term = data.get('search_term')
             if not search_term:
@@ -83,8 +171,10 @@ class EconomicDataConsumer(AsyncWebsocketConsumer):
                 return
                 
             try:
-                fred_api = FREDAPI()
-                search_results = await fred_api.search_series(search_term)
+                # Searches only read the local catalog (filled by sync_catalog),
+                # so typing in a search box never spends FRED requests
+                limit = max(1, min(int(data.get('limit') or 10), MAX_SEARCH_RESULTS))
+                search_results = await database_sync_to_async(search_catalog)(search_term, limit)
                 await self.send(text_data=json.dumps({
                     'type': 'search_results',
                     'search_term': search_term,
@@ -98,6 +188,12 @@ class EconomicDataConsumer(AsyncWebsocketConsumer):
         else:
             await self.send_error(f"Unknown message type: {message_type}")
 
+    def get_fred_api(self):
+        """Return this connection's FRED client, which uses the pooled session"""
+        if getattr(self, 'fred_api', None) is None:
+            self.fred_api = FREDAPI()
+        return self.fred_api
+
     async def send_error(self, message):
         await self.send(text_data=json.dumps({
             'type': 'error',